@@ -0,0 +1,135 @@
+"""
+Token authentication with expiring tokens and an in-process cache.
+
+Tokens are forms.AuthToken rows. Looking one up joins forms_authtoken to
+forms_user, so CachedTokenAuthentication keeps the token and the user row
+it resolved to in a per-process LRU cache for AUTH_TOKEN_CACHE_TTL seconds;
+a dashboard polling every few seconds authenticates without a query.
+
+Expiry is checked against the cached (or just loaded) expires_at, so an
+expired token is rejected without a query of its own. Tokens in use slide:
+once expires_at is more than AUTH_TOKEN_REFRESH_INTERVAL behind a fresh
+lifetime, one UPDATE pushes it forward again.
+
+The user is rebuilt with User.from_db from the cached columns; the password
+hash is never cached and is loaded on first access like any deferred field.
+
+Cache entries are dropped on logout and revocation (forms/views.py) and
+when the user is saved or deleted (role change, deactivation -- see
+forms/signals.py). Each process has its own cache, so another gunicorn
+worker may accept a revoked token, or a deactivated user's token, for up to
+the cache TTL.
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AuthToken, User
+
+# Columns cached per user; everything except the password hash
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname != 'password']
+
+
+class TokenCache:
+    """Thread-safe LRU mapping of token key -> (expiry, token row, user row)"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] <= monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, token_values, user_values):
+        with self.lock:
+            self.entries[key] = (monotonic() + self.ttl, token_values, user_values)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def forget(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def forget_users(self, user_ids):
+        user_ids = set(user_ids)
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[1][1] in user_ids]:
+                del self.entries[key]
+
+    def forget_user(self, user_id):
+        self.forget_users([user_id])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+token_cache = TokenCache(
+    getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 1024),
+    getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication over AuthToken that answers repeat requests from token_cache"""
+    model = AuthToken
+    token_fields = ['key', 'user_id', 'created', 'expires_at']
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = self.load(key)
+            token_cache.set(key, *cached)
+        token_values, user_values = cached
+
+        token = self.model.from_db('default', self.token_fields, token_values)
+        now = timezone.now()
+        if token.is_expired(now):
+            # Left cached: an expired token never becomes valid again
+            raise exceptions.AuthenticationFailed(_('Token expired.'))
+
+        expires_at = now + self.model.lifetime()
+        if expires_at - token.expires_at >= timedelta(seconds=settings.AUTH_TOKEN_REFRESH_INTERVAL):
+            self.model.objects.filter(key=key).update(expires_at=expires_at)
+            token.expires_at = expires_at
+            token_cache.set(key, tuple(getattr(token, field) for field in self.token_fields), user_values)
+
+        user = User.from_db('default', USER_FIELDS, user_values)
+        token.user = user
+        return (user, token)
+
+    def load(self, key):
+        try:
+            token = self.model.objects.select_related('user').get(key=key)
+        except self.model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (
+            tuple(getattr(token, field) for field in self.token_fields),
+            tuple(getattr(token.user, field) for field in USER_FIELDS),
+        )
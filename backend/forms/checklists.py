@@ -0,0 +1,403 @@
+"""
+Checklist engine shared by every checklist area (cafe, marshal, ...).
+
+The items of each area and checklist type live in ChecklistTemplateItem,
+and a day's progress is a single Checklist row per (date, area, type) with
+the per-item state held in JSON. The API still exposes one record per item;
+its integer id packs the Checklist pk and the template item pk together so
+existing clients can keep addressing items individually.
+
+Listing never unpacks every day's state: Checklist.counts holds how many
+items each checklist has started and completed, overall and per user, so
+item lists are counted and paged in SQL and only the checklists on the
+requested page are loaded.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
+from django.db.models import F, Sum, Window
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Checklist, ChecklistTemplateItem, User
+from .versions import bump
+
+# Item ids are checklist_pk * ITEM_PK_STRIDE + template_pk. The decimal
+# layout is kept because clients already hold these ids; it is unambiguous
+# as long as every template pk is between 1 and MAX_TEMPLATE_PK, which
+# upsert_items enforces when it adds templates.
+ITEM_PK_STRIDE = 100000
+MAX_TEMPLATE_PK = ITEM_PK_STRIDE - 1
+
+
+def item_pk(checklist_pk, template_pk):
+    if not 0 < template_pk <= MAX_TEMPLATE_PK:
+        # A larger template pk would give the item another checklist's id
+        raise ValueError(f"Template item pk {template_pk} does not fit in a checklist item id")
+    return checklist_pk * ITEM_PK_STRIDE + template_pk
+
+
+def split_item_pk(pk):
+    """Return (checklist pk, template item pk) for an item id, or None if it is malformed"""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    checklist_pk, template_pk = divmod(pk, ITEM_PK_STRIDE)
+    if checklist_pk < 1 or template_pk < 1:
+        return None
+    return checklist_pk, template_pk
+
+
+class ChecklistItem:
+    """One item of a day's checklist, shaped like the old per-item rows"""
+    OWNER_FIELD = 'updated_by'
+
+    def __init__(self, checklist, template, users):
+        state = checklist.state[template.item_id]
+        self.checklist = checklist
+        self.template = template
+        self.id = item_pk(checklist.pk, template.pk)
+        self.date = checklist.date
+        self.area = checklist.area
+        self.checklist_type = checklist.checklist_type
+        self.item_id = template.item_id
+        self.item_name = state.get('item_name', template.item_name)
+        self.completed = state.get('completed', False)
+        self.created_by = checklist.created_by
+        self.created_by_id = checklist.created_by_id
+        self.created_at = checklist.created_at
+        self.updated_by_id = state.get('updated_by')
+        self.updated_by = users.get(self.updated_by_id)
+        self.updated_at = parse_datetime(state['updated_at']) if state.get('updated_at') else checklist.updated_at
+
+    def get_checklist_type_display(self):
+        return dict(ChecklistTemplateItem.CHECKLIST_TYPES[self.area]).get(self.checklist_type, self.checklist_type)
+
+
+class ChecklistItems:
+    """
+    The items a list_items() call matches, in (checklist type, date,
+    item_id) order. len() and slicing run on Checklist.counts in SQL, so a
+    paginator only loads the checklists that hold the requested page.
+    """
+    ordering = ('checklist_type', 'date', 'pk')
+
+    def __init__(self, engine, checklists, filters):
+        self.engine = engine
+        self.filters = filters
+        key = Checklist.counts_key(filters.get('updated_by'))
+        started = Cast(KT(f'counts__{key}__0'), models.IntegerField())
+        completed = Cast(KT(f'counts__{key}__1'), models.IntegerField())
+        listed = {None: started, True: completed, False: started - completed}[filters.get('completed')]
+        self.checklists = checklists.annotate(listed=listed).filter(listed__gt=0)
+
+    def count(self):
+        return self.checklists.aggregate(total=Sum('listed'))['total'] or 0
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if index.step is not None or (index.start or 0) < 0 or (index.stop or 0) < 0:
+            raise ValueError("Checklist items only support forward slices")
+        start = index.start or 0
+
+        # Running total of the items listed up to the end of each checklist
+        checklists = self.checklists.annotate(
+            end=Window(Sum('listed'), order_by=list(self.ordering))
+        ).filter(end__gt=start).order_by(*self.ordering).select_related('created_by')
+        if index.stop is not None:
+            if index.stop <= start:
+                return []
+            # Each checklist lists at least one item
+            checklists = checklists.filter(end__lt=index.stop + F('listed'))[:index.stop - start]
+        checklists = list(checklists)
+        if not checklists:
+            return []
+
+        templates = self.engine.templates()
+        users = self.engine._users(checklists)
+        items = []
+        for checklist in checklists:
+            listed = [
+                ChecklistItem(checklist, templates[checklist.checklist_type, item_id], users)
+                for item_id in checklist.state
+                if (checklist.checklist_type, item_id) in templates
+            ]
+            listed = [item for item in listed if self.engine.matches(item, **self.filters)]
+            items += sorted(listed, key=lambda item: item.item_id)
+
+        skip = start - (checklists[0].end - checklists[0].listed)
+        stop = None if index.stop is None else skip + index.stop - start
+        return items[skip:stop]
+
+
+class ChecklistEngine:
+    """
+    Reads and writes the checklists of one area.
+
+    Every operation costs a fixed number of queries whatever the number of
+    items involved: templates, checklists and the users named in their state
+    are each loaded with one query, and writes go through bulk_create /
+    bulk_update inside a transaction.
+    """
+
+    def __init__(self, area):
+        self.area = area
+        self.checklist_types = dict(ChecklistTemplateItem.CHECKLIST_TYPES[area])
+
+    # ---------- reading ----------
+
+    def parse_date(self, value):
+        try:
+            parsed = models.DateField().to_python(value)
+        except DjangoValidationError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({"date": "Invalid date format. Use YYYY-MM-DD."})
+        return parsed
+
+    def parse_checklist_type(self, value):
+        # The same choices ChecklistItemSerializer enforces for single items
+        if value not in self.checklist_types:
+            raise ValidationError({"checklist_type": f'"{value}" is not a valid choice.'})
+        return value
+
+    def templates(self):
+        """All template items of the area, keyed by (checklist_type, item_id)"""
+        return {
+            (template.checklist_type, template.item_id): template
+            for template in ChecklistTemplateItem.objects.filter(area=self.area)
+        }
+
+    def _users(self, checklists):
+        user_ids = {
+            state.get('updated_by')
+            for checklist in checklists
+            for state in checklist.state.values()
+        }
+        user_ids.discard(None)
+        return User.objects.in_bulk(user_ids) if user_ids else {}
+
+    def _items(self, checklists, templates, keys=None):
+        """Build ChecklistItems for every started item, or only for ``keys``"""
+        users = self._users(checklists)
+        by_day = {(checklist.date, checklist.checklist_type): checklist for checklist in checklists}
+        if keys is None:
+            keys = [
+                (checklist.date, checklist.checklist_type, item_id)
+                for checklist in checklists
+                for item_id in checklist.state
+            ]
+        items = []
+        for date, checklist_type, item_id in keys:
+            checklist = by_day.get((date, checklist_type))
+            template = templates.get((checklist_type, item_id))
+            if checklist is None or template is None or item_id not in checklist.state:
+                continue
+            items.append(ChecklistItem(checklist, template, users))
+        return items
+
+    @staticmethod
+    def matches(item, date=None, updated_by=None, completed=None):
+        if date is not None and item.date != date:
+            return False
+        if updated_by is not None and item.updated_by_id != updated_by:
+            return False
+        if completed is not None and bool(item.completed) != completed:
+            return False
+        return True
+
+    def list_items(self, date=None, updated_by=None, completed=None):
+        """The matching items as a lazily counted and sliced ChecklistItems"""
+        checklists = Checklist.objects.filter(area=self.area)
+        if date is not None:
+            checklists = checklists.filter(date=date)
+        return ChecklistItems(self, checklists, {'date': date, 'updated_by': updated_by, 'completed': completed})
+
+    def get_item(self, pk):
+        keys = split_item_pk(pk)
+        if keys is None:
+            return None
+        checklist_pk, template_pk = keys
+        checklist = Checklist.objects.filter(
+            pk=checklist_pk, area=self.area
+        ).select_related('created_by').first()
+        template = ChecklistTemplateItem.objects.filter(pk=template_pk, area=self.area).first()
+        if checklist is None or template is None or template.checklist_type != checklist.checklist_type:
+            return None
+        if template.item_id not in checklist.state:
+            return None
+        return ChecklistItem(checklist, template, self._users([checklist]))
+
+    # ---------- writing ----------
+
+    def _touch(self, checklist, item_id, user, stamp, **changes):
+        state = checklist.state.setdefault(item_id, {'completed': False})
+        state.update(changes, updated_by=user.id, updated_at=stamp.isoformat())
+        checklist.updated_by = user
+        checklist.updated_at = stamp
+
+    def _save(self, checklists):
+        for checklist in checklists:
+            checklist.recount()
+        Checklist.objects.bulk_update(checklists, ['state', 'counts', 'updated_by', 'updated_at'])
+        # bulk_update sends no save signals
+        bump(Checklist)
+
+    def upsert_items(self, items_data, user, completed=None):
+        """
+        Start (or touch) a batch of items for one or more days.
+        Unknown items are added to the end of the area's templates, missing
+        checklists are created, and existing items are marked as updated by
+        ``user``; ``completed`` is only changed when given.
+        Items are returned in the order they were given.
+        """
+        stamp = timezone.now()
+        keys = [
+            (
+                self.parse_date(item_data['date']),
+                self.parse_checklist_type(item_data['checklist_type']),
+                item_data['item_id'],
+            )
+            for item_data in items_data
+        ]
+        if not keys:
+            return []
+
+        with transaction.atomic():
+            # Only insert what is missing: a conflicting insert would still
+            # use up a sequence value, and template pks must stay below
+            # ITEM_PK_STRIDE
+            templates = self.templates()
+            positions = {}
+            for template in templates.values():
+                positions[template.checklist_type] = max(
+                    positions.get(template.checklist_type, 0), template.position + 1
+                )
+            new_templates = {}
+            for (_, checklist_type, item_id), item_data in zip(keys, items_data):
+                if (checklist_type, item_id) in templates or (checklist_type, item_id) in new_templates:
+                    continue
+                position = positions.get(checklist_type, 0)
+                new_templates[(checklist_type, item_id)] = ChecklistTemplateItem(
+                    area=self.area,
+                    checklist_type=checklist_type,
+                    item_id=item_id,
+                    item_name=item_data['item_name'],
+                    position=position,
+                )
+                positions[checklist_type] = position + 1
+            if new_templates:
+                # Conflicts only come from a concurrent request adding the same items
+                ChecklistTemplateItem.objects.bulk_create(new_templates.values(), ignore_conflicts=True)
+                templates = self.templates()
+                if any(templates[key].pk > MAX_TEMPLATE_PK for key in new_templates):
+                    raise ValidationError({
+                        "item_id": f"No room for new checklist items: template ids must stay below {ITEM_PK_STRIDE}."
+                    })
+                bump(ChecklistTemplateItem)
+
+            days = {(date, checklist_type) for date, checklist_type, _ in keys}
+            checklists = self._lock_days(days)
+            missing = days - {(checklist.date, checklist.checklist_type) for checklist in checklists}
+            if missing:
+                Checklist.objects.bulk_create([
+                    Checklist(date=date, area=self.area, checklist_type=checklist_type,
+                              state={}, created_by=user, updated_by=user)
+                    for date, checklist_type in missing
+                ], ignore_conflicts=True)
+                checklists = self._lock_days(days)
+
+            by_day = {(checklist.date, checklist.checklist_type): checklist for checklist in checklists}
+            changes = {} if completed is None else {'completed': completed}
+            for date, checklist_type, item_id in keys:
+                self._touch(by_day[(date, checklist_type)], item_id, user, stamp, **changes)
+            self._save(checklists)
+
+            return self._items(checklists, templates, keys)
+
+    def _lock_days(self, days):
+        query = models.Q(pk__in=[])
+        for date, checklist_type in days:
+            query |= models.Q(date=date, checklist_type=checklist_type)
+        return list(
+            Checklist.objects.select_for_update().filter(query, area=self.area).select_related('created_by')
+        )
+
+    def toggle_items(self, pks, user, **filters):
+        """
+        Flip ``completed`` on every item in ``pks`` that matches ``filters``
+        (the caller's role scoping). Items that do not exist or are out of
+        scope are skipped, as before.
+        """
+        keys = [key for key in (split_item_pk(pk) for pk in pks) if key is not None]
+        if not keys:
+            return []
+        stamp = timezone.now()
+
+        with transaction.atomic():
+            checklists = {
+                checklist.pk: checklist
+                for checklist in Checklist.objects.select_for_update().filter(
+                    pk__in={checklist_pk for checklist_pk, _ in keys}, area=self.area
+                ).select_related('created_by')
+            }
+            templates = ChecklistTemplateItem.objects.in_bulk(
+                {template_pk for _, template_pk in keys}
+            )
+            users = self._users(checklists.values())
+
+            toggled = []
+            for checklist_pk, template_pk in keys:
+                checklist = checklists.get(checklist_pk)
+                template = templates.get(template_pk)
+                if checklist is None or template is None or template.checklist_type != checklist.checklist_type:
+                    continue
+                if template.item_id not in checklist.state:
+                    continue
+                if not self.matches(ChecklistItem(checklist, template, users), **filters):
+                    continue
+                state = checklist.state[template.item_id]
+                self._touch(checklist, template.item_id, user, stamp, completed=not state.get('completed'))
+                toggled.append((checklist, template))
+
+            self._save(list({checklist for checklist, _ in toggled}))
+
+        users[user.id] = user
+        return [ChecklistItem(checklist, template, users) for checklist, template in toggled]
+
+    def update_item(self, item, user, **changes):
+        """
+        Apply ``completed`` and/or ``item_name`` changes to one item.
+        A new item_name only renames the item on that day; the template
+        keeps the name other days show.
+        """
+        stamp = timezone.now()
+        with transaction.atomic():
+            checklist = Checklist.objects.select_for_update().select_related('created_by').get(pk=item.checklist.pk)
+            state_changes = {'completed': changes['completed']} if 'completed' in changes else {}
+            if 'item_name' in changes:
+                if changes['item_name'] == item.template.item_name:
+                    checklist.state.get(item.item_id, {}).pop('item_name', None)
+                else:
+                    state_changes['item_name'] = changes['item_name']
+            self._touch(checklist, item.item_id, user, stamp, **state_changes)
+            checklist.recount()
+            checklist.save(update_fields=['state', 'counts', 'updated_by', 'updated_at'])
+        return ChecklistItem(checklist, item.template, {user.id: user, **self._users([checklist])})
+
+    def delete_item(self, item):
+        with transaction.atomic():
+            checklist = Checklist.objects.select_for_update().get(pk=item.checklist.pk)
+            checklist.state.pop(item.item_id, None)
+            checklist.recount()
+            checklist.save(update_fields=['state', 'counts', 'updated_at'])
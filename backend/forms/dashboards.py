@@ -0,0 +1,225 @@
+"""
+Aggregate queries behind the dashboard endpoints.
+Keeps the views thin and the number of queries per request fixed.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+
+from .models import (
+    DailyInspection, DailyStats, IncidentReport, MaintenanceLog, MonthlyStatsRollup, RemedialAction,
+    SafetyCheck, StaffAppraisal, StaffShift, WaiverSession
+)
+from .serializers import DailyInspectionSerializer
+
+
+class InspectionDashboard:
+    """
+    Inspection statistics for a date range.
+
+    Query budget - the same whether the range holds 30 or 30,000 inspections:
+      1. pass/fail/remedial split and remedial action status split,
+         computed with conditional aggregation in a single SELECT
+      2. the most recent failed inspections, joined to checked_by/signed_off_by
+      3. the remedial actions of those failures, prefetched with their users
+    """
+    QUERY_BUDGET = 3
+    RECENT_FAILURES = 5
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.inspections = DailyInspection.objects.filter(date__range=[start_date, end_date])
+
+    def summary(self):
+        """Outcome split and remedial action counts in one round trip"""
+        aggregates = {
+            'total': Count('id', distinct=True),
+            'passed': Count('id', distinct=True, filter=Q(overall_status='pass')),
+            'failed': Count('id', distinct=True, filter=Q(overall_status='fail')),
+            'remedial': Count('id', distinct=True, filter=Q(overall_status='remedial')),
+        }
+        for action_status, _ in RemedialAction.STATUS_CHOICES:
+            aggregates[f'action_{action_status}'] = Count(
+                'remedial_actions', filter=Q(remedial_actions__status=action_status)
+            )
+        counts = self.inspections.aggregate(**aggregates)
+
+        total = counts['total']
+        remedial_actions = {
+            action_status: counts[f'action_{action_status}']
+            for action_status, _ in RemedialAction.STATUS_CHOICES
+            if counts[f'action_{action_status}']
+        }
+        return {
+            'total_inspections': total,
+            'passed_inspections': counts['passed'],
+            'failed_inspections': counts['failed'],
+            'remedial_inspections': counts['remedial'],
+            'pass_rate': round((counts['passed'] / total) * 100, 1) if total > 0 else 0,
+        }, remedial_actions
+
+    def recent_failures(self):
+        """Most recent inspections with any failed or remedial items"""
+        return self.inspections.exclude(
+            overall_status='pass'
+        ).select_related(
+            'checked_by', 'signed_off_by'
+        ).prefetch_related(
+            Prefetch(
+                'remedial_actions',
+                queryset=RemedialAction.objects.select_related('reported_by', 'assigned_to', 'completed_by'),
+            )
+        ).order_by('-date')[:self.RECENT_FAILURES]
+
+    def as_dict(self):
+        summary, remedial_actions = self.summary()
+        return {
+            'date_range': {
+                'start_date': self.start_date,
+                'end_date': self.end_date
+            },
+            'summary': summary,
+            'remedial_actions': remedial_actions,
+            'recent_failures': DailyInspectionSerializer(self.recent_failures(), many=True).data
+        }
+
+
+class WaiverStats:
+    """
+    Waiver link counts for one staff member, or for everyone when ``staff``
+    is None: a single conditional aggregate over WaiverSession, served by
+    the (staff, is_used, expires_at) index. A session is marked used in the
+    same transaction that creates its waiver, so used sessions are the
+    signed waivers.
+    """
+    QUERY_BUDGET = 1
+
+    def __init__(self, staff=None):
+        self.sessions = WaiverSession.objects.all()
+        if staff is not None:
+            self.sessions = self.sessions.filter(staff=staff)
+
+    def as_dict(self):
+        now = timezone.now()
+        counts = self.sessions.aggregate(
+            total=Count('pk'),
+            signed=Count('pk', filter=Q(is_used=True)),
+            pending=Count('pk', filter=Q(is_used=False, expires_at__gt=now)),
+            expired=Count('pk', filter=Q(is_used=False, expires_at__lte=now)),
+        )
+        return {
+            "total_sessions": counts['total'],
+            "signed_waivers": counts['signed'],
+            "pending_sessions": counts['pending'],
+            "expired_sessions": counts['expired'],
+        }
+
+
+class DashboardSnapshot:
+    """
+    Per-day cache of the DashboardViewSet.overview payload.
+
+    Computing the overview costs seven queries; a cached poll costs one
+    cache read. The snapshot is invalidated by post_save/post_delete
+    signals on SNAPSHOT_MODELS (see forms.signals), and the key includes
+    the date so a new day always starts from a fresh snapshot. The monthly
+    revenue is read from MonthlyStatsRollup, which rebuild_monthly_rollups
+    rewrites without signals, so that command invalidates it itself.
+    """
+    SNAPSHOT_MODELS = (
+        IncidentReport, DailyStats, MonthlyStatsRollup, SafetyCheck, MaintenanceLog, StaffShift, StaffAppraisal
+    )
+
+    _lock = threading.Lock()
+    _counters = {'hits': 0, 'misses': 0}
+
+    def __init__(self, day=None):
+        self.day = day or timezone.now().date()
+
+    @staticmethod
+    def cache():
+        return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+    @staticmethod
+    def key(day):
+        return f'dashboard:overview:{day.isoformat()}'
+
+    @classmethod
+    def _count(cls, counter):
+        with cls._lock:
+            cls._counters[counter] += 1
+
+    @classmethod
+    def stats(cls):
+        """Hit/miss counters for this process"""
+        with cls._lock:
+            return dict(cls._counters)
+
+    @classmethod
+    def invalidate(cls, day=None):
+        cls.cache().delete(cls.key(day or timezone.now().date()))
+
+    def get(self):
+        """Return the overview for the day, computing and caching it on a miss"""
+        cache = self.cache()
+        key = self.key(self.day)
+        data = cache.get(key)
+        if data is not None:
+            self._count('hits')
+            return data
+
+        self._count('misses')
+        data = self.compute()
+        cache.set(key, data)
+        return data
+
+    def compute(self):
+        """Build the overview payload from the database"""
+        today = self.day
+
+        # Recent incidents (last 30 days)
+        recent_incidents = IncidentReport.objects.filter(
+            date_of_accident__gte=today - timedelta(days=30)
+        ).count()
+
+        # Today's visitors
+        today_stats = DailyStats.objects.filter(date=today).first()
+        today_visitors = today_stats.visitor_count if today_stats else 0
+
+        # This month's revenue
+        monthly_revenue = DailyStats.get_monthly_revenue(today.month, today.year)
+
+        # Safety checks completed today
+        safety_checks_today = SafetyCheck.objects.filter(date=today).count()
+
+        # Pending maintenance items
+        pending_maintenance = MaintenanceLog.objects.filter(
+            next_maintenance_due__lte=today
+        ).count()
+
+        # Staff on duty today
+        staff_on_duty = StaffShift.objects.filter(
+            date=today,
+            end_time__isnull=True
+        ).count()
+
+        # Recent appraisals (this month)
+        recent_appraisals = StaffAppraisal.objects.filter(
+            date_of_appraisal__month=today.month,
+            date_of_appraisal__year=today.year
+        ).count()
+
+        return {
+            'todayVisitors': today_visitors,
+            'monthlyRevenue': float(monthly_revenue),
+            'recentIncidents': recent_incidents,
+            'safetyChecksToday': safety_checks_today,
+            'pendingMaintenance': pending_maintenance,
+            'staffOnDuty': staff_on_duty,
+            'recentAppraisals': recent_appraisals
+        }
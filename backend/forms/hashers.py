@@ -0,0 +1,44 @@
+"""
+Password hashers whose cost comes from settings.
+
+Django's hashers hard-code their work factor, so tuning it means a new
+subclass per release. These read it from settings instead:
+PASSWORD_PBKDF2_ITERATIONS for PBKDF2, and PASSWORD_ARGON2_TIME_COST,
+PASSWORD_ARGON2_MEMORY_COST and PASSWORD_ARGON2_PARALLELISM for argon2
+(which needs the argon2-cffi package). PASSWORD_HASHER picks which of the
+two new hashes use; see PASSWORD_HASHER_POLICIES in settings.
+
+Both keep Django's algorithm names, so existing hashes verify unchanged.
+When the configured cost or algorithm differs from a stored hash, Django
+re-hashes the password the next time that user logs in (check_password's
+setter), so a change of policy spreads without a migration.
+
+``manage.py calibrate_password_hasher`` suggests a cost for a target time
+per login on the machine it runs on.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """argon2id with its time, memory and parallelism costs from settings"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
@@ -0,0 +1,133 @@
+"""
+DB-backed queue for waiver PDF rendering.
+
+Signing a waiver only enqueues a WaiverPdfJob; ``run_waiver_pdf_worker``
+claims queued jobs, renders the PDFs and marks the waivers ready. Jobs are
+claimed with a conditional UPDATE so several workers can share the queue
+without an external broker. Every claim counts as an attempt, so a job
+whose worker keeps dying is failed after MAX_ATTEMPTS like one that keeps
+raising.
+"""
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Waiver, WaiverPdfJob
+from .pdf import render_waiver_pdf, waiver_pdf_filename
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+# A running job whose worker has not finished within this window is
+# assumed to belong to a dead worker and is handed out again.
+STALE_AFTER = timedelta(minutes=10)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def fail_abandoned_jobs(now):
+    """Fail stale jobs that have had all their attempts; their workers died on each"""
+    abandoned = WaiverPdfJob.objects.filter(
+        status='running', locked_at__lt=now - STALE_AFTER, attempts__gte=MAX_ATTEMPTS
+    )
+    waiver_pks = list(abandoned.values_list('waiver_id', flat=True))
+    if not waiver_pks:
+        return
+    with transaction.atomic():
+        abandoned.filter(waiver_id__in=waiver_pks).update(
+            status='failed', locked_by='', locked_at=None,
+            last_error='Worker stopped before finishing', updated_at=now,
+        )
+        Waiver.objects.filter(pk__in=waiver_pks).update(pdf_status='failed')
+
+
+def claim_jobs(worker, limit=10):
+    """Lock up to ``limit`` runnable jobs for ``worker`` and return them"""
+    now = timezone.now()
+    fail_abandoned_jobs(now)
+    runnable = WaiverPdfJob.objects.filter(status='queued', run_after__lte=now)
+    stale = WaiverPdfJob.objects.filter(
+        status='running', locked_at__lt=now - STALE_AFTER, attempts__lt=MAX_ATTEMPTS
+    )
+    candidates = list((runnable | stale).order_by('run_after').values_list('pk', flat=True)[:limit])
+    if not candidates:
+        return []
+
+    # Only rows still unclaimed when the UPDATE runs are taken, so two
+    # workers racing for the same candidates never both get a job.
+    (runnable | stale).filter(pk__in=candidates).update(
+        status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+    )
+    return list(
+        WaiverPdfJob.objects.filter(pk__in=candidates, locked_by=worker, status='running')
+        .select_related('waiver__session', 'waiver__signature_image')
+    )
+
+
+def run_job(job):
+    """Render one claimed job; returns True when the PDF was stored"""
+    waiver = job.waiver
+    try:
+        pdf = render_waiver_pdf(waiver)
+        waiver.pdf_file.save(waiver_pdf_filename(waiver), ContentFile(pdf), save=False)
+    except Exception as e:
+        logger.exception("Rendering PDF for waiver %s failed", waiver.pk)
+        # claim_jobs already counted this attempt
+        give_up = job.attempts >= MAX_ATTEMPTS
+        with transaction.atomic():
+            WaiverPdfJob.objects.filter(pk=job.pk).update(
+                status='failed' if give_up else 'queued',
+                run_after=timezone.now() + RETRY_DELAY * job.attempts,
+                locked_by='', locked_at=None, last_error=str(e),
+                updated_at=timezone.now(),
+            )
+            if give_up:
+                Waiver.objects.filter(pk=waiver.pk).update(pdf_status='failed')
+        return False
+
+    with transaction.atomic():
+        Waiver.objects.filter(pk=waiver.pk).update(pdf_file=waiver.pdf_file.name, pdf_status='ready')
+        WaiverPdfJob.objects.filter(pk=job.pk).update(
+            status='done', locked_by='', locked_at=None, last_error='', updated_at=timezone.now(),
+        )
+    return True
+
+
+def run_pending(worker, limit=10):
+    """Claim and run one batch of jobs; returns (rendered, failed)"""
+    rendered = failed = 0
+    for job in claim_jobs(worker, limit):
+        if run_job(job):
+            rendered += 1
+        else:
+            failed += 1
+    return rendered, failed
+
+
+def regenerate_waiver_pdfs(pks):
+    """
+    Re-render and store the PDFs of the waivers in ``pks``.
+    Used by ``regenerate_waiver_pdfs``, one call per chunk in each pool process.
+    """
+    waivers = list(Waiver.objects.filter(pk__in=pks).select_related('session', 'signature_image'))
+    for waiver in waivers:
+        pdf = render_waiver_pdf(waiver)
+        if waiver.pdf_file:
+            waiver.pdf_file.delete(save=False)
+        waiver.pdf_file.save(waiver_pdf_filename(waiver), ContentFile(pdf), save=False)
+        waiver.pdf_status = 'ready'
+    Waiver.objects.bulk_update(waivers, ['pdf_file', 'pdf_status'])
+    WaiverPdfJob.objects.filter(waiver__in=waivers).exclude(status='running').update(
+        status='done', locked_by='', locked_at=None, last_error='', updated_at=timezone.now(),
+    )
+    return len(waivers)
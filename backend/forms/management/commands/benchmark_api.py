@@ -0,0 +1,242 @@
+import json
+import logging
+import math
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from forms.metrics import registry
+from forms.models import (
+    CleaningLog, DailyInspection, IncidentReport, MaintenanceLog, RemedialAction, SafetyCheck,
+    StaffAppraisal, StaffShift, DailyStats, User, Waiver, WaiverSession
+)
+
+TODAY = timezone.now().date().isoformat()
+
+# (method, path, body); {name} is replaced by the pk of a row the user can see
+ENDPOINTS = [
+    ('GET', 'auth/me/', None),
+    ('GET', 'dashboard/', None),
+    ('GET', 'dashboard/data/', None),
+    ('GET', 'analytics/', None),
+    ('GET', 'analytics/timeseries/', None),
+    ('GET', 'analytics/timeseries/?series=cleaning&bucket=week', None),
+    ('GET', 'inspection-dashboard/', None),
+    ('GET', 'daily-inspections/', None),
+    ('GET', f'daily-inspections/?date={TODAY}', None),
+    ('GET', 'daily-inspections/{dailyinspection}/', None),
+    ('GET', 'remedial-actions/', None),
+    ('GET', 'remedial-actions/?status=pending', None),
+    ('GET', 'remedial-actions/{remedialaction}/', None),
+    ('GET', 'safety-checks/', None),
+    ('GET', 'safety-checks/recent_failures/', None),
+    ('GET', 'safety-checks/{safetycheck}/', None),
+    ('GET', 'incidents/', None),
+    ('GET', 'incidents/by_type/', None),
+    ('GET', 'incidents/{incidentreport}/', None),
+    ('GET', 'shifts/', None),
+    ('GET', 'shifts/{staffshift}/', None),
+    ('GET', 'cleaning/', None),
+    ('GET', 'cleaning/?page=20', None),
+    ('GET', 'cleaning/?pagination=cursor', None),
+    ('GET', 'cleaning/{cleaninglog}/', None),
+    ('GET', 'maintenance/', None),
+    ('GET', 'maintenance/upcoming_maintenance/', None),
+    ('GET', 'maintenance/{maintenancelog}/', None),
+    ('GET', 'daily-stats/', None),
+    ('GET', 'daily-stats/{dailystats}/', None),
+    ('GET', 'appraisals/', None),
+    ('GET', 'appraisals/{staffappraisal}/', None),
+    ('GET', 'cafe-checklists/', None),
+    ('GET', f'cafe-checklists/?date={TODAY}', None),
+    ('GET', 'marshal-checklists/', None),
+    ('GET', 'users/', None),
+    ('GET', 'api/waivers/', None),
+    ('GET', 'api/waivers/?search=smith', None),
+    ('GET', 'api/waivers/?pagination=cursor', None),
+    ('GET', 'api/waivers/{waiver}/', None),
+    ('GET', 'api/waiver-sessions/', None),
+    ('GET', 'api/dashboard/stats/', None),
+    ('POST', 'cleaning/', {'area': 'cafe', 'notes': 'Benchmark'}),
+    ('POST', 'safety-checks/', {'trampoline_id': 'TRAMP-001', 'date': TODAY}),
+    ('POST', 'api/waiver-sessions/', {'participant_name': 'Benchmark Guest'}),
+]
+
+# Models with detail endpoints, and the lookup from a row to the user it belongs to
+DETAIL_MODELS = {
+    CleaningLog: 'cleaned_by',
+    DailyInspection: 'checked_by',
+    DailyStats: 'recorded_by',
+    IncidentReport: 'reported_by',
+    MaintenanceLog: 'performed_by',
+    RemedialAction: 'reported_by',
+    SafetyCheck: 'checked_by',
+    StaffAppraisal: 'employee',
+    StaffShift: 'staff_member',
+    Waiver: 'session__staff',
+}
+COUNTED_MODELS = list(DETAIL_MODELS) + [User, WaiverSession]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API endpoint in-process through the test client as an owner and a "
+        "member of staff, and report p50/p95 latency and query counts. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per endpoint and user')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests first')
+        parser.add_argument('--owner', default='load-owner', help='Username of the owner to benchmark as')
+        parser.add_argument('--staff', default='load-staff-1', help='Username of the member of staff')
+        parser.add_argument('--filter', default='', help='Only endpoints whose path contains this')
+        parser.add_argument('--save-baseline', metavar='PATH', help='Write the results to a JSON baseline')
+        parser.add_argument('--compare', metavar='PATH', help='Compare against a saved baseline')
+        parser.add_argument('--tolerance', type=float, default=1.25,
+                            help='Flag endpoints whose p95 grew by more than this factor (default 1.25)')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help='Ignore p95 increases smaller than this many ms (timer noise)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+
+        # Refusals and server errors show up in the report's status column
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with transaction.atomic():
+                report = self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            request_logger.setLevel(level)
+            registry.reset()
+
+        self.print_report(report, baseline)
+
+        if options['save_baseline']:
+            Path(options['save_baseline']).write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['save_baseline']}"))
+
+        if baseline is not None:
+            regressions = self.regressions(report, baseline, options['tolerance'], options['min_delta_ms'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f"{len(regressions)} endpoints regressed against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['compare']}"))
+
+    def user(self, username, role):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            self.stdout.write(self.style.WARNING(
+                f"No user {username}; benchmarking as a new {role} (run generate_load_data first)"
+            ))
+            user = User.objects.create_user(username=f'benchmark-{role}', password=None, role=role)
+        return user
+
+    def detail_pks(self, role, user):
+        """The first row of each model: any row for the owner, one of their own for staff"""
+        pks = {}
+        for model, user_lookup in DETAIL_MODELS.items():
+            rows = model._default_manager.order_by('pk')
+            if role != 'owner':
+                rows = rows.filter(**{user_lookup: user})
+            pk = rows.values_list('pk', flat=True).first()
+            if pk is not None:
+                pks[model._meta.model_name] = pk
+        return pks
+
+    def run(self, options):
+        users = {
+            'owner': self.user(options['owner'], 'owner'),
+            'staff': self.user(options['staff'], 'reception'),
+        }
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'requests': options['requests'],
+            'rows': {model.__name__: model._default_manager.count() for model in COUNTED_MODELS},
+            'results': {},
+        }
+
+        for role, user in users.items():
+            # Record server errors as 500s instead of aborting the run
+            client = APIClient(raise_request_exception=False, HTTP_HOST='localhost')
+            client.force_authenticate(user)
+            pks = self.detail_pks(role, user)
+
+            for method, path, body in ENDPOINTS:
+                if options['filter'] not in path:
+                    continue
+                try:
+                    url = '/api/' + path.format(**pks)
+                except KeyError:
+                    continue
+
+                timings, queries, status_code = [], 0, None
+                for attempt in range(options['warmup'] + options['requests']):
+                    start = time.perf_counter()
+                    with CaptureQueriesContext(connection) as captured:
+                        if method == 'GET':
+                            response = client.get(url)
+                        else:
+                            response = client.post(url, body, format='json')
+                    elapsed = (time.perf_counter() - start) * 1000
+                    if attempt >= options['warmup']:
+                        timings.append(elapsed)
+                        queries = max(queries, len(captured))
+                        status_code = response.status_code
+
+                report['results'][f'{role} {method} {path}'] = {
+                    'status': status_code,
+                    'p50_ms': round(percentile(timings, 0.5), 2),
+                    'p95_ms': round(percentile(timings, 0.95), 2),
+                    'queries': queries,
+                }
+        return report
+
+    def print_report(self, report, baseline):
+        previous = baseline['results'] if baseline else {}
+        self.stdout.write(f"{'endpoint':<72}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}")
+        for name, result in report['results'].items():
+            line = (
+                f"{name:<72}{result['status']:>7}{result['p50_ms']:>9.1f}"
+                f"{result['p95_ms']:>9.1f}{result['queries']:>9}"
+            )
+            if name in previous:
+                line += f"   (was {previous[name]['p95_ms']:.1f} ms, {previous[name]['queries']} queries)"
+            self.stdout.write(line)
+        self.stdout.write(", ".join(f"{model}: {count}" for model, count in report['rows'].items()))
+
+    def regressions(self, report, baseline, tolerance, min_delta_ms):
+        if baseline['rows'] != report['rows']:
+            self.stdout.write(self.style.WARNING(
+                "Row counts differ from the baseline; regenerate the data with the same "
+                "generate_load_data options for a like-for-like comparison"
+            ))
+
+        regressions = []
+        for name, result in report['results'].items():
+            before = baseline['results'].get(name)
+            if before is None:
+                continue
+            if result['status'] != before['status'] and result['status'] >= 400:
+                regressions.append(f"{name}: status {before['status']} -> {result['status']}")
+            if result['queries'] > before['queries']:
+                regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            if (result['p95_ms'] > before['p95_ms'] * tolerance
+                    and result['p95_ms'] - before['p95_ms'] > min_delta_ms):
+                regressions.append(f"{name}: p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms")
+        return regressions
@@ -0,0 +1,90 @@
+import logging
+import statistics
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from forms.models import User
+from forms.throttling import login_limiter
+
+USERNAME_PREFIX = 'login-bench-'
+PASSWORD = 'login-bench-password'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput with concurrent clients, and what a rate-limited "
+        "attempt costs. The benchmark users and their tokens are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help='Clients logging in at the same time')
+        parser.add_argument('--logins', type=int, default=10, help='Logins per client')
+        parser.add_argument('--attempts', type=int, default=50, help='Wrong-password attempts for the throttling run')
+        parser.add_argument('--iterations', type=int, help='PASSWORD_PBKDF2_ITERATIONS for this run')
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options['iterations']:
+            overrides['PASSWORD_PBKDF2_ITERATIONS'] = options['iterations']
+
+        # Refusals are expected in the throttling run
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with override_settings(**overrides):
+                # Threads use their own connections, so the users are committed
+                usernames = [f'{USERNAME_PREFIX}{i}' for i in range(options['clients'])]
+                for username in usernames:
+                    User.objects.create_user(username=username, password=PASSWORD, role='reception')
+                self.concurrent(usernames, options['logins'])
+                self.throttled(usernames[0], options['attempts'])
+        finally:
+            request_logger.setLevel(level)
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            login_limiter.clear()
+
+    def login(self, client, username, password):
+        start = perf_counter()
+        response = client.post('/api/auth/login/', {'username': username, 'password': password}, format='json')
+        return response.status_code, perf_counter() - start
+
+    def concurrent(self, usernames, logins):
+        def run_client(username):
+            client = APIClient(HTTP_HOST='localhost')
+            try:
+                return [self.login(client, username, PASSWORD) for _ in range(logins)]
+            finally:
+                connection.close()
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=len(usernames)) as pool:
+            results = [result for client_results in pool.map(run_client, usernames) for result in client_results]
+        elapsed = perf_counter() - start
+
+        timings = sorted(seconds for _, seconds in results)
+        statuses = Counter(status_code for status_code, _ in results)
+        self.stdout.write(
+            f"{len(usernames)} clients x {logins} logins: {len(results) / elapsed:.1f} logins/s, "
+            f"median {statistics.median(timings) * 1000:.0f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95)] * 1000:.0f} ms, statuses {dict(statuses)}"
+        )
+
+    def throttled(self, username, attempts):
+        client = APIClient(HTTP_HOST='localhost')
+        timings = defaultdict(list)
+        for _ in range(attempts):
+            status_code, seconds = self.login(client, username, 'wrong-password')
+            timings[status_code].append(seconds)
+
+        for status_code, seconds in sorted(timings.items()):
+            self.stdout.write(
+                f"wrong password -> {status_code}: {len(seconds)} attempts, "
+                f"median {statistics.median(seconds) * 1000:.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS("Login benchmark finished; benchmark users deleted"))
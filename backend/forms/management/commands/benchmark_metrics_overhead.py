@@ -0,0 +1,60 @@
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from forms.metrics import registry
+from forms.models import CleaningLog, User
+
+METRICS_MIDDLEWARE = 'forms.metrics.MetricsMiddleware'
+ENDPOINTS = ['auth/me/', 'cleaning/', 'dashboard/data/']
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request cost of MetricsMiddleware by timing requests with and without it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Requests per endpoint and mode')
+        parser.add_argument('--rows', type=int, default=100, help='Cleaning logs to list')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['requests'], options['rows'])
+            transaction.set_rollback(True)
+        registry.reset()
+
+    def client(self, owner):
+        client = APIClient(HTTP_HOST='localhost')
+        client.force_authenticate(owner)
+        # The handler loads MIDDLEWARE on its first request
+        client.get(f'/api/{ENDPOINTS[0]}')
+        return client
+
+    def run(self, requests, rows):
+        owner = User.objects.create_user(username='metrics-bench-owner', password=None, role='owner')
+        CleaningLog.objects.bulk_create([CleaningLog(area='toilets', cleaned_by=owner) for _ in range(rows)])
+
+        with_metrics = self.client(owner)
+        without = [m for m in settings.MIDDLEWARE if m != METRICS_MIDDLEWARE]
+        with override_settings(MIDDLEWARE=without):
+            without_metrics = self.client(owner)
+
+        self.stdout.write(f"{'endpoint':<18}{'without':>12}{'with':>12}{'overhead':>12}")
+        for endpoint in ENDPOINTS:
+            timings = {with_metrics: [], without_metrics: []}
+            for _ in range(requests):
+                # Alternate so drift (GC, cache warm-up) hits both equally
+                for client in timings:
+                    start = perf_counter()
+                    client.get(f'/api/{endpoint}')
+                    timings[client].append(perf_counter() - start)
+
+            on = statistics.median(timings[with_metrics]) * 1e6
+            off = statistics.median(timings[without_metrics]) * 1e6
+            self.stdout.write(
+                f"{endpoint:<18}{off:>10.0f}us{on:>10.0f}us{on - off:>+9.0f}us ({(on - off) / off:+.1%})"
+            )
+        self.stdout.write(self.style.SUCCESS("Median request time, measured through the test client"))
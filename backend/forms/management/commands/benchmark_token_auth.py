@@ -0,0 +1,56 @@
+import statistics
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from forms.authentication import CachedTokenAuthentication, token_cache
+from forms.models import AuthToken, User
+
+
+class UncachedTokenAuthentication(TokenAuthentication):
+    """DRF's lookup on every request, against the same token table"""
+    model = AuthToken
+
+
+class Command(BaseCommand):
+    help = "Compare the per-request cost of uncached token authentication and CachedTokenAuthentication (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Authentications per backend')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options['requests'])
+            transaction.set_rollback(True)
+        token_cache.clear()
+
+    def run(self, requests):
+        user = User.objects.create_user(username='auth-bench-user', password=None, role='reception')
+        token = AuthToken.issue(user)
+        factory = APIRequestFactory()
+
+        self.stdout.write(f"{'backend':<30}{'median':>10}{'p95':>10}{'queries/request':>18}")
+        for backend in (UncachedTokenAuthentication(), CachedTokenAuthentication()):
+            token_cache.clear()
+            timings = []
+            with CaptureQueriesContext(connection) as captured:
+                for _ in range(requests):
+                    request = Request(
+                        factory.get('/api/auth/me/', HTTP_AUTHORIZATION=f'Token {token.key}'),
+                        authenticators=[backend],
+                    )
+                    start = perf_counter()
+                    # Permissions and get_queryset read the role straight after
+                    request.user.role
+                    timings.append(perf_counter() - start)
+
+            timings.sort()
+            self.stdout.write(
+                f"{type(backend).__name__:<30}{statistics.median(timings) * 1e6:>8.0f}us"
+                f"{timings[int(len(timings) * 0.95)] * 1e6:>8.0f}us{len(captured) / requests:>18.3f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{requests} authentications per backend"))
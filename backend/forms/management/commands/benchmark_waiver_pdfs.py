@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+import base64
+import os
+import struct
+import time
+import zlib
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from forms.models import Waiver, WaiverSession, WaiverSignature
+from forms.pdf import WAIVER_TERMS, WaiverPdfTemplate, render_waiver_pdf
+
+
+def _render_chunk(waivers):
+    return sum(len(render_waiver_pdf(waiver)) > 0 for waiver in waivers)
+
+
+def sample_signature(width=400, height=100):
+    """A grayscale PNG with a zigzag stroke, encoded without an imaging library"""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = []
+    for y in range(height):
+        row = bytearray(b'\xff' * width)
+        for x in range(20, width - 20):
+            # Bounce between y=20 and y=80 every 100 pixels
+            stroke_y = 20 + abs((x - 20) % 200 - 100) * 60 // 100
+            if abs(y - stroke_y) <= 2:
+                row[x] = 0
+        rows.append(b'\x00' + bytes(row))
+    png = b'\x89PNG\r\n\x1a\n' + b''.join([
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(b''.join(rows))),
+        chunk(b'IEND', b''),
+    ])
+    return 'data:image/png;base64,' + base64.b64encode(png).decode()
+
+
+class Command(BaseCommand):
+    help = 'Report waiver PDFs rendered per second (no database or storage writes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help='PDFs rendered per run')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes for the batched run')
+        parser.add_argument('--chunk-size', type=int, default=50, help='PDFs per task in the batched run')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        signature = sample_signature()
+        waivers = []
+        for i in range(count):
+            waiver = Waiver(
+                session=WaiverSession(participant_email=f'participant{i}@example.com'),
+                full_name=f'Participant {i}',
+                signed_at=timezone.now(),
+            )
+            waiver.signature_image = WaiverSignature.from_data_url(waiver, signature)
+            waivers.append(waiver)
+
+        def report(label, seconds):
+            self.stdout.write(f"{label:<32}{count / seconds:>10.1f} PDFs/s  ({seconds:.2f}s)")
+
+        # The pre-template renderer laid the static page out on every call
+        start = time.perf_counter()
+        for waiver in waivers:
+            WaiverPdfTemplate(WAIVER_TERMS).render(waiver)
+        report("single, no template cache", time.perf_counter() - start)
+
+        render_waiver_pdf(waivers[0])
+        start = time.perf_counter()
+        for waiver in waivers:
+            render_waiver_pdf(waiver)
+        report("single, cached template", time.perf_counter() - start)
+
+        chunk_size = max(1, options['chunk_size'])
+        chunks = [waivers[i:i + chunk_size] for i in range(0, count, chunk_size)]
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            list(pool.map(_render_chunk, [waivers[:1]] * options['workers']))
+            start = time.perf_counter()
+            rendered = sum(pool.map(_render_chunk, chunks))
+            report(f"batched, {options['workers']} processes", time.perf_counter() - start)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} PDFs in the batched run"))
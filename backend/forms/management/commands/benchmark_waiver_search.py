@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from forms.models import User, Waiver, WaiverSession
+
+FIRST_NAMES = ['Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Noah', 'Oliver', 'George', 'Arthur', 'Leo',
+               'Chidi', 'Ngozi', 'Tunde', 'Aisha', 'Priya', 'Ravi', 'Sofia', 'Mateo', 'Hana', 'Kenji']
+# Surnames are built from two syllables so there are ~900 of them, which
+# keeps the number of waivers matching a surname realistic
+SYLLABLES = ['ok', 'af', 'or', 'ad', 'ey', 'em', 'nw', 'os', 'kh', 'an', 'ga', 'rc', 'ro', 'ss', 'ta', 'na',
+             'mu', 'rp', 'wa', 'ls', 'sm', 'it', 'jo', 'ne', 'ty', 'lo', 'br', 'ow', 'pa', 'te']
+DOMAINS = ['gmail.com', 'outlook.com', 'yahoo.co.uk', 'icloud.com', 'hotmail.com']
+
+
+class Command(BaseCommand):
+    help = 'Time waiver search against generated waivers (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Waivers to generate')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.generate(options['count'], random.Random(options['seed']))
+            self.run(options['repeat'])
+            transaction.set_rollback(True)
+        self.stdout.write("Generated rows rolled back")
+
+    def generate(self, count, rng):
+        staff = User.objects.create_user(username=f'benchmark-{rng.random()}', password=None, role='reception')
+        now = timezone.now()
+        start = time.perf_counter()
+        for offset in range(0, count, 5000):
+            sessions, waivers = [], []
+            for i in range(offset, min(offset + 5000, count)):
+                first = rng.choice(FIRST_NAMES)
+                last = (rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + rng.choice(SYLLABLES)).title()
+                session = WaiverSession(
+                    staff=staff,
+                    token=f'benchmark-{i}',
+                    participant_name=f'{first} {last}',
+                    participant_email=f'{first}.{last}{i}@{rng.choice(DOMAINS)}'.lower(),
+                    is_used=True,
+                    expires_at=now,
+                )
+                sessions.append(session)
+                waivers.append(Waiver(session=session, full_name=f'{first} {last}',
+                                      signed_at=now - timedelta(minutes=i)))
+            WaiverSession.objects.bulk_create(sessions)
+            Waiver.objects.bulk_create(waivers)
+        self.stdout.write(f"Generated {count} waivers in {time.perf_counter() - start:.1f}s")
+
+    def run(self, repeat):
+        def legacy(term):
+            return Waiver.objects.filter(
+                Q(full_name__icontains=term) |
+                Q(session__participant_name__icontains=term) |
+                Q(session__participant_email__icontains=term)
+            )
+
+        def timed(queryset):
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                queryset.count()
+                list(queryset.order_by('-signed_at')[:100])
+                runs.append((time.perf_counter() - start) * 1000)
+            return statistics.median(runs)
+
+        self.stdout.write(f"{'query':<22}{'matches':>9}{'icontains (ms)':>16}{'index (ms)':>12}")
+        for term in ['okaf', 'kenji oka', 'ava.ta', 'zzz', 'olivia', 'icloud', 'ol']:
+            indexed = Waiver.objects.search(term)
+            self.stdout.write(
+                f"{term:<22}{indexed.count():>9}{timed(legacy(term)):>16.1f}{timed(indexed):>12.1f}"
+            )
@@ -0,0 +1,83 @@
+import statistics
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.crypto import get_random_string
+from forms.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+
+PBKDF2_PROBE_ITERATIONS = 100000
+PBKDF2_MIN_ITERATIONS = 100000
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the password hashers on this machine and suggest the cost settings "
+        "that make one login take about --target-ms"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target-ms', type=float, default=250, help='Hashing time per login to aim for')
+        parser.add_argument('--rounds', type=int, default=5, help='Timed hashes per measurement')
+        parser.add_argument('--hasher', choices=list(settings.PASSWORD_HASHER_POLICIES), action='append',
+                            help='Hasher to calibrate (repeatable; default: all that are installed)')
+
+    def handle(self, *args, **options):
+        self.rounds = options['rounds']
+        target = options['target_ms'] / 1000
+        hashers = options['hasher'] or list(settings.PASSWORD_HASHER_POLICIES)
+
+        for name in hashers:
+            calibrate = getattr(self, f'calibrate_{name}')
+            try:
+                calibrate(target)
+            except ValueError as error:
+                if options['hasher']:
+                    raise CommandError(str(error))
+                self.stdout.write(self.style.WARNING(f"Skipping {name}: {error}"))
+
+        self.stdout.write(
+            f"A core verifies about {1 / target:.1f} passwords a second at {options['target_ms']:.0f} ms. "
+            "Stored hashes are upgraded on each user's next login."
+        )
+
+    def time(self, hasher, **costs):
+        password, salt = get_random_string(16), hasher.salt()
+        timings = []
+        for _ in range(self.rounds):
+            start = perf_counter()
+            hasher.encode(password, salt, **costs)
+            timings.append(perf_counter() - start)
+        return statistics.median(timings)
+
+    def report(self, name, current, suggested):
+        active = ' (active)' if settings.PASSWORD_HASHER == name else ''
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{name}{active}: now {current:.0f} ms per login"))
+        for setting, value in suggested.items():
+            self.stdout.write(f"    {setting} = {value}")
+
+    def calibrate_pbkdf2(self, target):
+        hasher = TunedPBKDF2PasswordHasher()
+        # PBKDF2 time is linear in the iteration count
+        per_iteration = self.time(hasher, iterations=PBKDF2_PROBE_ITERATIONS) / PBKDF2_PROBE_ITERATIONS
+        iterations = max(PBKDF2_MIN_ITERATIONS, round(target / per_iteration, -4))
+        if iterations == PBKDF2_MIN_ITERATIONS:
+            self.stdout.write(self.style.WARNING(
+                f"pbkdf2: kept at the {PBKDF2_MIN_ITERATIONS} iteration floor; this machine is slow"
+            ))
+        self.report('pbkdf2', per_iteration * hasher.iterations * 1000, {'PASSWORD_PBKDF2_ITERATIONS': int(iterations)})
+
+    def calibrate_argon2(self, target):
+        hasher = TunedArgon2PasswordHasher()
+        try:
+            hasher._load_library()
+        except ValueError:
+            raise ValueError("argon2-cffi is not installed")
+
+        # Memory and parallelism stay as configured; time is linear in time_cost
+        per_pass = self.time(hasher) / hasher.time_cost
+        self.report('argon2', per_pass * hasher.time_cost * 1000, {
+            'PASSWORD_ARGON2_TIME_COST': max(1, round(target / per_pass)),
+            'PASSWORD_ARGON2_MEMORY_COST': hasher.memory_cost,
+            'PASSWORD_ARGON2_PARALLELISM': hasher.parallelism,
+        })
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from forms import views
+from forms.queryplans import plan_for
+
+# Views whose list pages are planned from their serializer
+PLANNED_VIEWS = [
+    views.DailyInspectionListCreateView,
+    views.RemedialActionListCreateView,
+    views.SafetyCheckViewSet,
+    views.IncidentReportViewSet,
+    views.StaffShiftViewSet,
+    views.CleaningLogViewSet,
+    views.MaintenanceLogViewSet,
+    views.DailyStatsViewSet,
+    views.StaffAppraisalViewSet,
+    views.WaiverSessionViewSet,
+    views.WaiverViewSet,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Serialize a full list page for every planned view and fail if it takes more "
+        "queries than its query plan allows (one for the page, one per prefetch)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=settings.REST_FRAMEWORK.get('PAGE_SIZE', 100),
+            help='Rows per page (default: PAGE_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        problems = []
+
+        for view_class in PLANNED_VIEWS:
+            serializer_class = view_class(action='list').get_serializer_class()
+            plan = plan_for(serializer_class)
+            queryset = plan.apply(plan.model._default_manager.order_by('pk'))[:page_size]
+
+            with CaptureQueriesContext(connection) as captured:
+                rows = len(serializer_class(queryset, many=True).data)
+            queries = len(captured)
+
+            line = f"{view_class.__name__}: {rows} rows in {queries} queries (budget {plan.query_count})"
+            if queries > plan.query_count:
+                problems.append(line)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if problems:
+            raise CommandError(f"{len(problems)} list pages exceed their query budget")
+        self.stdout.write(self.style.SUCCESS(f"All {len(PLANNED_VIEWS)} list pages are within budget"))
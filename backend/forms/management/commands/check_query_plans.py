@@ -0,0 +1,192 @@
+import logging
+import re
+from datetime import time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from forms.checklists import ChecklistEngine
+from forms.models import (
+    CleaningLog, DailyInspection, DailyStats, IncidentReport, MaintenanceLog, RemedialAction,
+    SafetyCheck, StaffAppraisal, StaffShift, User, Waiver, WaiverSession,
+)
+
+TODAY = timezone.now().date().isoformat()
+
+# GET endpoints checked for an owner and for members of staff
+ENDPOINTS = [
+    'dashboard/',
+    'dashboard/data/',
+    'analytics/',
+    'analytics/timeseries/?series=cleaning&bucket=week',
+    'inspection-dashboard/',
+    'daily-inspections/',
+    f'daily-inspections/?date={TODAY}',
+    'remedial-actions/',
+    'remedial-actions/?status=open',
+    'remedial-actions/?inspection_id=1',
+    'safety-checks/',
+    'safety-checks/recent_failures/',
+    'incidents/',
+    'shifts/',
+    'cleaning/',
+    'cleaning/?pagination=cursor',
+    'maintenance/',
+    'maintenance/upcoming_maintenance/',
+    'daily-stats/',
+    'appraisals/',
+    'cafe-checklists/',
+    f'cafe-checklists/?date={TODAY}',
+    'marshal-checklists/',
+    'api/waivers/',
+    'api/waivers/?search=smith',
+    'api/waivers/?pagination=cursor',
+    'api/waiver-sessions/',
+    'api/dashboard/stats/',
+]
+
+# Tables that are read whole on purpose, and why
+EXPECTED_SCANS = {
+    'forms_user': 'owner-facing user lists and in_bulk lookups of a handful of users',
+    'forms_checklisttemplateitem': 'a few dozen template items per area',
+    'forms_businesstarget': 'one row per target',
+    'forms_customersatisfactionsurvey': 'aggregated whole for the analytics page',
+    'forms_monthlystatsrollup': 'one row per month',
+}
+
+# Django filters on window functions through nested subqueries, the outer
+# one named "qualify"; scanning the rows they produced is not a table scan
+DERIVED_SCAN = re.compile(r'^SCAN (qualify|\(subquery-\d+\))$')
+
+FULL_SCAN = re.compile(r'\bSCAN (\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN every query behind the main GET endpoints and fail if any does a "
+        "full table scan or sorts without an index (SQLite only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("check_query_plans reads SQLite query plans; run it against SQLite")
+
+        # Staff are refused the owner-only endpoints; that is expected here
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with transaction.atomic():
+                problems = self.check_endpoints(options['verbose_plans'])
+                transaction.set_rollback(True)
+        finally:
+            request_logger.setLevel(level)
+
+        if problems:
+            for problem in problems:
+                self.stdout.write(self.style.ERROR(problem))
+            raise CommandError(f"{len(problems)} queries are not served by an index")
+        self.stdout.write(self.style.SUCCESS(f"All queries behind {len(ENDPOINTS)} endpoints use indexes"))
+
+    def check_endpoints(self, verbose):
+        users = {
+            'owner': User.objects.create_user(username='plan-check-owner', password=None, role='owner'),
+            'staff': User.objects.create_user(username='plan-check-staff', password=None, role='reception'),
+            # The default role; also sees the appraisals they wrote
+            'default': User.objects.create_user(username='plan-check-default', password=None),
+        }
+        self.seed(users)
+        client = APIClient(HTTP_HOST='localhost')
+        problems = []
+        seen = set()
+
+        for path in ENDPOINTS:
+            for role, user in users.items():
+                client.force_authenticate(user)
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(f'/api/{path}')
+                if response.status_code >= 500:
+                    problems.append(f"{path} ({role}): HTTP {response.status_code}")
+                    continue
+
+                for query in captured.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or sql in seen:
+                        continue
+                    seen.add(sql)
+                    for issue in self.plan_issues(sql, verbose):
+                        problems.append(f"{path} ({role}): {issue}\n    {sql[:300]}")
+        return problems
+
+    def seed(self, users):
+        """
+        Give each user a row on every list, so the page queries run even on
+        an empty database (an empty page is answered without a query)
+        """
+        today = timezone.now().date()
+        owner = users['owner']
+        ratings = {
+            f'{area}_rating': 3
+            for area in ('attendance', 'quality', 'teamwork', 'initiative', 'customer_service', 'adherence')
+        }
+        for days_ago, user in enumerate(users.values()):
+            day = today - timedelta(days=days_ago)
+            inspection = DailyInspection.objects.create(
+                date=day, inspector_initials='PC', manager_initials='PC', checked_by=user
+            )
+            RemedialAction.objects.create(
+                inspection=inspection, inspection_code='INS001', issue_description='Plan check',
+                remedial_action='Plan check', reported_by=user,
+            )
+            SafetyCheck.objects.create(date=day, trampoline_id='PLAN-CHECK', checked_by=user)
+            IncidentReport.objects.create(
+                first_name='Plan', surname='Check', date_of_accident=day, time_of_accident=time(12),
+                location='Plan check', how_occurred='Plan check', reported_by=user,
+            )
+            StaffShift.objects.create(date=day, staff_member=user, start_time=time(9), role_during_shift='Plan check')
+            CleaningLog.objects.create(area='cafe', cleaned_by=user)
+            MaintenanceLog.objects.create(
+                equipment_id='PLAN-CHECK', maintenance_type='routine', description='Plan check',
+                next_maintenance_due=day + timedelta(days=7), performed_by=user,
+            )
+            if not DailyStats.objects.filter(date=day).exists():
+                DailyStats.objects.create(date=day, recorded_by=user)
+            StaffAppraisal.objects.create(employee=user, appraiser=owner, date_of_appraisal=day, **ratings)
+            for area, checklist_type in (('cafe', 'opening'), ('marshal', 'pre_shift')):
+                ChecklistEngine(area).upsert_items([{
+                    'date': today, 'checklist_type': checklist_type,
+                    'item_id': 'plan_check', 'item_name': 'Plan check',
+                }], user)
+            session = WaiverSession.objects.create(staff=user, participant_name='Plan Check')
+            Waiver.objects.create(session=session, full_name='Plan Check')
+
+    def plan_issues(self, sql, verbose):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+        if verbose:
+            self.stdout.write(sql[:200])
+            for line in plan:
+                self.stdout.write(f"    {line}")
+
+        issues = []
+        scanned = [FULL_SCAN.search(line).group(1) for line in plan if FULL_SCAN.search(line)]
+        issues += [
+            f"full scan of {table}" for table in scanned
+            if table not in EXPECTED_SCANS and not DERIVED_SCAN.match(f'SCAN {table}')
+        ]
+
+        # Sorting rows found through an index search (one user's records, a
+        # date range) is cheap; sorting a whole table or index walk is not
+        walks = [line for line in plan if line.startswith('SCAN ') and not DERIVED_SCAN.match(line) and not any(
+            line == f'SCAN {table}' for table in EXPECTED_SCANS
+        )]
+        if TEMP_SORT in plan and walks:
+            issues.append("sort without an index")
+        return issues
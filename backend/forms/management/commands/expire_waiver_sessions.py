@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from forms.models import WaiverSession
+
+
+class Command(BaseCommand):
+    help = 'Delete unused waiver sessions whose link has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=30,
+                            help='Keep expired sessions this many days before deleting them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessions deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the sessions that would be deleted')
+
+    def handle(self, *args, **options):
+        expired = WaiverSession.objects.expired(before=timezone.now() - timedelta(days=options['grace_days']))
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired waiver sessions would be deleted")
+            return
+
+        # Signed sessions are never expired (is_used=True), so no waiver is
+        # ever cascaded away here
+        deleted = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            _, per_model = WaiverSession.objects.filter(pk__in=batch, is_used=False).delete()
+            deleted += per_model.get(WaiverSession._meta.label, 0)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired waiver sessions"))
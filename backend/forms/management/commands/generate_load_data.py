@@ -0,0 +1,319 @@
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from forms.dashboards import DashboardSnapshot
+from forms.versions import bump_all
+from forms.models import (
+    Checklist, ChecklistTemplateItem, CleaningLog, DailyInspection, DailyStats, IncidentReport,
+    MaintenanceLog, MonthlyStatsRollup, RemedialAction, SafetyCheck, StaffAppraisal, StaffShift,
+    User, Waiver, WaiverSession
+)
+
+USERNAME_PREFIX = 'load-'
+PASSWORD = 'load-password'
+STAFF_ROLES = ['marshal', 'reception', 'party_host', 'cafe']
+
+FIRST_NAMES = ['Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Noah', 'Oliver', 'George', 'Arthur', 'Leo',
+               'Chidi', 'Ngozi', 'Tunde', 'Aisha', 'Priya', 'Ravi', 'Sofia', 'Mateo', 'Hana', 'Kenji']
+SURNAMES = ['Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies', 'Patel', 'Okafor',
+            'Adeyemi', 'Khan', 'Evans', 'Thomas', 'Roberts', 'Walker', 'Wright', 'Hughes', 'Green', 'Hall']
+DOMAINS = ['gmail.com', 'outlook.com', 'yahoo.co.uk', 'icloud.com', 'hotmail.com']
+
+TRAMPOLINES = [f'TRAMP-{number:03d}' for number in range(1, 13)]
+EQUIPMENT = ['TRAMP-001', 'TRAMP-005', 'FOAM-PIT-1', 'DODGEBALL-1', 'NINJA-1', 'CAFE-FRIDGE', 'HVAC-1']
+CHECKLIST_ITEMS = {
+    'cafe': {
+        'opening': ['Fridge temperatures logged', 'Coffee machine cleaned', 'Tills counted', 'Surfaces sanitised'],
+        'midday': ['Tables wiped', 'Stock replenished', 'Allergen labels checked'],
+        'closing': ['Fryers off', 'Floors mopped', 'Fridges sealed', 'Waste removed', 'Tills cashed up'],
+    },
+    'marshal': {
+        'pre_shift': ['Radio checked', 'Court nets inspected', 'Foam pit raked', 'Briefing attended'],
+        'shift_operations': ['Court capacity enforced', 'Socks checked', 'Water break rotation'],
+        'post_shift': ['Lost property logged', 'Courts cleared', 'Incidents handed over'],
+    },
+}
+
+# Average rows per day at --scale 1
+DAILY_RATES = {
+    'safety_checks': 4,
+    'shifts': 6,
+    'cleaning_logs': 8,
+    'maintenance_logs': 0.4,
+    'incidents': 0.15,
+    'weekday_waivers': 40,
+    'weekend_waivers': 90,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Fabricate years of realistic operating data with bulk inserts. The same "
+        "--seed, --years, --scale and --end-date always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=float, default=3, help='Years of history to generate')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for staff and daily volumes')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--end-date', type=date.fromisoformat, default=None,
+                            help='Last day of generated data, YYYY-MM-DD (default: today)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--replace', action='store_true',
+                            help=f'Delete previously generated data ({USERNAME_PREFIX}* users and their records) first')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.scale = options['scale']
+        self.batch_size = options['batch_size']
+        end = options['end_date'] or timezone.now().date()
+        start = end - timedelta(days=round(options['years'] * 365) - 1)
+
+        generated = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        if generated.exists():
+            if not options['replace']:
+                raise CommandError("Load data already exists; pass --replace to regenerate it")
+            generated.delete()
+
+        began = time.perf_counter()
+        self.counts = {}
+        with transaction.atomic():
+            self.setup(start)
+            self.pending = {}
+            for day_number in range((end - start).days + 1):
+                self.generate_day(start + timedelta(days=day_number), end)
+                if sum(len(rows) for rows in self.pending.values()) >= self.batch_size * 5:
+                    self.flush()
+            self.flush()
+            self.generate_appraisals(start, end)
+
+            # bulk_create skips the save signals that keep these up to date
+            MonthlyStatsRollup.rebuild()
+            bump_all()
+        DashboardSnapshot.invalidate()
+
+        for model, count in self.counts.items():
+            self.stdout.write(f"{model:<22}{count:>10}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(self.counts.values())} rows from {start} to {end} "
+            f"in {time.perf_counter() - began:.1f}s"
+        ))
+
+    # ---------- helpers ----------
+
+    def times(self, rate):
+        """How many events happen today for a daily rate, scaled"""
+        expected = rate * self.scale
+        whole = int(expected)
+        return whole + (self.rng.random() < expected - whole)
+
+    def moment(self, day, earliest=9, latest=21):
+        seconds = self.rng.randrange(earliest * 3600, latest * 3600)
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(seconds=seconds))
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def person(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(SURNAMES)
+
+    def add(self, model, obj, **backdated):
+        """Queue ``obj`` for insertion; ``backdated`` sets auto_now_add fields"""
+        self.pending.setdefault(model, []).append((obj, backdated))
+
+    def flush(self):
+        # Insertion order matters: inspections and sessions get their pks
+        # before the remedial actions and waivers that point at them
+        for model in [DailyInspection, RemedialAction, WaiverSession, Waiver] + [
+            model for model in self.pending if model not in (DailyInspection, RemedialAction, WaiverSession, Waiver)
+        ]:
+            rows = self.pending.pop(model, [])
+            if not rows:
+                continue
+            objs = [obj for obj, _ in rows]
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+            # auto_now_add overwrites these on insert, so put them back
+            fields = sorted({field for _, backdated in rows for field in backdated})
+            if fields:
+                for obj, backdated in rows:
+                    for field, value in backdated.items():
+                        setattr(obj, field, value)
+                model.objects.bulk_update(objs, fields, batch_size=self.batch_size)
+            self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(objs)
+
+    # ---------- generators ----------
+
+    def setup(self, start):
+        password = make_password(PASSWORD)
+        staff_count = max(len(STAFF_ROLES), round(12 * self.scale))
+        users = [User(username=f'{USERNAME_PREFIX}owner', first_name='Load', last_name='Owner',
+                      role='owner', password=password, hire_date=start)]
+        for number in range(1, staff_count + 1):
+            first, last = self.person()
+            users.append(User(
+                username=f'{USERNAME_PREFIX}staff-{number}', first_name=first, last_name=last,
+                email=f'{first}.{last}{number}@jumpnjoy.test'.lower(),
+                role=STAFF_ROLES[number % len(STAFF_ROLES)], password=password, hire_date=start,
+            ))
+        User.objects.bulk_create(users)
+        self.counts['User'] = len(users)
+
+        self.owner = User.objects.get(username=f'{USERNAME_PREFIX}owner')
+        self.staff = list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}staff-').order_by('pk'))
+        self.by_role = {role: [user for user in self.staff if user.role == role] for role in STAFF_ROLES}
+
+        ChecklistTemplateItem.objects.bulk_create([
+            ChecklistTemplateItem(area=area, checklist_type=checklist_type, item_id=f'load_{position}',
+                                  item_name=item_name, position=position)
+            for area, types in CHECKLIST_ITEMS.items()
+            for checklist_type, item_names in types.items()
+            for position, item_name in enumerate(item_names)
+        ], ignore_conflicts=True)
+        self.checklist_items = {}
+        for template in ChecklistTemplateItem.objects.order_by('area', 'checklist_type', 'position', 'item_id'):
+            self.checklist_items.setdefault((template.area, template.checklist_type), []).append(template.item_id)
+
+        self.stats_days = set(DailyStats.objects.values_list('date', flat=True))
+        self.checklist_days = set(Checklist.objects.values_list('date', 'area', 'checklist_type'))
+
+    def generate_day(self, day, end):
+        weekend = day.weekday() >= 5
+        rng = self.rng
+
+        # Morning inspection
+        statuses = {
+            field: 'fail' if rng.random() < 0.01 else 'remedial' if rng.random() < 0.03 else 'pass'
+            for field in DailyInspection.INSPECTION_ITEMS
+        }
+        inspector = rng.choice(self.by_role['marshal'] or self.staff)
+        inspection = DailyInspection(date=day, inspector_initials='LD', manager_initials='LO',
+                                     checked_by=inspector, signed_off_by=self.owner, **statuses)
+        self.add(DailyInspection, inspection, created_at=self.moment(day, 8, 9))
+        for field, item_status in statuses.items():
+            if item_status == 'pass':
+                continue
+            reported = self.moment(day, 8, 10)
+            done = (end - day).days > 14 or rng.random() < 0.5
+            self.add(RemedialAction, RemedialAction(
+                inspection=inspection, inspection_code=DailyInspection.INSPECTION_ITEMS[field],
+                issue_description=f"{field.replace('_', ' ').capitalize()} needs attention",
+                remedial_action='Repaired and re-checked' if done else 'Awaiting repair',
+                status='completed' if done else rng.choice(['pending', 'in_progress', 'escalated']),
+                reported_by=inspector, assigned_to=rng.choice(self.staff),
+                completed_by=self.owner if done else None,
+                due_date=reported + timedelta(days=3),
+                completed_at=reported + timedelta(hours=rng.randrange(1, 48)) if done else None,
+            ), created_at=reported)
+
+        for trampoline in rng.sample(TRAMPOLINES, min(len(TRAMPOLINES), self.times(DAILY_RATES['safety_checks']))):
+            checks = [rng.random() > 0.03 for _ in range(3)]
+            self.add(SafetyCheck, SafetyCheck(
+                date=day, trampoline_id=trampoline, springs_ok=checks[0], nets_ok=checks[1],
+                foam_pits_ok=checks[2], overall_pass=all(checks), checked_by=rng.choice(self.staff),
+            ))
+
+        for _ in range(self.times(DAILY_RATES['shifts'])):
+            start_hour = rng.randrange(9, 17)
+            member = rng.choice(self.staff)
+            self.add(StaffShift, StaffShift(
+                date=day, staff_member=member, role_during_shift=member.role,
+                start_time=datetime.min.time().replace(hour=start_hour),
+                end_time=None if day == end else datetime.min.time().replace(hour=min(23, start_hour + rng.randrange(4, 9))),
+            ))
+
+        for _ in range(self.times(DAILY_RATES['cleaning_logs'])):
+            self.add(CleaningLog, CleaningLog(
+                date=self.moment(day), area=rng.choice(CleaningLog.AREA_CHOICES)[0],
+                task_completed=rng.random() > 0.02, supplies_used='Sanitiser spray',
+                cleaned_by=rng.choice(self.staff),
+            ))
+
+        for _ in range(self.times(DAILY_RATES['maintenance_logs'])):
+            self.add(MaintenanceLog, MaintenanceLog(
+                date=self.moment(day), equipment_id=rng.choice(EQUIPMENT),
+                maintenance_type=rng.choice(MaintenanceLog.MAINTENANCE_TYPES)[0],
+                description='Scheduled service', cost=Decimal(rng.randrange(2000, 50000)) / 100,
+                next_maintenance_due=day + timedelta(days=rng.randrange(30, 120)),
+                performed_by=rng.choice(self.staff),
+            ))
+
+        for _ in range(self.times(DAILY_RATES['incidents'])):
+            first, last = self.person()
+            when = self.moment(day)
+            self.add(IncidentReport, IncidentReport(
+                first_name=first, surname=last, date_of_birth=day - timedelta(days=rng.randrange(4 * 365, 40 * 365)),
+                date_of_accident=day, time_of_accident=when.time(), location=rng.choice(TRAMPOLINES),
+                how_occurred='Landed awkwardly after a jump', injury_details='Minor sprain',
+                first_aider_name='Load Owner', reported_by=rng.choice(self.staff),
+            ))
+
+        visitors = 0
+        for _ in range(self.times(DAILY_RATES['weekend_waivers' if weekend else 'weekday_waivers'])):
+            created = self.moment(day)
+            first, last = self.person()
+            session = WaiverSession(
+                id=self.uuid(), staff=rng.choice(self.by_role['reception'] or self.staff),
+                participant_name=f'{first} {last}',
+                participant_email=f'{first}.{last}{rng.randrange(1000)}@{rng.choice(DOMAINS)}'.lower(),
+                token=f'load-{rng.getrandbits(128):032x}', expires_at=created + timedelta(days=7),
+            )
+            # Most links are signed within minutes; a few are never used
+            signed = rng.random() < 0.92
+            session.is_used = signed
+            self.add(WaiverSession, session, created_at=created)
+            if signed:
+                visitors += 1
+                self.add(Waiver, Waiver(
+                    id=self.uuid(), session=session, full_name=f'{first} {last}',
+                    ip_address=f'10.0.{rng.randrange(256)}.{rng.randrange(256)}', user_agent='Mozilla/5.0',
+                ), signed_at=created + timedelta(minutes=rng.randrange(1, 30)))
+
+        if day not in self.stats_days:
+            cafe_sales = Decimal(rng.randrange(visitors * 300, visitors * 900 + 1)) / 100
+            self.add(DailyStats, DailyStats(
+                date=day, visitor_count=visitors, cafe_sales=cafe_sales,
+                total_revenue=cafe_sales + visitors * Decimal('12.50'), bounce_time_minutes=visitors * 60,
+                peak_hour_start=datetime.min.time().replace(hour=14 if weekend else 16),
+                peak_hour_end=datetime.min.time().replace(hour=16 if weekend else 18),
+                recorded_by=self.owner,
+            ))
+
+        for (area, checklist_type), item_ids in self.checklist_items.items():
+            if (day, area, checklist_type) in self.checklist_days:
+                continue
+            member = rng.choice(self.by_role[area] or self.staff)
+            stamp = self.moment(day).isoformat()
+            checklist = Checklist(
+                date=day, area=area, checklist_type=checklist_type, created_by=member, updated_by=member,
+                state={
+                    item_id: {'completed': rng.random() > 0.05, 'updated_by': member.pk, 'updated_at': stamp}
+                    for item_id in item_ids
+                },
+            )
+            checklist.recount()
+            self.add(Checklist, checklist)
+
+    def generate_appraisals(self, start, end):
+        appraisals = []
+        for member in self.staff:
+            day = start + timedelta(days=self.rng.randrange(150, 210))
+            while day <= end:
+                ratings = {
+                    f'{area}_rating': self.rng.randint(2, 5)
+                    for area in ('attendance', 'quality', 'teamwork', 'initiative', 'customer_service', 'adherence')
+                }
+                appraisals.append(StaffAppraisal(
+                    employee=member, appraiser=self.owner, date_of_appraisal=day,
+                    achievements='Consistently reliable', goals='Complete first aid refresher', **ratings,
+                ))
+                day += timedelta(days=self.rng.randrange(170, 200))
+        StaffAppraisal.objects.bulk_create(appraisals, batch_size=self.batch_size)
+        self.counts['StaffAppraisal'] = len(appraisals)
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from forms.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = 'Delete auth tokens that have expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=0,
+                            help='Keep expired tokens this many hours before deleting them')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the tokens that would be deleted')
+
+    def handle(self, *args, **options):
+        expired = AuthToken.objects.expired(before=timezone.now() - timedelta(hours=options['grace_hours']))
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} expired auth tokens would be deleted")
+            return
+
+        # Batches keep each write transaction short so logins are not blocked
+        # behind one large DELETE
+        deleted = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted += AuthToken.objects.filter(pk__in=batch).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired auth tokens"))
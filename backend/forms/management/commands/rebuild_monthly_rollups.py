@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from forms.dashboards import DashboardSnapshot
+from forms.models import MonthlyStatsRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the MonthlyStatsRollup table from DailyStats'
+
+    def handle(self, *args, **kwargs):
+        months = MonthlyStatsRollup.rebuild()
+        # rebuild() bumps the rollup version; its bulk_create sends no
+        # signals, so drop the overview snapshot built from the old rows
+        DashboardSnapshot.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {months} monthly rollups"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from forms import search
+from forms.models import Waiver
+
+
+class Command(BaseCommand):
+    help = 'Recompute waiver search text and rebuild the search index'
+
+    def handle(self, *args, **kwargs):
+        batch = []
+        for waiver in Waiver.objects.select_related('session').only(
+            'id', 'full_name', 'search_text', 'session__participant_name', 'session__participant_email'
+        ).iterator(chunk_size=1000):
+            previous = waiver.search_text
+            waiver.refresh_search_text()
+            if waiver.search_text != previous:
+                batch.append(waiver)
+        Waiver.objects.bulk_update(batch, ['search_text'], batch_size=1000)
+        self.stdout.write(f"Updated search text for {len(batch)} waivers")
+
+        if search.install(connection):
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt the {connection.vendor} waiver search index"))
+        else:
+            self.stdout.write(self.style.WARNING("No search index for this database; searches use LIKE"))
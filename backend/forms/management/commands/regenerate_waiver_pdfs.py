@@ -0,0 +1,55 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from forms.models import Waiver
+
+
+def _init_worker():
+    import django
+    django.setup()
+    # Forked workers must not reuse the parent's database connection
+    connections.close_all()
+
+
+def _regenerate(pks):
+    from forms.jobs import regenerate_waiver_pdfs
+    try:
+        return regenerate_waiver_pdfs(pks)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored waiver PDFs across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Waivers rendered per task')
+        parser.add_argument('--since', help='Only waivers signed on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--status', choices=[choice for choice, _ in Waiver.PDF_STATUS_CHOICES],
+                            help='Only waivers with this PDF status')
+
+    def handle(self, *args, **options):
+        waivers = Waiver.objects.order_by('signed_at')
+        if options['since']:
+            waivers = waivers.filter(signed_at__date__gte=options['since'])
+        if options['status']:
+            waivers = waivers.filter(pdf_status=options['status'])
+
+        pks = list(waivers.values_list('pk', flat=True))
+        chunk_size = max(1, options['chunk_size'])
+        chunks = [pks[i:i + chunk_size] for i in range(0, len(pks), chunk_size)]
+        if not chunks:
+            self.stdout.write("No waivers to regenerate")
+            return
+
+        connections.close_all()
+        done = 0
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), initializer=_init_worker) as pool:
+            for future in as_completed([pool.submit(_regenerate, chunk) for chunk in chunks]):
+                done += future.result()
+                self.stdout.write(f"{done}/{len(pks)} waivers regenerated")
+
+        self.stdout.write(self.style.SUCCESS(f"Regenerated {done} waiver PDFs"))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from forms.jobs import run_pending, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Render queued waiver PDFs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f"PDF worker {worker} started")
+
+        try:
+            while True:
+                rendered, failed = run_pending(worker, options['batch_size'])
+                if rendered or failed:
+                    self.stdout.write(f"Rendered {rendered} waiver PDFs, {failed} failed")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"PDF worker {worker} stopped"))
@@ -1,4 +1,15 @@
+import operator
+from functools import reduce
+
+from django.apps import apps
 from django.contrib.auth.models import BaseUserManager
+from django.db import connections, models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.lookups import Exact, GreaterThan
+from django.utils import timezone
+
+from .search import search_waivers
+from .versions import bump
 
 class UserManager(BaseUserManager):
     def create_user(self, username, email=None, password=None, **extra_fields):
@@ -21,3 +32,149 @@ class UserManager(BaseUserManager):
 
         return self.create_user(username, email, password, **extra_fields)
 
+
+
+def _status_count(item_fields, status, overrides):
+    """SQL expression counting how many inspection items equal ``status``"""
+    terms = []
+    for field_name in item_fields:
+        value = overrides.get(field_name, F(field_name))
+        if hasattr(value, 'resolve_expression'):
+            terms.append(Case(
+                When(Exact(value, Value(status)), then=Value(1)),
+                default=Value(0),
+            ))
+        else:
+            terms.append(Value(int(value == status)))
+    return reduce(operator.add, terms)
+
+
+def outcome_expressions(item_fields, overrides=None):
+    """
+    Build UPDATE expressions for the denormalised inspection outcome columns.
+    ``overrides`` holds the new item values of the same UPDATE, since the
+    right hand side of an UPDATE only sees the old column values.
+    """
+    overrides = overrides or {}
+    failed = _status_count(item_fields, 'fail', overrides)
+    remedial = _status_count(item_fields, 'remedial', overrides)
+    return {
+        'failed_items_count': failed,
+        'remedial_items_count': remedial,
+        'overall_status': Case(
+            When(GreaterThan(failed, 0), then=Value('fail')),
+            When(GreaterThan(remedial, 0), then=Value('remedial')),
+            default=Value('pass'),
+            output_field=models.CharField(),
+        ),
+    }
+
+
+class DailyInspectionQuerySet(models.QuerySet):
+    """
+    Keeps the stored outcome columns of DailyInspection in sync, and bumps
+    its change version, for the write paths that bypass Model.save()
+    """
+    def _touches_items(self, fields):
+        return bool(set(fields or ()) & set(self.model.INSPECTION_ITEMS))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_outcome()
+        update_fields = kwargs.get('update_fields')
+        if self._touches_items(update_fields):
+            kwargs['update_fields'] = list(update_fields) + [
+                field for field in self.model.OUTCOME_FIELDS if field not in update_fields
+            ]
+        bump(self.model)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if self._touches_items(fields):
+            for obj in objs:
+                obj.refresh_outcome()
+            fields += [field for field in self.model.OUTCOME_FIELDS if field not in fields]
+        bump(self.model)
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if self._touches_items(kwargs):
+            kwargs.update(outcome_expressions(self.model.INSPECTION_ITEMS, kwargs))
+        bump(self.model)
+        return super().update(**kwargs)
+
+
+class DailyStatsQuerySet(models.QuerySet):
+    """
+    Refreshes the MonthlyStatsRollup of every month touched, and bumps the
+    DailyStats change version, for the write paths that bypass the save
+    signals (deletes still send them)
+    """
+    def _months(self):
+        return {(month.year, month.month) for month in self.dates('date', 'month')}
+
+    def _months_of(self, objs):
+        to_date = self.model._meta.get_field('date').to_python
+        return {(day.year, day.month) for day in (to_date(obj.date) for obj in objs) if day}
+
+    def _refresh(self, months):
+        rollups = apps.get_model('forms.MonthlyStatsRollup')
+        for year, month in sorted(months):
+            rollups.refresh_month(year, month)
+        bump(self.model)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            self._refresh(self._months_of(objs))
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            # The stored months, which a date change moves rows out of
+            months = self.model.objects.filter(pk__in=[obj.pk for obj in objs])._months()
+            if 'date' in fields:
+                months |= self._months_of(objs)
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+            self._refresh(months)
+        return updated
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            months = self._months()
+            if 'date' in kwargs:
+                pks = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            if 'date' in kwargs:
+                months |= self.model.objects.filter(pk__in=pks)._months()
+            self._refresh(months)
+        return updated
+
+
+class AuthTokenQuerySet(models.QuerySet):
+    def expired(self, before=None):
+        """Tokens that expired before ``before`` (default: now)"""
+        return self.filter(expires_at__lte=before or timezone.now())
+
+
+class WaiverSessionQuerySet(models.QuerySet):
+    def expired(self, before=None):
+        """Unused sessions whose link expired before ``before`` (default: now)"""
+        return self.filter(is_used=False, expires_at__lt=before or timezone.now())
+
+
+class WaiverQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_search_text()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def search(self, term):
+        """Waivers whose name or participant details contain ``term`` (see forms/search.py)"""
+        return search_waivers(self, term, connections[self.db])
@@ -0,0 +1,251 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware records, for every request, the resolved URL name, the
+latency, the number and total time of database queries, the time spent
+in serializers' to_representation() (including any queries it runs for
+fields the view did not prefetch), and the time spent rendering the
+response body (DRF's JSON encoding). Serializers opt in to the
+serialization timing with SerializationTimingMixin. Totals are kept
+in process memory, so each gunicorn worker reports its own numbers; the
+owner-only /api/metrics/ endpoint serves them as JSON, or in the
+Prometheus text format with ``?format=prometheus``.
+
+Queries slower than METRICS_SLOW_QUERY_MS are logged to the
+``forms.metrics.slow_queries`` logger with the view that ran them.
+Streaming responses (the CSV exports) run their queries after the
+middleware returns, so only the queries before the first row are counted.
+
+The per-request cost is a couple of perf_counter() calls per query and
+per serialized object, and one locked dict update per request; see ``benchmark_metrics_overhead``.
+"""
+import logging
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer
+
+slow_query_logger = logging.getLogger('forms.metrics.slow_queries')
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED = '<unresolved>'
+
+# The _SerializationTimer of the request being handled, if any
+_serialization = ContextVar('metrics_serialization', default=None)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match and match.view_name else UNRESOLVED
+
+
+class EndpointMetrics:
+    __slots__ = ('count', 'errors', 'buckets', 'latency', 'queries', 'db_time', 'serialize_time', 'render_time')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+
+    def as_dict(self):
+        cumulative, buckets = 0, {}
+        for bound, hits in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets):
+            cumulative += hits
+            buckets[str(bound)] = cumulative
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'latency_ms': {
+                'total': round(self.latency * 1000, 3),
+                'avg': round(self.latency * 1000 / self.count, 3),
+                'buckets': buckets,
+            },
+            'db_queries': self.queries,
+            'db_queries_avg': round(self.queries / self.count, 2),
+            'db_ms': round(self.db_time * 1000, 3),
+            'serialize_ms': round(self.serialize_time * 1000, 3),
+            'render_ms': round(self.render_time * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-process totals keyed by URL name"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.started_at = timezone.now()
+
+    def record(self, name, latency, status_code, queries, db_time, serialize_time, render_time):
+        bucket = len(LATENCY_BUCKETS)
+        for position, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                bucket = position
+                break
+
+        with self.lock:
+            endpoint = self.endpoints.get(name)
+            if endpoint is None:
+                endpoint = self.endpoints[name] = EndpointMetrics()
+            endpoint.count += 1
+            endpoint.errors += status_code >= 500
+            endpoint.buckets[bucket] += 1
+            endpoint.latency += latency
+            endpoint.queries += queries
+            endpoint.db_time += db_time
+            endpoint.serialize_time += serialize_time
+            endpoint.render_time += render_time
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {name: endpoint.as_dict() for name, endpoint in sorted(self.endpoints.items())}
+        return {
+            'since': self.started_at.isoformat(),
+            'slow_query_ms': getattr(settings, 'METRICS_SLOW_QUERY_MS', None),
+            'endpoints': endpoints,
+        }
+
+
+registry = MetricsRegistry()
+
+
+class _QueryTimer:
+    """connection.execute_wrapper() that counts and times one request's queries"""
+
+    def __init__(self, request, slow_query):
+        self.request = request
+        self.slow_query = slow_query
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.count += 1
+            self.time += elapsed
+            if self.slow_query is not None and elapsed >= self.slow_query:
+                slow_query_logger.warning(
+                    "Slow query (%.1f ms) in %s: %s", elapsed * 1000, view_name(self.request), sql
+                )
+
+
+class _SerializationTimer:
+    def __init__(self):
+        self.time = 0.0
+        self.depth = 0
+
+
+class SerializationTimingMixin:
+    """
+    Adds the time a serializer spends in to_representation() to the current
+    request's serialization time. Only the outermost serializer is timed,
+    so nested serializers are not counted twice; a list is timed per item.
+    """
+    def to_representation(self, instance):
+        timer = _serialization.get()
+        if timer is None or timer.depth:
+            return super().to_representation(instance)
+        timer.depth += 1
+        start = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timer.time += perf_counter() - start
+            timer.depth -= 1
+
+
+class MetricsMiddleware:
+    """Records every request in the metrics registry (disable with METRICS_ENABLED = False)"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        slow_query_ms = getattr(settings, 'METRICS_SLOW_QUERY_MS', None)
+        self.slow_query = slow_query_ms / 1000 if slow_query_ms is not None else None
+
+    def __call__(self, request):
+        start = perf_counter()
+        request._metrics_render_time = 0.0
+        timer = _QueryTimer(request, self.slow_query)
+        serialization = _SerializationTimer()
+        token = _serialization.set(serialization)
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            _serialization.reset(token)
+
+        registry.record(
+            view_name(request), perf_counter() - start, response.status_code,
+            timer.count, timer.time, serialization.time, request._metrics_render_time,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON) after the view
+        # returns; time it from here to the post-render callback
+        render_start = perf_counter()
+
+        def rendered(response):
+            request._metrics_render_time = perf_counter() - render_start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Renders a registry snapshot in the Prometheus text exposition format"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if 'endpoints' not in data:
+            return ''.join(f"# {key}: {value}\n" for key, value in data.items())
+
+        endpoints = [(f'view="{_label(name)}"', endpoint) for name, endpoint in data['endpoints'].items()]
+        lines = []
+
+        def counter(metric, value_of):
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{{{view}}} {value_of(endpoint)}" for view, endpoint in endpoints)
+
+        counter('jumpnjoy_requests_total', lambda endpoint: endpoint['count'])
+        counter('jumpnjoy_request_errors_total', lambda endpoint: endpoint['errors'])
+
+        lines.append("# TYPE jumpnjoy_request_duration_seconds histogram")
+        for view, endpoint in endpoints:
+            latency = endpoint['latency_ms']
+            for bound, hits in latency['buckets'].items():
+                lines.append(f'jumpnjoy_request_duration_seconds_bucket{{{view},le="{bound}"}} {hits}')
+            lines.append(f"jumpnjoy_request_duration_seconds_sum{{{view}}} {latency['total'] / 1000}")
+            lines.append(f"jumpnjoy_request_duration_seconds_count{{{view}}} {endpoint['count']}")
+
+        counter('jumpnjoy_db_queries_total', lambda endpoint: endpoint['db_queries'])
+        counter('jumpnjoy_db_duration_seconds_total', lambda endpoint: endpoint['db_ms'] / 1000)
+        counter('jumpnjoy_serialize_duration_seconds_total', lambda endpoint: endpoint['serialize_ms'] / 1000)
+        counter('jumpnjoy_render_duration_seconds_total', lambda endpoint: endpoint['render_ms'] / 1000)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:27
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+
+INSPECTION_ITEMS = [
+    'framework_stability', 'perimeter_netting', 'wall_padding',
+    'walkway_padding', 'coverall_pads', 'trampoline_beds',
+    'safety_netting', 'trampoline_springs', 'fire_doors',
+    'fire_equipment', 'electrical_cables', 'electrical_sockets',
+    'first_aid_box', 'signage', 'area_cleanliness',
+    'gates_locks', 'trip_hazards', 'staff_availability',
+]
+
+
+def backfill_outcomes(apps, schema_editor):
+    """Populate the outcome columns for existing inspections in one UPDATE per status"""
+    DailyInspection = apps.get_model('forms', 'DailyInspection')
+
+    def status_count(status):
+        count = Value(0)
+        for field_name in INSPECTION_ITEMS:
+            count = count + Case(When(**{field_name: status}, then=Value(1)), default=Value(0))
+        return count
+
+    DailyInspection.objects.update(
+        failed_items_count=status_count('fail'),
+        remedial_items_count=status_count('remedial'),
+    )
+    DailyInspection.objects.filter(remedial_items_count__gt=0).update(overall_status='remedial')
+    DailyInspection.objects.filter(failed_items_count__gt=0).update(overall_status='fail')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0014_alter_marshalchecklist_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyinspection',
+            name='failed_items_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Number of items marked as fail'),
+        ),
+        migrations.AddField(
+            model_name='dailyinspection',
+            name='overall_status',
+            field=models.CharField(choices=[('pass', 'Pass'), ('fail', 'Fail'), ('remedial', 'Remedial')], db_index=True, default='pass', editable=False, help_text='Worst status across all items', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='dailyinspection',
+            name='remedial_items_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Number of items marked as remedial'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyinspection',
+            index=models.Index(fields=['date', 'overall_status'], name='forms_inspection_outcome_idx'),
+        ),
+        migrations.RunPython(backfill_outcomes, migrations.RunPython.noop),
+    ]
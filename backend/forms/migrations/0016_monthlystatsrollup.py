@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:29
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build a rollup row for every month that already has DailyStats"""
+    DailyStats = apps.get_model('forms', 'DailyStats')
+    MonthlyStatsRollup = apps.get_model('forms', 'MonthlyStatsRollup')
+
+    rollups = {}
+    for stat in DailyStats.objects.order_by('date').iterator(chunk_size=2000):
+        key = (stat.date.year, stat.date.month)
+        rollup = rollups.setdefault(key, MonthlyStatsRollup(
+            year=key[0], month=key[1], days_recorded=0, visitor_count=0,
+            cafe_sales=Decimal('0'), total_revenue=Decimal('0'), bounce_time_minutes=0,
+        ))
+        rollup.days_recorded += 1
+        rollup.visitor_count += stat.visitor_count
+        rollup.cafe_sales += stat.cafe_sales
+        rollup.total_revenue += stat.total_revenue
+        rollup.bounce_time_minutes += stat.bounce_time_minutes
+        if stat.peak_hour_start and stat.peak_hour_end:
+            rollup.peak_hour_start = stat.peak_hour_start
+            rollup.peak_hour_end = stat.peak_hour_end
+
+    MonthlyStatsRollup.objects.bulk_create(rollups.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0015_dailyinspection_outcome_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('days_recorded', models.PositiveSmallIntegerField(default=0, help_text='Number of DailyStats rows in the month')),
+                ('visitor_count', models.IntegerField(default=0, help_text='Total visitors for the month')),
+                ('cafe_sales', models.DecimalField(decimal_places=2, default=0, help_text='Cafe sales for the month', max_digits=12)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Total revenue for the month', max_digits=12)),
+                ('bounce_time_minutes', models.IntegerField(default=0, help_text='Total bounce time in minutes for the month')),
+                ('peak_hour_start', models.TimeField(blank=True, help_text='Peak hour start of the latest day that recorded one', null=True)),
+                ('peak_hour_end', models.TimeField(blank=True, help_text='Peak hour end of the latest day that recorded one', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Monthly Stats Rollup',
+                'verbose_name_plural': 'Monthly Stats Rollups',
+                'ordering': ['-year', '-month'],
+                'unique_together': {('year', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_checklist_rows(apps, schema_editor):
+    """
+    Fold the per-item CafeChecklist/MarshalChecklist rows into template
+    items and one Checklist row per (date, area, type)
+    """
+    ChecklistTemplateItem = apps.get_model('forms', 'ChecklistTemplateItem')
+    Checklist = apps.get_model('forms', 'Checklist')
+
+    for area, model_name in (('cafe', 'CafeChecklist'), ('marshal', 'MarshalChecklist')):
+        ItemRow = apps.get_model('forms', model_name)
+        templates = {}
+        positions = {}
+        checklists = {}
+        latest = {}
+
+        for row in ItemRow.objects.order_by('id').iterator(chunk_size=2000):
+            if not row.checklist_type or not row.item_id:
+                continue
+
+            if (row.checklist_type, row.item_id) not in templates:
+                position = positions.get(row.checklist_type, 0)
+                positions[row.checklist_type] = position + 1
+                templates[(row.checklist_type, row.item_id)] = ChecklistTemplateItem(
+                    area=area,
+                    checklist_type=row.checklist_type,
+                    item_id=row.item_id,
+                    item_name=row.item_name or row.item_id,
+                    position=position,
+                )
+
+            day = (row.date, row.checklist_type)
+            checklist = checklists.setdefault(day, Checklist(
+                date=row.date,
+                area=area,
+                checklist_type=row.checklist_type,
+                state={},
+                created_by_id=row.created_by_id,
+                updated_by_id=row.updated_by_id,
+            ))
+            checklist.state[row.item_id] = {
+                'completed': bool(row.completed),
+                'updated_by': row.updated_by_id,
+                'updated_at': row.updated_at.isoformat(),
+            }
+            if day not in latest or row.updated_at > latest[day]:
+                latest[day] = row.updated_at
+                checklist.updated_by_id = row.updated_by_id
+
+        ChecklistTemplateItem.objects.bulk_create(templates.values(), batch_size=500)
+        Checklist.objects.bulk_create(checklists.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0016_monthlystatsrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checklist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('area', models.CharField(choices=[('cafe', 'Cafe'), ('marshal', 'Marshal')], max_length=20)),
+                ('checklist_type', models.CharField(max_length=50)),
+                ('state', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='created_checklists', to=settings.AUTH_USER_MODEL)),
+                ('updated_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='updated_checklists', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', 'area', 'checklist_type'],
+                'unique_together': {('date', 'area', 'checklist_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ChecklistTemplateItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', models.CharField(choices=[('cafe', 'Cafe'), ('marshal', 'Marshal')], max_length=20)),
+                ('checklist_type', models.CharField(max_length=50)),
+                ('item_id', models.CharField(max_length=100)),
+                ('item_name', models.CharField(max_length=255)),
+                ('position', models.PositiveSmallIntegerField(default=0, help_text='Display order within the checklist')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Checklist Template Item',
+                'verbose_name_plural': 'Checklist Template Items',
+                'ordering': ['area', 'checklist_type', 'position', 'item_id'],
+                'unique_together': {('area', 'checklist_type', 'item_id')},
+            },
+        ),
+        migrations.RunPython(copy_checklist_rows, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='marshalchecklist',
+            unique_together=None,
+        ),
+        migrations.RemoveField(
+            model_name='marshalchecklist',
+            name='created_by',
+        ),
+        migrations.RemoveField(
+            model_name='marshalchecklist',
+            name='updated_by',
+        ),
+        migrations.DeleteModel(
+            name='CafeChecklist',
+        ),
+        migrations.DeleteModel(
+            name='MarshalChecklist',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def mark_existing_pdfs(apps, schema_editor):
+    """Waivers signed before the queue already have their PDF; queue the rest"""
+    Waiver = apps.get_model('forms', 'Waiver')
+    WaiverPdfJob = apps.get_model('forms', 'WaiverPdfJob')
+    Waiver.objects.exclude(pdf_file__isnull=True).exclude(pdf_file='').update(pdf_status='ready')
+    WaiverPdfJob.objects.bulk_create([
+        WaiverPdfJob(waiver_id=waiver_id)
+        for waiver_id in Waiver.objects.filter(pdf_status='pending').values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0017_checklist_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waiver',
+            name='pdf_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='WaiverPdfJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=64)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('waiver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pdf_job', to='forms.waiver')),
+            ],
+            options={
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='forms_pdfjob_queue_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_pdfs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import base64
+import binascii
+import hashlib
+
+
+def move_signatures(apps, schema_editor):
+    """
+    Decode each waiver's data-URL signature into a WaiverSignature row.
+    Signatures that are not base64 data URLs are kept verbatim as text/plain.
+    """
+    Waiver = apps.get_model('forms', 'Waiver')
+    WaiverSignature = apps.get_model('forms', 'WaiverSignature')
+
+    batch = []
+    for waiver_id, data_url in Waiver.objects.values_list('id', 'signature').iterator(chunk_size=200):
+        header, _, payload = (data_url or '').partition(',')
+        try:
+            if not (header.startswith('data:') and header.endswith(';base64')):
+                raise ValueError
+            image = base64.b64decode(payload, validate=True)
+            content_type = header[len('data:'):-len(';base64')] or 'image/png'
+        except (ValueError, binascii.Error):
+            image = (data_url or '').encode()
+            content_type = 'text/plain'
+
+        batch.append(WaiverSignature(
+            waiver_id=waiver_id, content_type=content_type, image=image,
+            sha256=hashlib.sha256(image).hexdigest(),
+        ))
+        if len(batch) >= 200:
+            WaiverSignature.objects.bulk_create(batch)
+            batch = []
+    WaiverSignature.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0018_waiver_pdf_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaiverSignature',
+            fields=[
+                ('waiver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature_image', serialize=False, to='forms.waiver')),
+                ('content_type', models.CharField(default='image/png', max_length=50)),
+                ('image', models.BinaryField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(move_signatures, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='waiver',
+            name='signature',
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:42
+
+from django.db import migrations, models
+
+from forms import search
+
+
+def fill_search_text(apps, schema_editor):
+    Waiver = apps.get_model('forms', 'Waiver')
+    batch = []
+    for waiver in Waiver.objects.select_related('session').only(
+        'id', 'full_name', 'session__participant_name', 'session__participant_email'
+    ).iterator(chunk_size=1000):
+        session = waiver.session
+        waiver.search_text = search.build_search_text(
+            waiver.full_name,
+            session.participant_name if session else None,
+            session.participant_email if session else None,
+        )
+        batch.append(waiver)
+        if len(batch) >= 1000:
+            Waiver.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Waiver.objects.bulk_update(batch, ['search_text'])
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0019_waiver_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='waiver',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
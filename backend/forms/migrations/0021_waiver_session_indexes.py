@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0020_waiver_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='waiversession',
+            index=models.Index(fields=['staff', 'is_used', 'expires_at'], name='forms_wsession_staff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waiversession',
+            index=models.Index(fields=['is_used', 'expires_at'], name='forms_wsession_expiry_idx'),
+        ),
+    ]
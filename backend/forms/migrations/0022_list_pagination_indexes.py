@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0021_waiver_session_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cleaninglog',
+            index=models.Index(fields=['date'], name='forms_cleaning_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cleaninglog',
+            index=models.Index(fields=['cleaned_by', 'date'], name='forms_cleaning_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyinspection',
+            index=models.Index(fields=['date', 'created_at'], name='forms_inspection_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waiver',
+            index=models.Index(fields=['signed_at'], name='forms_waiver_signed_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.7 on 2026-10-17 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0022_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='waiver',
+            name='forms_waiver_signed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='incidentreport',
+            index=models.Index(fields=['date_of_accident'], name='forms_incident_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidentreport',
+            index=models.Index(fields=['reported_by', 'date_of_accident'], name='forms_incident_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['date'], name='forms_maint_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['performed_by', 'date'], name='forms_maint_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['next_maintenance_due'], name='forms_maint_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialaction',
+            index=models.Index(fields=['created_at'], name='forms_remedial_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialaction',
+            index=models.Index(fields=['status', 'created_at'], name='forms_remedial_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialaction',
+            index=models.Index(fields=['inspection', 'created_at'], name='forms_remedial_insp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetycheck',
+            index=models.Index(fields=['date', 'overall_pass'], name='forms_safety_date_pass_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetycheck',
+            index=models.Index(fields=['checked_by', 'date'], name='forms_safety_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffappraisal',
+            index=models.Index(fields=['date_of_appraisal'], name='forms_appraisal_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(fields=['date'], name='forms_shift_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(fields=['staff_member', 'date'], name='forms_shift_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffshift',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['date'], name='forms_shift_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waiver',
+            index=models.Index(fields=['signed_at', 'id'], name='forms_waiver_signed_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:12
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def copy_existing_tokens(apps, schema_editor):
+    """Keep current sessions signed in: each DRF token becomes an AuthToken with a full lifetime"""
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('forms', 'AuthToken')
+    quote = schema_editor.quote_name
+
+    # INSERT ... SELECT keeps the original created timestamps, which
+    # bulk_create would overwrite through auto_now_add
+    expires_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    copied = ', '.join(quote(column) for column in ('key', 'user_id', 'created'))
+    schema_editor.execute(
+        f"INSERT INTO {quote(AuthToken._meta.db_table)} ({copied}, {quote('expires_at')}) "
+        f"SELECT {copied}, %s FROM {quote(Token._meta.db_table)}",
+        [schema_editor.connection.ops.adapt_datetimefield_value(expires_at)],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0023_query_pattern_indexes'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Auth Token',
+                'verbose_name_plural': 'Auth Tokens',
+            },
+        ),
+        migrations.RunPython(copy_existing_tokens, migrations.RunPython.noop),
+    ]
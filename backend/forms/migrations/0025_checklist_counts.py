@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:33
+
+from django.db import migrations, models
+
+
+def count_items(apps, schema_editor):
+    """Fill Checklist.counts from state (mirrors Checklist.recount)"""
+    Checklist = apps.get_model('forms', 'Checklist')
+
+    checklists = []
+    for checklist in Checklist.objects.only('id', 'state').iterator(chunk_size=2000):
+        counts = {}
+        for item in checklist.state.values():
+            keys = ['all']
+            if item.get('updated_by') is not None:
+                keys.append(f"user:{item['updated_by']}")
+            for key in keys:
+                started, completed = counts.get(key, (0, 0))
+                counts[key] = [started + 1, completed + bool(item.get('completed'))]
+        checklist.counts = counts
+        checklists.append(checklist)
+    Checklist.objects.bulk_update(checklists, ['counts'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0024_auth_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklist',
+            name='counts',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='[started, completed] items in state, under "all" and "user:<id>" of the user who last updated them'),
+        ),
+        migrations.RunPython(count_items, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='checklist',
+            index=models.Index(fields=['area', 'checklist_type', 'date'], name='forms_checklist_list_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0025_checklist_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyinspection',
+            name='overall_status',
+            field=models.CharField(choices=[('pass', 'Pass'), ('fail', 'Fail'), ('remedial', 'Remedial')], default='pass', editable=False, help_text='Worst status across all items', max_length=8),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0026_dailyinspection_drop_status_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeVersion',
+            fields=[
+                ('label', models.CharField(help_text='app_label.ModelName', max_length=100, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modified', models.DateTimeField(help_text='When the latest change committed')),
+            ],
+        ),
+    ]
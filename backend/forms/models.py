@@ -1,11 +1,20 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
-from .managers import UserManager
+from .managers import (
+    UserManager, AuthTokenQuerySet, DailyInspectionQuerySet, DailyStatsQuerySet, WaiverQuerySet, WaiverSessionQuerySet,
+)
+from .search import build_search_text
+from .versions import bump
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Avg, Sum, Count
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+import base64
+import binascii
+import calendar
+import hashlib
 import uuid
 import secrets
 
@@ -14,6 +23,8 @@ class User(AbstractUser):
     Custom User model with role-based access
     Extends Django's built-in User model
     """
+    OWNER_FIELD = 'id'
+
     ROLE_CHOICES = [
         ('owner', 'Owner'),
         ('marshal', 'Marshal'),
@@ -31,6 +42,40 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+
+class AuthToken(models.Model):
+    """
+    API token with an expiry. Each login issues a new token, so a user can
+    stay signed in on several devices; authentication slides expires_at
+    forward (see forms/authentication.py) and purge_expired_tokens deletes
+    the rest.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Auth Token"
+        verbose_name_plural = "Auth Tokens"
+
+    def __str__(self):
+        return f"Token for {self.user_id} (expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+    @staticmethod
+    def lifetime():
+        return timedelta(seconds=settings.AUTH_TOKEN_TTL)
+
+    @classmethod
+    def issue(cls, user):
+        return cls.objects.create(key=secrets.token_hex(20), user=user, expires_at=timezone.now() + cls.lifetime())
+
+    def is_expired(self, now=None):
+        return self.expires_at <= (now or timezone.now())
+
+
 class DailyInspection(models.Model):
     """
     Comprehensive daily safety inspection model
@@ -78,84 +123,82 @@ class DailyInspection(models.Model):
     trip_hazards = models.CharField(max_length=8, choices=STATUS_CHOICES, default='pass', help_text="INS017: Area free of trip/slip hazards")
     staff_availability = models.CharField(max_length=8, choices=STATUS_CHOICES, default='pass', help_text="INS018: Minimum required staff available")
     
+    # Outcome - denormalised from the items above so it can be filtered in SQL
+    overall_status = models.CharField(max_length=8, choices=STATUS_CHOICES, default='pass', editable=False, help_text="Worst status across all items")
+    failed_items_count = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Number of items marked as fail")
+    remedial_items_count = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Number of items marked as remedial")
+
     # Metadata
     checked_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_inspections')
     signed_off_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='signed_inspections', null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Inspection item fields mapped to their codes on the PDF form
+    INSPECTION_ITEMS = {
+        'framework_stability': 'INS001',
+        'perimeter_netting': 'INS002',
+        'wall_padding': 'INS003',
+        'walkway_padding': 'INS004',
+        'coverall_pads': 'INS005',
+        'trampoline_beds': 'INS006',
+        'safety_netting': 'INS007',
+        'trampoline_springs': 'INS008',
+        'fire_doors': 'INS009',
+        'fire_equipment': 'INS010',
+        'electrical_cables': 'INS011',
+        'electrical_sockets': 'INS012',
+        'first_aid_box': 'INS013',
+        'signage': 'INS014',
+        'area_cleanliness': 'INS015',
+        'gates_locks': 'INS016',
+        'trip_hazards': 'INS017',
+        'staff_availability': 'INS018',
+    }
+    OUTCOME_FIELDS = ['overall_status', 'failed_items_count', 'remedial_items_count']
+
+    objects = DailyInspectionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name = "Daily Inspection"
         verbose_name_plural = "Daily Inspections"
+        indexes = [
+            models.Index(fields=['date', 'overall_status'], name='forms_inspection_outcome_idx'),
+            models.Index(fields=['date', 'created_at'], name='forms_inspection_list_idx'),
+        ]
 
     def __str__(self):
         return f"Daily Inspection - {self.inspection_day} - {self.date}"
 
-    @property
-    def overall_pass(self):
-        """Calculate overall pass status based on individual items"""
-        inspection_fields = [
-            self.framework_stability, self.perimeter_netting, self.wall_padding,
-            self.walkway_padding, self.coverall_pads, self.trampoline_beds,
-            self.safety_netting, self.trampoline_springs, self.fire_doors,
-            self.fire_equipment, self.electrical_cables, self.electrical_sockets,
-            self.first_aid_box, self.signage, self.area_cleanliness,
-            self.gates_locks, self.trip_hazards, self.staff_availability
-        ]
-        return all(status == 'pass' for status in inspection_fields)
+    def save(self, *args, **kwargs):
+        self.refresh_outcome()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(self.OUTCOME_FIELDS)
+        super().save(*args, **kwargs)
 
-    @property
-    def failed_items_count(self):
-        """Count of failed inspection items"""
-        inspection_fields = [
-            self.framework_stability, self.perimeter_netting, self.wall_padding,
-            self.walkway_padding, self.coverall_pads, self.trampoline_beds,
-            self.safety_netting, self.trampoline_springs, self.fire_doors,
-            self.fire_equipment, self.electrical_cables, self.electrical_sockets,
-            self.first_aid_box, self.signage, self.area_cleanliness,
-            self.gates_locks, self.trip_hazards, self.staff_availability
-        ]
-        return sum(1 for status in inspection_fields if status == 'fail')
+    def refresh_outcome(self):
+        """Recalculate the stored outcome columns from the individual items"""
+        statuses = [getattr(self, field_name) for field_name in self.INSPECTION_ITEMS]
+        self.failed_items_count = statuses.count('fail')
+        self.remedial_items_count = statuses.count('remedial')
+        if self.failed_items_count:
+            self.overall_status = 'fail'
+        elif self.remedial_items_count:
+            self.overall_status = 'remedial'
+        else:
+            self.overall_status = 'pass'
 
     @property
-    def remedial_items_count(self):
-        """Count of remedial inspection items"""
-        inspection_fields = [
-            self.framework_stability, self.perimeter_netting, self.wall_padding,
-            self.walkway_padding, self.coverall_pads, self.trampoline_beds,
-            self.safety_netting, self.trampoline_springs, self.fire_doors,
-            self.fire_equipment, self.electrical_cables, self.electrical_sockets,
-            self.first_aid_box, self.signage, self.area_cleanliness,
-            self.gates_locks, self.trip_hazards, self.staff_availability
-        ]
-        return sum(1 for status in inspection_fields if status == 'remedial')
+    def overall_pass(self):
+        """Calculate overall pass status based on individual items"""
+        return self.overall_status == 'pass'
 
     def get_failed_items(self):
         """Return list of failed inspection items with their codes"""
-        item_mapping = {
-            'framework_stability': 'INS001',
-            'perimeter_netting': 'INS002',
-            'wall_padding': 'INS003',
-            'walkway_padding': 'INS004',
-            'coverall_pads': 'INS005',
-            'trampoline_beds': 'INS006',
-            'safety_netting': 'INS007',
-            'trampoline_springs': 'INS008',
-            'fire_doors': 'INS009',
-            'fire_equipment': 'INS010',
-            'electrical_cables': 'INS011',
-            'electrical_sockets': 'INS012',
-            'first_aid_box': 'INS013',
-            'signage': 'INS014',
-            'area_cleanliness': 'INS015',
-            'gates_locks': 'INS016',
-            'trip_hazards': 'INS017',
-            'staff_availability': 'INS018',
-        }
-        
         failed_items = []
-        for field_name, code in item_mapping.items():
+        for field_name, code in self.INSPECTION_ITEMS.items():
             if getattr(self, field_name) == 'fail':
                 failed_items.append((code, field_name))
         return failed_items
@@ -193,6 +236,11 @@ class RemedialAction(models.Model):
         ordering = ['-created_at']
         verbose_name = "Remedial Action"
         verbose_name_plural = "Remedial Actions"
+        indexes = [
+            models.Index(fields=['created_at'], name='forms_remedial_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='forms_remedial_status_idx'),
+            models.Index(fields=['inspection', 'created_at'], name='forms_remedial_insp_idx'),
+        ]
 
     def __str__(self):
         return f"Remedial Action - {self.inspection_code} - {self.inspection.date}"
@@ -203,6 +251,8 @@ class SafetyCheck(models.Model):
     """
     Simplified safety inspection model (kept for backward compatibility)
     """
+    OWNER_FIELD = 'checked_by'
+
     date = models.DateField(default=timezone.now)
     trampoline_id = models.CharField(max_length=50, help_text="Trampoline identifier")
     springs_ok = models.BooleanField(default=True, help_text="Springs in good condition")
@@ -217,6 +267,10 @@ class SafetyCheck(models.Model):
         ordering = ['-date']
         verbose_name = "Safety Check"
         verbose_name_plural = "Safety Checks"
+        indexes = [
+            models.Index(fields=['date', 'overall_pass'], name='forms_safety_date_pass_idx'),
+            models.Index(fields=['checked_by', 'date'], name='forms_safety_staff_date_idx'),
+        ]
 
     def __str__(self):
         return f"Safety Check - {self.trampoline_id} - {self.date}"
@@ -226,6 +280,8 @@ class IncidentReport(models.Model):
     Accident and incident reporting model
     Based on JUMP N JOY Accident Report Form
     """
+    OWNER_FIELD = 'reported_by'
+
     GENDER_CHOICES = [
         ('M', 'Male'),
         ('F', 'Female'),
@@ -289,6 +345,10 @@ class IncidentReport(models.Model):
         ordering = ['-date_of_accident']
         verbose_name = "Accident Report"
         verbose_name_plural = "Accident Reports"
+        indexes = [
+            models.Index(fields=['date_of_accident'], name='forms_incident_date_idx'),
+            models.Index(fields=['reported_by', 'date_of_accident'], name='forms_incident_staff_date_idx'),
+        ]
 
     def __str__(self):
         return f"Accident - {self.first_name} {self.surname} - {self.date_of_accident}"
@@ -298,6 +358,8 @@ class StaffShift(models.Model):
     Staff scheduling and duty tracking
     Ensures proper staffing levels and compliance
     """
+    OWNER_FIELD = 'staff_member'
+
     date = models.DateField(default=timezone.now)
     staff_member = models.ForeignKey(User, on_delete=models.CASCADE)
     start_time = models.TimeField(help_text="Shift start time")
@@ -310,6 +372,12 @@ class StaffShift(models.Model):
         ordering = ['-date']
         verbose_name = "Staff Shift"
         verbose_name_plural = "Staff Shifts"
+        indexes = [
+            models.Index(fields=['date'], name='forms_shift_date_idx'),
+            models.Index(fields=['staff_member', 'date'], name='forms_shift_staff_date_idx'),
+            # Staff currently on shift: the open shifts of a day
+            models.Index(fields=['date'], condition=models.Q(end_time__isnull=True), name='forms_shift_open_idx'),
+        ]
 
     def __str__(self):
         return f"{self.staff_member.username} - {self.date} - {self.role_during_shift}"
@@ -319,6 +387,8 @@ class CleaningLog(models.Model):
     Cleaning and sanitation tracking
     Health department compliance requirement
     """
+    OWNER_FIELD = 'cleaned_by'
+
     AREA_CHOICES = [
         ('restrooms', 'Restrooms'),
         ('common_areas', 'Common Areas'),
@@ -339,6 +409,10 @@ class CleaningLog(models.Model):
         ordering = ['-date']
         verbose_name = "Cleaning Log"
         verbose_name_plural = "Cleaning Logs"
+        indexes = [
+            models.Index(fields=['date'], name='forms_cleaning_date_idx'),
+            models.Index(fields=['cleaned_by', 'date'], name='forms_cleaning_staff_date_idx'),
+        ]
 
     def __str__(self):
         return f"Cleaning - {self.area} - {self.date.strftime('%Y-%m-%d %H:%M')}"
@@ -348,6 +422,8 @@ class MaintenanceLog(models.Model):
     Equipment maintenance tracking
     Preventive maintenance and repair history
     """
+    OWNER_FIELD = 'performed_by'
+
     MAINTENANCE_TYPES = [
         ('routine', 'Routine Maintenance'),
         ('repair', 'Repair'),
@@ -367,6 +443,11 @@ class MaintenanceLog(models.Model):
         ordering = ['-date']
         verbose_name = "Maintenance Log"
         verbose_name_plural = "Maintenance Logs"
+        indexes = [
+            models.Index(fields=['date'], name='forms_maint_date_idx'),
+            models.Index(fields=['performed_by', 'date'], name='forms_maint_staff_date_idx'),
+            models.Index(fields=['next_maintenance_due'], name='forms_maint_due_idx'),
+        ]
 
     def __str__(self):
         return f"Maintenance - {self.equipment_id} - {self.maintenance_type} - {self.date.strftime('%Y-%m-%d')}"
@@ -376,6 +457,8 @@ class DailyStats(models.Model):
     Daily business statistics
     Visitor counts and sales tracking for analytics
     """
+    OWNER_FIELD = 'recorded_by'
+
     date = models.DateField(unique=True, default=timezone.now, help_text="Date for statistics")
     visitor_count = models.IntegerField(default=0, help_text="Total visitors for the day")
     cafe_sales = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Cafe sales amount")
@@ -387,6 +470,8 @@ class DailyStats(models.Model):
     recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DailyStatsQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date']
         verbose_name = "Daily Stats"
@@ -395,6 +480,14 @@ class DailyStats(models.Model):
     def __str__(self):
         return f"Stats - {self.date} - {self.visitor_count} visitors - £{self.cafe_sales}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored date so a rollup can be refreshed for both
+        # the old and the new month when the date is edited
+        instance._loaded_date = instance.__dict__.get('date')
+        return instance
+
     @classmethod
     def get_monthly_revenue(cls, month=None, year=None):
         """Calculate monthly revenue"""
@@ -402,13 +495,8 @@ class DailyStats(models.Model):
             month = timezone.now().month
         if not year:
             year = timezone.now().year
-            
-        return cls.objects.filter(
-            date__month=month,
-            date__year=year
-        ).aggregate(
-            total=Sum('total_revenue')
-        )['total'] or Decimal('0')
+
+        return MonthlyStatsRollup.for_month(year, month).total_revenue
 
     @classmethod
     def get_monthly_visitors(cls, month=None, year=None):
@@ -417,88 +505,233 @@ class DailyStats(models.Model):
             month = timezone.now().month
         if not year:
             year = timezone.now().year
-            
-        return cls.objects.filter(
-            date__month=month,
-            date__year=year
-        ).aggregate(
-            total=Sum('visitor_count')
-        )['total'] or 0
-
-class CafeChecklist(models.Model):
-    CHECKLIST_TYPES = [
-        ('opening', 'Opening Checklist'),
-        ('midday', 'Midday Operations'),
-        ('closing', 'Closing Checklist'),
-    ]
-    
-    date = models.DateField()
-    checklist_type = models.CharField(max_length=50, choices=CHECKLIST_TYPES, null=True, blank=True)
-    item_id = models.CharField(max_length=100, null=True, blank=True)
-    item_name = models.CharField(max_length=255, null=True, blank=True)
-    completed = models.BooleanField(default=False, null=True, blank=True)
-    
-    created_by = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
-        related_name="checklist_creators"
-    )
-    updated_by = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
-        related_name="checklist_updates"
-    )
-    
-    created_at = models.DateTimeField(auto_now_add=True)
+
+        return MonthlyStatsRollup.for_month(year, month).visitor_count
+
+
+class MonthlyStatsRollup(models.Model):
+    """
+    Monthly totals of DailyStats
+    Refreshed for the affected month whenever a DailyStats row is saved or
+    deleted, so analytics read one row instead of re-aggregating the month
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    days_recorded = models.PositiveSmallIntegerField(default=0, help_text="Number of DailyStats rows in the month")
+    visitor_count = models.IntegerField(default=0, help_text="Total visitors for the month")
+    cafe_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Cafe sales for the month")
+    total_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Total revenue for the month")
+    bounce_time_minutes = models.IntegerField(default=0, help_text="Total bounce time in minutes for the month")
+    peak_hour_start = models.TimeField(null=True, blank=True, help_text="Peak hour start of the latest day that recorded one")
+    peak_hour_end = models.TimeField(null=True, blank=True, help_text="Peak hour end of the latest day that recorded one")
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
-        # Prevent duplicate entries for same item on same date
-        unique_together = ['date', 'checklist_type', 'item_id']
-        ordering = ['checklist_type', 'item_id']
-        
+        unique_together = ['year', 'month']
+        ordering = ['-year', '-month']
+        verbose_name = "Monthly Stats Rollup"
+        verbose_name_plural = "Monthly Stats Rollups"
+
     def __str__(self):
-        return f"{self.checklist_type} - {self.item_name} - {self.date}"
+        return f"Rollup - {self.month}/{self.year} - {self.visitor_count} visitors - £{self.total_revenue}"
 
-class MarshalChecklist(models.Model):
-    CHECKLIST_TYPES = [
-        ('pre_shift', 'Pre-Shift Marshal Checklist'),
-        ('shift_operations', 'Shift Operations Checklist'),
-        ('post_shift', 'Post-Shift Marshal Checklist'),
+    @staticmethod
+    def month_range(year, month):
+        """First and last date of a month, for index-friendly range filters"""
+        first = date(year, month, 1)
+        last = date(year, month, calendar.monthrange(year, month)[1])
+        return first, last
+
+    @staticmethod
+    def previous_month(year, month):
+        return (year - 1, 12) if month == 1 else (year, month - 1)
+
+    @classmethod
+    def for_month(cls, year, month):
+        """Rollup for a month, or an unsaved empty one if nothing was recorded"""
+        rollup = cls.objects.filter(year=year, month=month).first()
+        return rollup or cls(year=year, month=month)
+
+    @classmethod
+    def for_months(cls, *months):
+        """Rollups for several (year, month) pairs in one query"""
+        query = models.Q(pk__in=[])
+        for year, month in months:
+            query |= models.Q(year=year, month=month)
+        found = {(rollup.year, rollup.month): rollup for rollup in cls.objects.filter(query)}
+        return [found.get((year, month)) or cls(year=year, month=month) for year, month in months]
+
+    @staticmethod
+    def growth_rate(current, previous):
+        """Revenue growth of the ``current`` rollup over ``previous``, as a percentage"""
+        if previous.total_revenue > 0:
+            return ((current.total_revenue - previous.total_revenue) / previous.total_revenue) * 100
+        return 0
+
+    @classmethod
+    def refresh_month(cls, year, month):
+        """Recalculate one month from its DailyStats rows"""
+        first, last = cls.month_range(year, month)
+        stats = DailyStats.objects.filter(date__range=[first, last])
+        totals = stats.aggregate(
+            days_recorded=Count('id'),
+            visitor_count=Sum('visitor_count'),
+            cafe_sales=Sum('cafe_sales'),
+            total_revenue=Sum('total_revenue'),
+            bounce_time_minutes=Sum('bounce_time_minutes'),
+        )
+        if not totals['days_recorded']:
+            cls.objects.filter(year=year, month=month).delete()
+            return None
+
+        peak = stats.filter(
+            peak_hour_start__isnull=False,
+            peak_hour_end__isnull=False
+        ).order_by('-date').values('peak_hour_start', 'peak_hour_end').first() or {}
+
+        rollup, _ = cls.objects.update_or_create(
+            year=year,
+            month=month,
+            defaults={
+                'days_recorded': totals['days_recorded'],
+                'visitor_count': totals['visitor_count'] or 0,
+                'cafe_sales': totals['cafe_sales'] or Decimal('0'),
+                'total_revenue': totals['total_revenue'] or Decimal('0'),
+                'bounce_time_minutes': totals['bounce_time_minutes'] or 0,
+                'peak_hour_start': peak.get('peak_hour_start'),
+                'peak_hour_end': peak.get('peak_hour_end'),
+            }
+        )
+        return rollup
+
+    @classmethod
+    def rebuild(cls):
+        """Recreate every rollup from scratch in a single pass over DailyStats"""
+        rollups = {}
+        for stat in DailyStats.objects.order_by('date').values(
+            'date', 'visitor_count', 'cafe_sales', 'total_revenue',
+            'bounce_time_minutes', 'peak_hour_start', 'peak_hour_end'
+        ).iterator(chunk_size=2000):
+            key = (stat['date'].year, stat['date'].month)
+            rollup = rollups.setdefault(key, cls(year=key[0], month=key[1]))
+            rollup.days_recorded += 1
+            rollup.visitor_count += stat['visitor_count']
+            rollup.cafe_sales += stat['cafe_sales']
+            rollup.total_revenue += stat['total_revenue']
+            rollup.bounce_time_minutes += stat['bounce_time_minutes']
+            if stat['peak_hour_start'] and stat['peak_hour_end']:
+                rollup.peak_hour_start = stat['peak_hour_start']
+                rollup.peak_hour_end = stat['peak_hour_end']
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rollups.values(), batch_size=500)
+            bump(cls)
+        return len(rollups)
+
+
+class ChecklistTemplateItem(models.Model):
+    """
+    One item of a checklist, per area and checklist type
+    Item names are stored once here instead of on every day's records
+    """
+    AREA_CHOICES = [
+        ('cafe', 'Cafe'),
+        ('marshal', 'Marshal'),
     ]
-    
+    CHECKLIST_TYPES = {
+        'cafe': [
+            ('opening', 'Opening Checklist'),
+            ('midday', 'Midday Operations'),
+            ('closing', 'Closing Checklist'),
+        ],
+        'marshal': [
+            ('pre_shift', 'Pre-Shift Marshal Checklist'),
+            ('shift_operations', 'Shift Operations Checklist'),
+            ('post_shift', 'Post-Shift Marshal Checklist'),
+        ],
+    }
+
+    area = models.CharField(max_length=20, choices=AREA_CHOICES)
+    checklist_type = models.CharField(max_length=50)
+    item_id = models.CharField(max_length=100)
+    item_name = models.CharField(max_length=255)
+    position = models.PositiveSmallIntegerField(default=0, help_text="Display order within the checklist")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['area', 'checklist_type', 'item_id']
+        ordering = ['area', 'checklist_type', 'position', 'item_id']
+        verbose_name = "Checklist Template Item"
+        verbose_name_plural = "Checklist Template Items"
+
+    def __str__(self):
+        return f"{self.area} - {self.checklist_type} - {self.item_name}"
+
+
+class Checklist(models.Model):
+    """
+    Completion state of one checklist (area + type) for one day
+    One row per checklist instead of one row per item; ``state`` maps each
+    started item_id to {"completed", "updated_by", "updated_at"} and, once
+    renamed on that day, "item_name"
+    """
     date = models.DateField()
-    checklist_type = models.CharField(max_length=50, choices=CHECKLIST_TYPES, null=True, blank=True)
-    item_id = models.CharField(max_length=100, null=True, blank=True)
-    item_name = models.CharField(max_length=255, null=True, blank=True)
-    completed = models.BooleanField(default=False, null=True, blank=True)
-    
+    area = models.CharField(max_length=20, choices=ChecklistTemplateItem.AREA_CHOICES)
+    checklist_type = models.CharField(max_length=50)
+    state = models.JSONField(default=dict, blank=True)
+    counts = models.JSONField(
+        default=dict, blank=True, editable=False,
+        help_text='[started, completed] items in state, under "all" and "user:<id>" of the user who last updated them'
+    )
+
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name="marshal_checklist_creators"
+        related_name="created_checklists"
     )
     updated_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name="marshal_checklist_updates"
+        related_name="updated_checklists"
     )
-    
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
-        # Prevent duplicate entries for same item on same date
-        unique_together = ['date', 'checklist_type', 'item_id']
-        ordering = ['checklist_type', 'item_id']
-        
+        unique_together = ['date', 'area', 'checklist_type']
+        ordering = ['-date', 'area', 'checklist_type']
+        indexes = [
+            # Item lists walk an area's checklists by type and date
+            models.Index(fields=['area', 'checklist_type', 'date'], name='forms_checklist_list_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.checklist_type} - {self.item_name} - {self.date}"
-        
+        return f"{self.area} - {self.checklist_type} - {self.date}"
+
+    @staticmethod
+    def counts_key(user_id=None):
+        return 'all' if user_id is None else f'user:{user_id}'
+
+    def recount(self):
+        """Refresh ``counts`` from ``state``; call before saving a changed state"""
+        counts = {}
+        for item in self.state.values():
+            keys = [self.counts_key()]
+            if item.get('updated_by') is not None:
+                keys.append(self.counts_key(item['updated_by']))
+            for key in keys:
+                started, completed = counts.get(key, (0, 0))
+                counts[key] = [started + 1, completed + bool(item.get('completed'))]
+        self.counts = counts
+
+
 class StaffAppraisal(models.Model):
     """
     Staff Appraisal model based on appraisal form
     """
+    OWNER_FIELD = 'employee'
 
     RATING_CHOICES = [(i, str(i)) for i in range(1, 6)]  # 1 to 5 scale
 
@@ -544,6 +777,9 @@ class StaffAppraisal(models.Model):
         ordering = ['-date_of_appraisal']
         verbose_name = "Staff Appraisal"
         verbose_name_plural = "Staff Appraisals"
+        indexes = [
+            models.Index(fields=['date_of_appraisal'], name='forms_appraisal_date_idx'),
+        ]
 
     def __str__(self):
         return f"Appraisal - {self.employee.username} ({self.date_of_appraisal})"
@@ -603,6 +839,8 @@ class BusinessTarget(models.Model):
         return f"{self.get_target_type_display()} - {self.month}/{self.year} - Target: {self.target_value}"
     
 class WaiverSession(models.Model):
+    OWNER_FIELD = 'staff'
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     staff = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waiver_sessions')
     participant_email = models.EmailField(blank=True, null=True)
@@ -611,14 +849,80 @@ class WaiverSession(models.Model):
     is_used = models.BooleanField(default=False)
     expires_at = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    objects = WaiverSessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # dashboard_stats counts a staff member's sessions by is_used
+            models.Index(fields=['staff', 'is_used', 'expires_at'], name='forms_wsession_staff_idx'),
+            # expire_waiver_sessions sweeps unused sessions by expiry
+            models.Index(fields=['is_used', 'expires_at'], name='forms_wsession_expiry_idx'),
+        ]
+
+    @staticmethod
+    def token_cache_key(token):
+        return f"waiver-session:{token}"
+
+    @classmethod
+    def get_by_token(cls, token):
+        """
+        The session (with its staff member) for a waiver link token.
+        Lookups are cached for WAIVER_SESSION_CACHE_TTL seconds, so the
+        signing page and its submit cost one query between them; raises
+        DoesNotExist for unknown tokens.
+        """
+        key = cls.token_cache_key(token)
+        session = cache.get(key)
+        if session is None:
+            session = cls.objects.select_related('staff').get(token=token)
+            cache.set(key, session, settings.WAIVER_SESSION_CACHE_TTL)
+        return session
+
+    def forget_token(self):
+        cache.delete(self.token_cache_key(self.token))
+
+    def mark_used(self):
+        """
+        Mark the session used unless it already was (or has been deleted).
+        The check is part of the UPDATE, so a stale cached session cannot be
+        signed twice. Returns whether this call marked it.
+        """
+        marked = WaiverSession.objects.filter(pk=self.pk, is_used=False).update(is_used=True)
+        self.is_used = True
+        self.forget_token()
+        return bool(marked)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored participant details so the signed waiver's
+        # search text is only rewritten when they change
+        instance._loaded_participant = (
+            instance.__dict__.get('participant_name'), instance.__dict__.get('participant_email')
+        )
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.token:
             self.token = secrets.token_urlsafe(48)
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(days=7)
         super().save(*args, **kwargs)
-    
+
+        loaded = getattr(self, '_loaded_participant', None)
+        if loaded is not None and loaded != (self.participant_name, self.participant_email):
+            for waiver in Waiver.objects.filter(session=self).only('id', 'full_name', 'session'):
+                waiver.session = self
+                waiver.refresh_search_text()
+                Waiver.objects.filter(pk=waiver.pk).update(search_text=waiver.search_text)
+        self._loaded_participant = (self.participant_name, self.participant_email)
+        self.forget_token()
+
+    def delete(self, *args, **kwargs):
+        self.forget_token()
+        return super().delete(*args, **kwargs)
+
     def is_valid(self):
         return not self.is_used and timezone.now() < self.expires_at
 
@@ -626,17 +930,126 @@ class WaiverSession(models.Model):
         return f"WaiverSession {self.token}"
 
 class Waiver(models.Model):
+    OWNER_FIELD = 'session__staff'
+
+    PDF_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     session = models.OneToOneField(WaiverSession, on_delete=models.CASCADE, related_name='waiver', null=True, blank=True)
     full_name = models.CharField(max_length=255)
-    signature = models.TextField()
     pdf_file = models.FileField(upload_to="waivers/%Y/%m/%d/", null=True, blank=True)
+    pdf_status = models.CharField(max_length=10, choices=PDF_STATUS_CHOICES, default='pending')
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     signed_at = models.DateTimeField(auto_now_add=True)
+    # Lowercased name and participant details, indexed for search (forms/search.py)
+    search_text = models.TextField(default='', editable=False)
+
+    objects = WaiverQuerySet.as_manager()
 
     class Meta:
         ordering = ['-signed_at']
+        indexes = [
+            models.Index(fields=['signed_at', 'id'], name='forms_waiver_signed_idx'),
+        ]
+
+    def __str__(self):
+        return f"Waiver for {self.full_name}"
+
+    def refresh_search_text(self):
+        session = self.session
+        self.search_text = build_search_text(
+            self.full_name,
+            session.participant_name if session else None,
+            session.participant_email if session else None,
+        )
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'search_text' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'search_text']
+        super().save(*args, **kwargs)
+
+
+class WaiverSignature(models.Model):
+    """
+    The signature image of a waiver. Kept out of the Waiver row so waiver
+    lists never read the image bytes.
+    """
+    waiver = models.OneToOneField(Waiver, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='signature_image')
+    content_type = models.CharField(max_length=50, default='image/png')
+    image = models.BinaryField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def parse_data_url(data_url):
+        """Split a base64 ``data:`` URL into (content type, bytes); raises ValueError"""
+        header, sep, payload = data_url.partition(',')
+        if not sep or not header.startswith('data:') or not header.endswith(';base64'):
+            raise ValueError("Signature must be a base64 data URL")
+        try:
+            image = base64.b64decode(payload, validate=True)
+        except binascii.Error:
+            raise ValueError("Signature is not valid base64")
+        return header[len('data:'):-len(';base64')] or 'image/png', image
+
+    @classmethod
+    def from_data_url(cls, waiver, data_url):
+        content_type, image = cls.parse_data_url(data_url)
+        return cls(waiver=waiver, content_type=content_type, image=image,
+                   sha256=hashlib.sha256(image).hexdigest())
+
+    def __str__(self):
+        return f"Signature for {self.waiver_id}"
+
+
+class WaiverPdfJob(models.Model):
+    """
+    Queue entry for rendering a signed waiver's PDF.
+    Jobs are claimed and run by the ``run_waiver_pdf_worker`` command.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    waiver = models.OneToOneField(Waiver, on_delete=models.CASCADE, related_name='pdf_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='forms_pdfjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"PDF job for {self.waiver_id} ({self.status})"
+
+
+class ChangeVersion(models.Model):
+    """
+    Change counter of one model in versions.VERSIONED_MODELS
+    Kept in the database so every worker builds the same ETags
+    """
+    label = models.CharField(max_length=100, primary_key=True, help_text="app_label.ModelName")
+    version = models.PositiveBigIntegerField(default=0)
+    modified = models.DateTimeField(help_text="When the latest change committed")
 
     def __str__(self):
-        return f"Waiver for {self.full_name}"
\ No newline at end of file
+        return f"{self.label} v{self.version}"
@@ -0,0 +1,57 @@
+"""
+Pagination for the high-volume list endpoints.
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class _KeysetPagination(CursorPagination):
+    def __init__(self, ordering, page_size):
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def get_ordering(self, request, queryset, view):
+        # Keyset pages only stay cheap on the indexed cursor ordering, so it
+        # wins over any ?ordering= the view's OrderingFilter would apply
+        return self.ordering
+
+
+class SelectablePagination(PageNumberPagination):
+    """
+    Page-number pagination, or keyset (cursor) pagination when the client
+    asks for it with ``?pagination=cursor``.
+
+    Page-number pages cost a COUNT(*) plus an OFFSET scan that grows with
+    the page number; cursor pages seek straight to the position encoded in
+    the ``next`` / ``previous`` links, so page N costs the same as page 1.
+    Cursor responses have no ``count``.
+
+    A view opts in by declaring ``cursor_ordering``; its first field should
+    lead an index. Views without it always use page numbers.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        wants_cursor = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or 'cursor' in request.query_params
+        )
+        if ordering and wants_cursor:
+            self.keyset = _KeysetPagination(ordering, self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.keyset is not None:
+            return self.keyset.get_html_context()
+        return super().get_html_context()
@@ -0,0 +1,127 @@
+"""
+Waiver PDF rendering.
+
+Rendering runs in the PDF worker (see forms/jobs.py), never inside the
+signing request. The static part of the page (title, terms and section
+heading) is laid out once per process by WaiverPdfTemplate; each waiver
+only adds its participant fields and signature on top.
+"""
+import io
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+WAIVER_TERMS = [
+    "I acknowledge that I am voluntarily participating in activities and assume all risks.",
+    "I hereby release the organization from any and all liability claims.",
+    "I confirm that I am in good health and physically capable of participating.",
+    "I authorize emergency medical treatment if necessary.",
+]
+
+# Fonts are registered on every canvas in this order so the internal font
+# names baked into the cached template (/F1, /F2) match the page resources.
+TEMPLATE_FONTS = ("Helvetica", "Helvetica-Bold")
+
+
+class _CompiledText:
+    """Pre-built text operators, drawn with Canvas.drawText"""
+
+    def __init__(self, code):
+        self.code = code
+
+    def getCode(self):
+        return self.code
+
+
+class WaiverPdfTemplate:
+    """The static layout of the waiver page for one version of the terms"""
+
+    def __init__(self, terms, pagesize=letter):
+        self.pagesize = pagesize
+        width, height = pagesize
+        scratch = self.new_canvas(io.BytesIO())
+
+        text = scratch.beginText()
+
+        # Title
+        text.setFont("Helvetica-Bold", 16)
+        text.setTextOrigin(72, height - 72)
+        text.textOut("LIABILITY WAIVER AND RELEASE AGREEMENT")
+
+        # Terms
+        text.setFont("Helvetica", 10)
+        y_position = height - 120
+        for term in terms:
+            text.setTextOrigin(72, y_position)
+            text.textOut(term)
+            y_position -= 20
+
+        # Signature section
+        y_position -= 40
+        text.setFont("Helvetica-Bold", 12)
+        text.setTextOrigin(72, y_position)
+        text.textOut("PARTICIPANT INFORMATION")
+
+        self.static_text = _CompiledText(text.getCode())
+        self.fields_top = y_position
+
+    def new_canvas(self, buffer):
+        c = canvas.Canvas(buffer, pagesize=self.pagesize)
+        for font_name in TEMPLATE_FONTS:
+            c.setFont(font_name, 10)
+        return c
+
+    def render(self, waiver):
+        """Render a signed waiver and return the PDF bytes"""
+        buffer = io.BytesIO()
+        c = self.new_canvas(buffer)
+        c.drawText(self.static_text)
+
+        y_position = self.fields_top - 20
+        c.setFont("Helvetica", 10)
+        c.drawString(72, y_position, f"Full Name: {waiver.full_name}")
+
+        y_position -= 15
+        c.drawString(72, y_position, f"Signed Date: {waiver.signed_at.strftime('%B %d, %Y at %I:%M %p')}")
+
+        if waiver.session and waiver.session.participant_email:
+            y_position -= 15
+            c.drawString(72, y_position, f"Email: {waiver.session.participant_email}")
+
+        # Signature
+        y_position -= 40
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(72, y_position, "SIGNATURE")
+
+        signature = getattr(waiver, 'signature_image', None)
+        if signature is not None:
+            try:
+                signature_image = ImageReader(io.BytesIO(signature.image))
+
+                y_position -= 5
+                c.drawImage(signature_image, 72, y_position - 60, width=200, height=50)
+                y_position -= 70
+                c.drawString(72, y_position, f"Digitally signed by: {waiver.full_name}")
+            except Exception:
+                y_position -= 20
+                c.drawString(72, y_position, "Signature: [Unable to display]")
+
+        c.save()
+        return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_waiver_template():
+    # WAIVER_TERMS only change with a deploy, which starts new processes
+    return WaiverPdfTemplate(WAIVER_TERMS)
+
+
+def waiver_pdf_filename(waiver):
+    return f"waiver_{waiver.full_name.replace(' ', '_')}_{waiver.signed_at.date()}.pdf"
+
+
+def render_waiver_pdf(waiver):
+    """Render a signed waiver and return the PDF bytes"""
+    return get_waiver_template().render(waiver)
@@ -2,7 +2,7 @@ from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 class AppraisalAccessPermission(BasePermission):
     """
-    - Superusers/staff (is_staff) see everything.
+    - Owners and superusers/staff (is_staff) see everything (view.sees_everything).
     - If user has custom role == 'staff' -> can view/create, see those they appraised or for their team.
     - Regular users -> can view only appraisals where they are the employee.
     """
@@ -10,7 +10,7 @@ class AppraisalAccessPermission(BasePermission):
         return request.user and request.user.is_authenticated
 
     def has_object_permission(self, request, view, obj):
-        if request.user.is_superuser or request.user.is_staff:
+        if view.sees_everything(request.user):
             return True
         role = getattr(request.user, "role", None)
         if role == "staff":
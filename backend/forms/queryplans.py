@@ -0,0 +1,124 @@
+"""
+select_related / prefetch_related planning from serializers.
+
+A serializer already says which relations it reads: dotted sources such as
+``checked_by.username`` and nested serializers such as
+``session = WaiverSessionSerializer()``. QueryPlan walks those fields once
+per serializer class and turns them into the joins and prefetches that let
+a list page be served in a fixed number of queries:
+
+- to-one relations (forward foreign keys, one-to-ones either way) are
+  joined with select_related;
+- to-many relations (reverse foreign keys, many-to-many) are prefetched,
+  with the relations below them planned into the prefetch queryset.
+
+SerializerMethodFields are opaque to the planner; a method that follows a
+relation has to be served by the view's own queryset.
+"""
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework.relations import RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+@lru_cache(maxsize=None)
+def _relations(model):
+    """Relation fields of ``model`` keyed by the attribute that reads them"""
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        name = field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+        relations[name] = field
+    return relations
+
+
+def _reads_object(field, relation):
+    """Whether serializing ``field`` loads the related object, not just its key"""
+    if isinstance(field, RelatedField) and relation.concrete and not relation.many_to_many:
+        # PrimaryKeyRelatedField reads the local *_id column
+        return not field.use_pk_only_optimization()
+    return True
+
+
+class QueryPlan:
+    """The select_related paths and prefetches needed to serialize ``model``"""
+
+    def __init__(self, model):
+        self.model = model
+        self.select = set()
+        self.prefetch = {}
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        plan = cls(serializer.Meta.model)
+        plan.add_fields(serializer, plan.model, '')
+        return plan
+
+    def add_fields(self, serializer, model, prefix):
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                if isinstance(field, BaseSerializer):
+                    self.add_fields(field, model, prefix)
+                continue
+            self.add_source(field, model, prefix)
+
+    def add_source(self, field, model, prefix):
+        plan = self
+        attrs = field.source_attrs
+        for position, attr in enumerate(attrs):
+            relation = _relations(model).get(attr)
+            if relation is None:
+                return
+            if position == len(attrs) - 1 and not _reads_object(field, relation):
+                return
+
+            path = f'{prefix}{attr}'
+            if relation.one_to_many or relation.many_to_many:
+                plan = plan.prefetch.setdefault(path, QueryPlan(relation.related_model))
+                prefix = ''
+            else:
+                plan.select.add(path)
+                prefix = f'{path}__'
+            model = relation.related_model
+
+        nested = field.child if isinstance(field, ListSerializer) else field
+        if isinstance(nested, BaseSerializer):
+            plan.add_fields(nested, model, prefix)
+
+    @property
+    def query_count(self):
+        """Queries needed for one page: the page itself plus one per prefetch"""
+        return 1 + sum(child.query_count for child in self.prefetch.values())
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        for path, child in sorted(self.prefetch.items()):
+            queryset = queryset.prefetch_related(
+                Prefetch(path, queryset=child.apply(child.model._default_manager.all()))
+            )
+        return queryset
+
+
+@lru_cache(maxsize=None)
+def plan_for(serializer_class):
+    return QueryPlan.for_serializer(serializer_class())
+
+
+class QueryPlanMixin:
+    """
+    Plans select_related / prefetch_related for a view from its serializer.
+    Applied in filter_queryset, so list, retrieve, update and destroy all
+    get it; custom actions that build their own queryset call
+    plan_queryset().
+    """
+
+    def plan_queryset(self, queryset):
+        return plan_for(self.get_serializer_class()).apply(queryset)
+
+    def filter_queryset(self, queryset):
+        return self.plan_queryset(super().filter_queryset(queryset))
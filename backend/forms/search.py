@@ -0,0 +1,119 @@
+"""
+Waiver search index.
+
+Every waiver keeps a lowercase ``search_text`` (full name, participant name
+and participant email). Searches are answered from an index on it:
+
+- SQLite: an FTS5 trigram table, forms_waiver_search, kept in sync with
+  forms_waiver by triggers.
+- PostgreSQL: a pg_trgm GIN index on forms_waiver.search_text.
+
+Anything else (or queries too short for trigrams) falls back to a LIKE on
+search_text, which still avoids the join to WaiverSession.
+
+SQLite drops a table's triggers when a migration rebuilds it, so run
+``rebuild_waiver_search`` after any migration that alters forms_waiver.
+"""
+from django.db import DatabaseError, transaction
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'forms_waiver_search'
+TRIGRAM_INDEX = 'forms_waiver_search_trgm'
+MIN_TRIGRAM_LENGTH = 3
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+    f"USING fts5(waiver_id UNINDEXED, search_text, tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON forms_waiver BEGIN
+        INSERT INTO {SEARCH_TABLE} (waiver_id, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF search_text ON forms_waiver BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE waiver_id = old.id;
+        INSERT INTO {SEARCH_TABLE} (waiver_id, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON forms_waiver BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE waiver_id = old.id;
+    END""",
+]
+SQLITE_POPULATE = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"INSERT INTO {SEARCH_TABLE} (waiver_id, search_text) SELECT id, search_text FROM forms_waiver",
+]
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON forms_waiver USING gin (search_text gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL = [
+    f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}",
+]
+
+_fts_available = {}
+
+
+def build_search_text(*values):
+    return "\n".join(normalize_query(value) for value in values if value)
+
+
+def normalize_query(term):
+    return " ".join(term.lower().split())
+
+
+def fts_available(connection):
+    """Whether the SQLite FTS5 table exists on ``connection``"""
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            _fts_available[connection.alias] = SEARCH_TABLE in connection.introspection.table_names(cursor)
+    return _fts_available[connection.alias]
+
+
+def install(connection, populate=True):
+    """
+    Create (or re-create) the search index for ``connection``'s backend.
+    Returns False when the backend has no index support (e.g. SQLite built
+    without FTS5, or pg_trgm not installable); search then uses LIKE.
+    """
+    _fts_available.pop(connection.alias, None)
+    if connection.vendor == 'sqlite':
+        statements = SQLITE_INSTALL + (SQLITE_POPULATE if populate else [])
+    elif connection.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    else:
+        return False
+
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    except DatabaseError:
+        return False
+    return True
+
+
+def uninstall(connection):
+    _fts_available.pop(connection.alias, None)
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_waivers(queryset, term, connection):
+    """Filter a Waiver queryset to waivers whose search text contains ``term``"""
+    term = normalize_query(term)
+    if not term:
+        return queryset
+    if len(term) >= MIN_TRIGRAM_LENGTH and fts_available(connection):
+        phrase = '"%s"' % term.replace('"', '""')
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT waiver_id FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [phrase]
+        ))
+    return queryset.filter(search_text__contains=term)
@@ -2,6 +2,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.hashers import make_password
+from .metrics import SerializationTimingMixin
 from .models import *
 
 User = get_user_model()
@@ -10,7 +11,7 @@ User = get_user_model()
 # User & Authentication
 # -----------------------
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     """
     User serializer for user management
     """
@@ -52,7 +53,7 @@ class UserSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class AuthSerializer(serializers.Serializer):
+class AuthSerializer(SerializationTimingMixin, serializers.Serializer):
     """
     Authentication serializer for login
     Validates credentials and returns user object
@@ -78,7 +79,7 @@ class AuthSerializer(serializers.Serializer):
 # Daily Stats
 # -----------------------
 
-class DailyStatsSerializer(serializers.ModelSerializer):
+class DailyStatsSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     recorded_by_name = serializers.CharField(source='recorded_by.username', read_only=True)
     
     class Meta:
@@ -106,7 +107,7 @@ class DailyStatsSerializer(serializers.ModelSerializer):
 # Safety Check
 # -----------------------
 
-class RemedialActionSerializer(serializers.ModelSerializer):
+class RemedialActionSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     reported_by_name = serializers.CharField(source='reported_by.get_full_name', read_only=True)
     assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
     completed_by_name = serializers.CharField(source='completed_by.get_full_name', read_only=True)
@@ -120,11 +121,12 @@ class RemedialActionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
 
-class DailyInspectionSerializer(serializers.ModelSerializer):
+class DailyInspectionSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     remedial_actions = RemedialActionSerializer(many=True, read_only=True)
     checked_by_name = serializers.CharField(source='checked_by.get_full_name', read_only=True)
     signed_off_by_name = serializers.CharField(source='signed_off_by.get_full_name', read_only=True)
     overall_pass = serializers.BooleanField(read_only=True)
+    overall_status = serializers.CharField(read_only=True)
     failed_items_count = serializers.IntegerField(read_only=True)
     remedial_items_count = serializers.IntegerField(read_only=True)
     failed_items = serializers.JSONField(source='get_failed_items', read_only=True)
@@ -143,7 +145,7 @@ class DailyInspectionSerializer(serializers.ModelSerializer):
             'first_aid_box', 'signage', 'area_cleanliness', 'gates_locks', 'trip_hazards',
             'staff_availability', 'checked_by', 'checked_by_name', 'signed_off_by', 
             'signed_off_by_name', 'created_at', 'updated_at', 'overall_pass',
-            'failed_items_count', 'remedial_items_count', 'failed_items',
+            'overall_status', 'failed_items_count', 'remedial_items_count', 'failed_items',
             'remedial_actions', 'remedial_notes'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
@@ -180,30 +182,8 @@ class DailyInspectionSerializer(serializers.ModelSerializer):
             # Clear existing remedial actions for this inspection
             inspection.remedial_actions.all().delete()
         
-        # Mapping of field names to inspection codes
-        field_to_code = {
-            'framework_stability': 'INS001',
-            'perimeter_netting': 'INS002',
-            'wall_padding': 'INS003',
-            'walkway_padding': 'INS004',
-            'coverall_pads': 'INS005',
-            'trampoline_beds': 'INS006',
-            'safety_netting': 'INS007',
-            'trampoline_springs': 'INS008',
-            'fire_doors': 'INS009',
-            'fire_equipment': 'INS010',
-            'electrical_cables': 'INS011',
-            'electrical_sockets': 'INS012',
-            'first_aid_box': 'INS013',
-            'signage': 'INS014',
-            'area_cleanliness': 'INS015',
-            'gates_locks': 'INS016',
-            'trip_hazards': 'INS017',
-            'staff_availability': 'INS018',
-        }
-        
         # Create remedial actions for items that failed or need remedial work
-        for field_name, inspection_code in field_to_code.items():
+        for field_name, inspection_code in DailyInspection.INSPECTION_ITEMS.items():
             field_value = getattr(inspection, field_name)
             
             if field_value in ['fail', 'remedial'] and inspection_code in remedial_notes:
@@ -218,7 +198,7 @@ class DailyInspectionSerializer(serializers.ModelSerializer):
                         reported_by=inspection.checked_by
                     )
 
-class SafetyCheckSerializer(serializers.ModelSerializer):
+class SafetyCheckSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     """Safety Check serializer for trampoline inspections
     """
     checked_by_name = serializers.CharField(source='checked_by.username', read_only=True)
@@ -243,7 +223,7 @@ class SafetyCheckSerializer(serializers.ModelSerializer):
 # Incident Report
 # -----------------------
 
-class IncidentReportSerializer(serializers.ModelSerializer):
+class IncidentReportSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     reported_by_name = serializers.CharField(source='reported_by.username', read_only=True)
     age = serializers.SerializerMethodField()
     
@@ -278,7 +258,7 @@ class IncidentReportSerializer(serializers.ModelSerializer):
 # Staff Shift
 # -----------------------
 
-class StaffShiftSerializer(serializers.ModelSerializer):
+class StaffShiftSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     staff_member_name = serializers.CharField(source='staff_member.username', read_only=True)
     duration = serializers.SerializerMethodField()
     
@@ -314,7 +294,7 @@ class StaffShiftSerializer(serializers.ModelSerializer):
 # Cleaning & Maintenance
 # -----------------------
 
-class CleaningLogSerializer(serializers.ModelSerializer):
+class CleaningLogSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     cleaned_by_name = serializers.CharField(source='cleaned_by.username', read_only=True)
     area_display = serializers.CharField(source='get_area_display', read_only=True)
     
@@ -327,7 +307,7 @@ class CleaningLogSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'cleaned_by', 'cleaned_by_name', 'area_display', 'created_at']
 
 
-class MaintenanceLogSerializer(serializers.ModelSerializer):
+class MaintenanceLogSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     performed_by_name = serializers.CharField(source='performed_by.username', read_only=True)
     maintenance_type_display = serializers.CharField(source='get_maintenance_type_display', read_only=True)
     
@@ -346,51 +326,52 @@ class MaintenanceLogSerializer(serializers.ModelSerializer):
         return value
 
 # -----------------------
-# Cafe Checklist
+# Checklists (cafe, marshal, ...)
 # -----------------------
 
-class CafeChecklistSerializer(serializers.ModelSerializer):
-    created_by_name = serializers.CharField(source='created_by.username', read_only=True)
-    updated_by_name = serializers.CharField(source='updated_by.username', read_only=True)
+class ChecklistItemSerializer(SerializationTimingMixin, serializers.Serializer):
+    """
+    One item of a day's checklist, served by the checklist engine
+    Keeps the field layout of the old per-item checklist rows
+    """
+    id = serializers.IntegerField(read_only=True)
+    date = serializers.DateField()
+    checklist_type = serializers.CharField(max_length=50)
     checklist_type_display = serializers.CharField(source='get_checklist_type_display', read_only=True)
-    
-    class Meta:
-        model = CafeChecklist
-        fields = [
-            'id', 'date', 'checklist_type', 'checklist_type_display', 'item_id',
-            'item_name', 'completed', 'created_by', 'created_by_name',
-            'updated_by', 'updated_by_name', 'created_at', 'updated_at'
-        ]
-        read_only_fields = [
-            'id', 'created_by', 'updated_by', 'created_by_name', 
-            'updated_by_name', 'checklist_type_display', 'created_at', 'updated_at'
-        ]
-
-# -----------------------
-# Marshal Checklist
-# -----------------------
-class MarshalChecklistSerializer(serializers.ModelSerializer):
+    item_id = serializers.CharField(max_length=100)
+    item_name = serializers.CharField(max_length=255)
+    completed = serializers.BooleanField(required=False)
+    created_by = serializers.IntegerField(source='created_by_id', read_only=True)
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    updated_by = serializers.IntegerField(source='updated_by_id', read_only=True)
     updated_by_name = serializers.CharField(source='updated_by.username', read_only=True)
-    checklist_type_display = serializers.CharField(source='get_checklist_type_display', read_only=True)
-    
-    class Meta:
-        model = MarshalChecklist
-        fields = [
-            'id', 'date', 'checklist_type', 'checklist_type_display', 'item_id',
-            'item_name', 'completed', 'created_by', 'created_by_name',
-            'updated_by', 'updated_by_name', 'created_at', 'updated_at'
-        ]
-        read_only_fields = [
-            'id', 'created_by', 'updated_by', 'created_by_name', 
-            'updated_by_name', 'checklist_type_display', 'created_at', 'updated_at'
-        ]
+    created_at = serializers.DateTimeField(read_only=True)
+    updated_at = serializers.DateTimeField(read_only=True)
+
+    def validate_checklist_type(self, value):
+        area = self.context.get('area')
+        if area and value not in dict(ChecklistTemplateItem.CHECKLIST_TYPES[area]):
+            raise serializers.ValidationError(f'"{value}" is not a valid choice.')
+        return value
+
+    def validate(self, attrs):
+        # An item belongs to one day's checklist; moving it is not supported,
+        # so an update may repeat these fields but not change them
+        if self.instance is not None:
+            errors = {
+                field: 'Cannot be changed on an existing item.'
+                for field in ('date', 'checklist_type', 'item_id')
+                if field in attrs and attrs[field] != getattr(self.instance, field)
+            }
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
 
 # -----------------------
 # Staff Appraisal
 # -----------------------
 
-class StaffAppraisalSerializer(serializers.ModelSerializer):
+class StaffAppraisalSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     employee_name = serializers.CharField(source='employee.username', read_only=True)
     appraiser_name = serializers.CharField(source='appraiser.username', read_only=True)
     average_rating = serializers.SerializerMethodField()
@@ -419,7 +400,7 @@ class StaffAppraisalSerializer(serializers.ModelSerializer):
 # Customer Satisfaction
 # -----------------------
 
-class CustomerSatisfactionSurveySerializer(serializers.ModelSerializer):
+class CustomerSatisfactionSurveySerializer(SerializationTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomerSatisfactionSurvey
         fields = [
@@ -433,7 +414,7 @@ class CustomerSatisfactionSurveySerializer(serializers.ModelSerializer):
 # Business Target
 # -----------------------
 
-class BusinessTargetSerializer(serializers.ModelSerializer):
+class BusinessTargetSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     target_type_display = serializers.CharField(source='get_target_type_display', read_only=True)
     
     class Meta:
@@ -444,7 +425,7 @@ class BusinessTargetSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'target_type_display', 'created_at']
 
-class WaiverSessionSerializer(serializers.ModelSerializer):
+class WaiverSessionSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     staff_name = serializers.CharField(source='staff.get_full_name', read_only=True)
     waiver_link = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
@@ -468,12 +449,12 @@ class WaiverSessionSerializer(serializers.ModelSerializer):
             return "Expired"
         return "Pending"
 
-class WaiverSessionCreateSerializer(serializers.ModelSerializer):
+class WaiverSessionCreateSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = WaiverSession
         fields = ['participant_email', 'participant_name']
 
-class WaiverSignSerializer(serializers.Serializer):
+class WaiverSignSerializer(SerializationTimingMixin, serializers.Serializer):
     full_name = serializers.CharField(max_length=255)
     signature = serializers.CharField()
 
@@ -482,15 +463,22 @@ class WaiverSignSerializer(serializers.Serializer):
             raise serializers.ValidationError("Full name must be at least 2 characters long.")
         return value.strip()
 
-class WaiverSerializer(serializers.ModelSerializer):
+    def validate_signature(self, value):
+        try:
+            WaiverSignature.parse_data_url(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+class WaiverSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     session = WaiverSessionSerializer(read_only=True)
     pdf_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Waiver
-        fields = ['id', 'session', 'full_name', 'pdf_file', 'pdf_url', 
+        fields = ['id', 'session', 'full_name', 'pdf_file', 'pdf_status', 'pdf_url',
                  'ip_address', 'signed_at']
-        read_only_fields = ['id', 'session', 'pdf_file', 'ip_address', 'signed_at']
+        read_only_fields = ['id', 'session', 'pdf_file', 'pdf_status', 'ip_address', 'signed_at']
 
     def get_pdf_url(self, obj):
         if obj.pdf_file:
@@ -0,0 +1,72 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import token_cache
+from .dashboards import DashboardSnapshot
+from .models import DailyStats, MonthlyStatsRollup, User
+from .versions import VERSIONED_MODELS, bump
+
+
+# The rollup receivers are connected first: receivers run in the order
+# they were connected, and the snapshot must not be invalidated (and
+# rebuilt) before the month's rollup is up to date.
+
+def _stats_date(value):
+    """A DailyStats date as stored; the attribute may still hold the string or datetime it was given"""
+    return DailyStats._meta.get_field('date').to_python(value)
+
+
+def _stats_months(instance):
+    months = set()
+    for stats_date in (_stats_date(instance.date), getattr(instance, '_loaded_date', None)):
+        if stats_date:
+            months.add((stats_date.year, stats_date.month))
+    return months
+
+
+@receiver(post_save, sender=DailyStats, dispatch_uid='monthly_rollup_save')
+def refresh_monthly_rollup_on_save(sender, instance, **kwargs):
+    """Refresh the rollup of the saved day's month (and its previous month if the date moved)"""
+    for year, month in _stats_months(instance):
+        MonthlyStatsRollup.refresh_month(year, month)
+    instance._loaded_date = _stats_date(instance.date)
+
+
+@receiver(post_delete, sender=DailyStats, dispatch_uid='monthly_rollup_delete')
+def refresh_monthly_rollup_on_delete(sender, instance, **kwargs):
+    for year, month in _stats_months(instance):
+        MonthlyStatsRollup.refresh_month(year, month)
+
+
+def invalidate_dashboard_snapshot(sender, **kwargs):
+    """
+    Drop today's dashboard snapshot whenever one of its source models
+    changes, once the write has committed: a snapshot rebuilt before then
+    would cache data other requests cannot see yet, or that is rolled back
+    """
+    transaction.on_commit(DashboardSnapshot.invalidate)
+
+
+for model in DashboardSnapshot.SNAPSHOT_MODELS:
+    post_save.connect(invalidate_dashboard_snapshot, sender=model, dispatch_uid=f'dashboard_snapshot_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_snapshot, sender=model, dispatch_uid=f'dashboard_snapshot_delete_{model.__name__}')
+
+
+def bump_change_version(sender, **kwargs):
+    """Give conditional GETs on endpoints that read ``sender`` a new ETag"""
+    bump(sender)
+
+
+for label in VERSIONED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(bump_change_version, sender=model, dispatch_uid=f'change_version_save_{model.__name__}')
+    post_delete.connect(bump_change_version, sender=model, dispatch_uid=f'change_version_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=User, dispatch_uid='token_cache_user_save')
+@receiver(post_delete, sender=User, dispatch_uid='token_cache_user_delete')
+def forget_cached_user_tokens(sender, instance, **kwargs):
+    """A role change or deactivation must not be served from the token cache"""
+    token_cache.forget_user(instance.pk)
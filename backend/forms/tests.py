@@ -1,3 +1,405 @@
+from datetime import date, time
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .checklists import ITEM_PK_STRIDE, MAX_TEMPLATE_PK, ChecklistEngine, item_pk, split_item_pk
+from .dashboards import DashboardSnapshot
+from .metrics import registry as metrics_registry
+from .models import (
+    Checklist, ChecklistTemplateItem, CleaningLog, DailyInspection, DailyStats, IncidentReport, MaintenanceLog,
+    MonthlyStatsRollup, RemedialAction, SafetyCheck, StaffAppraisal, StaffShift, User, Waiver, WaiverSession,
+)
+from .throttling import login_limiter
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient(HTTP_HOST='localhost')
+        self.addCleanup(login_limiter.clear)
+        # The dashboard cache is shared with other processes by default
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        self.addCleanup(caches[settings.DASHBOARD_CACHE_ALIAS].clear)
+
+    def login_as(self, role, username=None):
+        user = User.objects.create_user(username=username or role, password='test-password', role=role)
+        self.client.force_authenticate(user)
+        return user
+
+
+# ---------------- Authentication ----------------
+
+class LoginTests(APITestCase):
+    def test_non_object_body_is_rejected(self):
+        response = self.client.post('/api/auth/login/', [1, 2], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class RevokeTokensTests(APITestCase):
+    def test_non_object_body_is_rejected(self):
+        self.login_as('owner')
+        for body in ([1, 2], 3):
+            response = self.client.post('/api/auth/revoke/', body, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+# ---------------- Checklist writes ----------------
+
+class ChecklistWriteQueryTests(APITestCase):
+    """Batch writes cost the same number of queries whatever the batch size"""
+
+    def setUp(self):
+        super().setUp()
+        self.login_as('cafe')
+
+    def batch(self, date, count, prefix):
+        return {'items': [
+            {'date': date, 'checklist_type': 'opening', 'item_id': f'{prefix}_{n}', 'item_name': f'Item {n}'}
+            for n in range(count)
+        ]}
+
+    def create_batch(self, date, count, prefix='item'):
+        batch = self.batch(date, count, prefix)
+        response = self.client.post('/api/cafe-checklists/create_checklist_batch/', batch, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), count)
+        return response.data
+
+    def test_batch_with_new_items_and_day(self):
+        # templates, their insert, templates again, the day, its insert, the
+        # day again, one UPDATE and the users in its state, in a transaction
+        for date, count, prefix in (('2026-01-01', 5, 'small'), ('2026-01-02', 40, 'large')):
+            with self.assertNumQueries(10):
+                self.create_batch(date, count, prefix)
+
+    def test_batch_on_a_new_day(self):
+        self.create_batch('2026-01-01', 40)
+        for date, count in (('2026-01-02', 5), ('2026-01-03', 40)):
+            with self.assertNumQueries(8):
+                self.create_batch(date, count)
+
+    def test_batch_touching_existing_items(self):
+        self.create_batch('2026-01-01', 40)
+        for count in (5, 40):
+            with self.assertNumQueries(6):
+                self.create_batch('2026-01-01', count)
+
+    def test_batch_toggle(self):
+        ids = [item['id'] for item in self.create_batch('2026-01-01', 40)]
+        for count in (2, 40):
+            # the checklists, their templates, the users in their state and
+            # one UPDATE, in a transaction
+            with self.assertNumQueries(6):
+                response = self.client.post('/api/cafe-checklists/batch_toggle/', {'item_ids': ids[:count]}, format='json')
+            self.assertEqual(len(response.data), count)
+
+    def test_batch_rejects_another_areas_checklist_type(self):
+        batch = self.batch('2026-01-01', 2, 'item')
+        batch['items'][1]['checklist_type'] = 'pre_shift'
+        response = self.client.post('/api/cafe-checklists/create_checklist_batch/', batch, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('checklist_type', response.data)
+        self.assertFalse(Checklist.objects.exists())
+
+    def test_batch_rejects_template_ids_that_do_not_fit_item_ids(self):
+        ChecklistTemplateItem.objects.create(
+            pk=MAX_TEMPLATE_PK, area='cafe', checklist_type='opening', item_id='last_0', item_name='Last'
+        )
+        self.assertEqual(len(self.create_batch('2026-01-01', 1, 'last')), 1)
+
+        response = self.client.post(
+            '/api/cafe-checklists/create_checklist_batch/', self.batch('2026-01-01', 1, 'overflow'), format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChecklistTemplateItem.objects.filter(item_id='overflow_0').exists())
+
+    def test_item_ids_split_back_into_their_parts(self):
+        self.assertEqual(split_item_pk(item_pk(7, MAX_TEMPLATE_PK)), (7, MAX_TEMPLATE_PK))
+        for malformed in (7 * ITEM_PK_STRIDE, MAX_TEMPLATE_PK, 0, -1, 'x'):
+            self.assertIsNone(split_item_pk(malformed))
+        with self.assertRaises(ValueError):
+            item_pk(7, ITEM_PK_STRIDE)
+
+    def test_batch_toggle_skips_items_out_of_scope(self):
+        ids = [item['id'] for item in self.create_batch('2026-01-01', 3)]
+        self.login_as('cafe', username='other')
+        response = self.client.post('/api/cafe-checklists/batch_toggle/', {'item_ids': ids}, format='json')
+        self.assertEqual(response.data, [])
+
+
+class ChecklistUpdateTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_as('owner')
+        response = self.client.post('/api/cafe-checklists/', {
+            'date': '2026-01-01', 'checklist_type': 'opening', 'item_id': 'lights', 'item_name': 'Lights',
+        }, format='json')
+        self.item = response.data
+
+    def put(self, **changes):
+        fields = ('date', 'checklist_type', 'item_id', 'item_name', 'completed')
+        data = {**{field: self.item[field] for field in fields}, **changes}
+        return self.client.put(f"/api/cafe-checklists/{self.item['id']}/", data, format='json')
+
+    def test_update_changes_completed_and_name(self):
+        response = self.put(completed=True, item_name='All lights')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['completed'], response.data['item_name']), (True, 'All lights'))
+
+    def test_update_cannot_move_the_item(self):
+        for field, value in (('date', '2026-01-02'), ('checklist_type', 'closing'), ('item_id', 'doors')):
+            response = self.put(**{field: value})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+        response = self.client.get(f"/api/cafe-checklists/{self.item['id']}/")
+        self.assertEqual(response.data, self.item)
+
+
+# ---------------- List pages ----------------
+
+class ListQueryTests(APITestCase):
+    """
+    Every list page takes a fixed number of queries: a COUNT, the page and
+    one per prefetched relation. The rows belong to different users, so a
+    relation the query plan misses shows up as extra queries.
+    """
+    ROWS = 3
+
+    def setUp(self):
+        super().setUp()
+        self.owner = self.login_as('owner')
+        self.staff = [
+            User.objects.create_user(username=f'member{n}', password='test-password', role='reception')
+            for n in range(self.ROWS)
+        ]
+
+    def assertListQueries(self, path, num):
+        with self.assertNumQueries(num):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_daily_inspections(self):
+        for member in self.staff:
+            inspection = DailyInspection.objects.create(
+                inspector_initials='AB', manager_initials='CD', checked_by=member, signed_off_by=self.owner
+            )
+            RemedialAction.objects.create(
+                inspection=inspection, inspection_code='INS001', issue_description='Loose pad',
+                remedial_action='Refit', reported_by=member, assigned_to=self.owner,
+            )
+        self.assertListQueries('/api/daily-inspections/', 3)
+
+    def test_remedial_actions(self):
+        inspection = DailyInspection.objects.create(
+            inspector_initials='AB', manager_initials='CD', checked_by=self.owner
+        )
+        for member in self.staff:
+            RemedialAction.objects.create(
+                inspection=inspection, inspection_code='INS001', issue_description='Loose pad',
+                remedial_action='Refit', reported_by=member, assigned_to=member, completed_by=self.owner,
+            )
+        self.assertListQueries('/api/remedial-actions/', 2)
+
+    def test_safety_checks(self):
+        for member in self.staff:
+            SafetyCheck.objects.create(trampoline_id='T1', checked_by=member)
+        self.assertListQueries('/api/safety-checks/', 2)
+
+    def test_incidents(self):
+        for member in self.staff:
+            IncidentReport.objects.create(
+                first_name='Sam', surname='Smith', date_of_accident=timezone.now().date(),
+                time_of_accident=time(14), location='Main court', how_occurred='Fell', reported_by=member,
+            )
+        self.assertListQueries('/api/incidents/', 2)
+
+    def test_shifts(self):
+        for member in self.staff:
+            StaffShift.objects.create(staff_member=member, start_time=time(9), role_during_shift='Marshal')
+        self.assertListQueries('/api/shifts/', 2)
+
+    def test_cleaning(self):
+        for member in self.staff:
+            CleaningLog.objects.create(area='cafe', cleaned_by=member)
+        self.assertListQueries('/api/cleaning/', 2)
+        self.assertListQueries('/api/cleaning/?pagination=cursor', 1)
+
+    def test_maintenance(self):
+        for member in self.staff:
+            MaintenanceLog.objects.create(
+                equipment_id='T1', maintenance_type='routine', description='Springs', performed_by=member
+            )
+        self.assertListQueries('/api/maintenance/', 2)
+
+    def test_daily_stats(self):
+        for day, member in enumerate(self.staff, start=1):
+            DailyStats.objects.create(date=date(2026, 1, day), recorded_by=member)
+        self.assertListQueries('/api/daily-stats/', 2)
+
+    def test_appraisals(self):
+        ratings = {
+            f'{area}_rating': 4
+            for area in ('attendance', 'quality', 'teamwork', 'initiative', 'customer_service', 'adherence')
+        }
+        for member in self.staff:
+            StaffAppraisal.objects.create(
+                employee=member, appraiser=self.owner, date_of_appraisal=date(2026, 1, 1), **ratings
+            )
+        self.assertListQueries('/api/appraisals/', 2)
+
+    def test_checklists(self):
+        engine = ChecklistEngine('cafe')
+        for day, member in enumerate(self.staff, start=1):
+            engine.upsert_items([{
+                'date': date(2026, 1, day), 'checklist_type': 'opening', 'item_id': 'lights', 'item_name': 'Lights',
+            }], member)
+        # the change versions for the ETag, the COUNT, the page's checklists,
+        # their templates and the users in their state
+        self.assertListQueries('/api/cafe-checklists/', 5)
+
+    def test_waivers(self):
+        # Waivers stay with the staff member who ran the session
+        for _ in range(self.ROWS):
+            session = WaiverSession.objects.create(staff=self.owner, participant_name='Sam Smith')
+            Waiver.objects.create(session=session, full_name='Sam Smith')
+        self.assertListQueries('/api/api/waiver-sessions/', 2)
+        self.assertListQueries('/api/api/waivers/', 2)
+        self.assertListQueries('/api/api/waivers/?pagination=cursor', 1)
+
+
+# ---------------- Monthly rollups ----------------
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='test-password', role='owner')
+
+    def test_string_dates_are_rolled_up(self):
+        stats = DailyStats.objects.create(date='2026-10-01', visitor_count=40, recorded_by=self.user)
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 10).visitor_count, 40)
+
+        stats.date = '2026-11-01'
+        stats.save()
+        self.assertIsNone(MonthlyStatsRollup.for_month(2026, 10).pk)
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 11).visitor_count, 40)
+
+    def test_bulk_writes_are_rolled_up(self):
+        DailyStats.objects.bulk_create([
+            DailyStats(date=date(2026, 10, day), visitor_count=10, recorded_by=self.user) for day in (1, 2)
+        ])
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 10).visitor_count, 20)
+
+        DailyStats.objects.filter(date__day=1).update(visitor_count=30)
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 10).visitor_count, 40)
+
+        DailyStats.objects.filter(date__day=2).update(date=date(2026, 11, 2))
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 10).visitor_count, 30)
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 11).visitor_count, 10)
+
+        stats = list(DailyStats.objects.all())
+        for row in stats:
+            row.date = row.date.replace(month=12)
+        DailyStats.objects.bulk_update(stats, ['date'])
+        self.assertIsNone(MonthlyStatsRollup.for_month(2026, 10).pk)
+        self.assertIsNone(MonthlyStatsRollup.for_month(2026, 11).pk)
+        self.assertEqual(MonthlyStatsRollup.for_month(2026, 12).visitor_count, 40)
+
+
+class DashboardSnapshotTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.login_as('owner')
+
+    def test_snapshot_is_invalidated_on_commit(self):
+        self.client.get('/api/dashboard/')
+        snapshot = DashboardSnapshot()
+        cached = snapshot.cache().get(snapshot.key(snapshot.day))
+        self.assertIsNotNone(cached)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyStats.objects.create(date=snapshot.day, visitor_count=25, recorded_by=self.owner)
+            # Not before the write commits, or a concurrent poll would cache uncommitted data
+            self.assertEqual(snapshot.cache().get(snapshot.key(snapshot.day)), cached)
+        self.assertIsNone(snapshot.cache().get(snapshot.key(snapshot.day)))
+        self.assertEqual(self.client.get('/api/dashboard/').data['todayVisitors'], 25)
+
+    def test_etags_do_not_depend_on_the_cache(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        # Another worker, or a restarted one, with nothing cached
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        self.assertEqual(self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StaffShift.objects.create(staff_member=self.owner, start_time=time(9), role_during_shift='Marshal')
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        self.assertEqual(self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_rebuilding_rollups_refreshes_the_overview(self):
+        DailyStats.objects.create(date=timezone.now().date(), total_revenue=120, recorded_by=self.owner)
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['monthlyRevenue'], 120)
+
+        # A rollup that drifted from its DailyStats, e.g. after a raw SQL fix
+        MonthlyStatsRollup.objects.update(total_revenue=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_monthly_rollups', stdout=StringIO())
+
+        rebuilt = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(rebuilt.status_code, 200)
+        self.assertEqual(rebuilt.data['monthlyRevenue'], 120)
+        self.assertNotEqual(rebuilt['ETag'], response['ETag'])
+
+
+class DashboardDataTests(APITestCase):
+    def test_recent_incidents_are_listed(self):
+        owner = self.login_as('owner')
+        IncidentReport.objects.create(
+            first_name='Sam', surname='Smith', date_of_accident=timezone.now().date(), time_of_accident=time(14),
+            location='Main court', how_occurred='Fell', reported_by=owner,
+        )
+        response = self.client.get('/api/dashboard/data/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['recent_incidents'], 1)
+        self.assertEqual(
+            [activity['message'] for activity in response.data['recent_activity']],
+            ['Incident reported at Main court'],
+        )
+
+
+# ---------------- Metrics ----------------
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.login_as('owner')
+        metrics_registry.reset()
+        self.addCleanup(metrics_registry.reset)
+
+    def test_serialization_is_timed_apart_from_rendering(self):
+        for day in range(1, 21):
+            DailyStats.objects.create(date=date(2026, 1, day), recorded_by=self.owner)
+        self.client.get('/api/daily-stats/')
+
+        endpoint = self.client.get('/api/metrics/').data['endpoints']['dailystats-list']
+        self.assertEqual(endpoint['count'], 1)
+        self.assertGreater(endpoint['serialize_ms'], 0)
+        self.assertGreater(endpoint['render_ms'], 0)
+
+        prometheus = self.client.get('/api/metrics/?format=prometheus').content.decode()
+        self.assertIn('jumpnjoy_serialize_duration_seconds_total{view="dailystats-list"}', prometheus)
+
+
+# ---------------- Query plans ----------------
 
-# Create your tests here.
+class QueryPlanTests(TestCase):
+    def test_endpoint_queries_use_indexes(self):
+        # check_query_plans raises CommandError listing any query that scans
+        # a table or sorts without an index
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('use indexes', out.getvalue())
@@ -0,0 +1,83 @@
+"""
+In-process login rate limiting.
+
+Failed logins are counted per (username, client address) over a sliding
+window of LOGIN_RATE_LIMIT_WINDOW seconds. Once a key reaches
+LOGIN_RATE_LIMIT_FAILURES, login_view answers 429 with Retry-After before
+the password is hashed, so guessing costs the server next to nothing. A
+successful login clears the key; other staff on the same address, and the
+same user elsewhere, are unaffected.
+
+Like the token cache, the counts live in process memory: each gunicorn
+worker limits on its own, so the effective limit is the setting times the
+number of workers. The address comes from DRF's get_ident, which honours
+the NUM_PROXIES setting behind a proxy.
+"""
+import threading
+from collections import OrderedDict, deque
+from time import monotonic
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+
+class LoginRateLimiter:
+    """Thread-safe sliding-window failure counts, keeping at most max_keys keys"""
+
+    def __init__(self, max_failures, window, max_keys=10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.failures = OrderedDict()
+
+    @staticmethod
+    def key(request):
+        # Runs before the serializer validates the body, which may be a list
+        username = request.data.get('username', '') if isinstance(request.data, dict) else ''
+        return (str(username).casefold(), BaseThrottle().get_ident(request))
+
+    def _recent(self, key, now):
+        attempts = self.failures.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if not attempts:
+            del self.failures[key]
+            return None
+        return attempts
+
+    def retry_after(self, key):
+        """Seconds until key may try again, or None if it is not limited"""
+        now = monotonic()
+        with self.lock:
+            attempts = self._recent(key, now)
+            if attempts is None or len(attempts) < self.max_failures:
+                return None
+            return attempts[-self.max_failures] + self.window - now
+
+    def failed(self, key):
+        now = monotonic()
+        with self.lock:
+            attempts = self._recent(key, now)
+            if attempts is None:
+                attempts = self.failures[key] = deque(maxlen=self.max_failures)
+            attempts.append(now)
+            self.failures.move_to_end(key)
+            while len(self.failures) > self.max_keys:
+                self.failures.popitem(last=False)
+
+    def succeeded(self, key):
+        with self.lock:
+            self.failures.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.failures.clear()
+
+
+login_limiter = LoginRateLimiter(
+    getattr(settings, 'LOGIN_RATE_LIMIT_FAILURES', 5),
+    getattr(settings, 'LOGIN_RATE_LIMIT_WINDOW', 300),
+)
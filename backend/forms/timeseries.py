@@ -0,0 +1,131 @@
+"""
+Time-series aggregation over the log models.
+Bucketing is done by the database with Trunc* annotations so a year of
+history comes back as one row per bucket rather than one model per record.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import CleaningLog, DailyStats, IncidentReport, MaintenanceLog
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+SERIES = {
+    'daily-stats': {
+        'model': DailyStats,
+        'date_field': 'date',
+        'metrics': {
+            'visitors': Sum('visitor_count'),
+            'cafe_sales': Sum('cafe_sales'),
+            'revenue': Sum('total_revenue'),
+            'days_recorded': Count('id'),
+        },
+    },
+    'cleaning': {
+        'model': CleaningLog,
+        'date_field': 'date',
+        'metrics': {
+            'count': Count('id'),
+            'completed': Count('id', filter=Q(task_completed=True)),
+        },
+    },
+    'incidents': {
+        'model': IncidentReport,
+        'date_field': 'date_of_accident',
+        'metrics': {
+            'count': Count('id'),
+            'ambulance_called': Count('id', filter=Q(ambulance_called=True)),
+            'riddor_reportable': Count('id', filter=Q(riddor_reportable=True)),
+        },
+    },
+    'maintenance': {
+        'model': MaintenanceLog,
+        'date_field': 'date',
+        'metrics': {
+            'count': Count('id'),
+            'cost': Sum('cost'),
+        },
+    },
+}
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Invalid date format. Use YYYY-MM-DD."})
+
+
+def _range_filter(model, date_field, start, end):
+    """Inclusive date range as a plain >=/< filter so an index on the column can be used"""
+    if isinstance(model._meta.get_field(date_field), models.DateTimeField):
+        tz = timezone.get_current_timezone()
+        lower = timezone.make_aware(datetime.combine(start, time.min), tz)
+        upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    else:
+        lower, upper = start, end + timedelta(days=1)
+    return {f'{date_field}__gte': lower, f'{date_field}__lt': upper}
+
+
+def _serialize(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def build_series(name, start, end, bucket='day'):
+    """Bucketed metrics for one series between start and end (inclusive)"""
+    config = SERIES[name]
+    date_field = config['date_field']
+    rows = config['model'].objects.filter(
+        **_range_filter(config['model'], date_field, start, end)
+    ).annotate(
+        bucket=BUCKETS[bucket](date_field)
+    ).values('bucket').annotate(
+        **config['metrics']
+    ).order_by('bucket')
+
+    return [
+        {key: _serialize(value) if value is not None else 0 for key, value in row.items()}
+        for row in rows
+    ]
+
+
+def timeseries_from_params(params):
+    """Validate query parameters and build every requested series"""
+    today = timezone.now().date()
+    end = _parse_date(params['end'], 'end') if params.get('end') else today
+    start = _parse_date(params['start'], 'start') if params.get('start') else end - timedelta(days=30)
+    if start > end:
+        raise ValidationError({'start': "start must be on or before end."})
+
+    bucket = params.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValidationError({'bucket': f"Choose one of: {', '.join(BUCKETS)}."})
+
+    names = params.get('series')
+    names = names.split(',') if names else list(SERIES)
+    unknown = [name for name in names if name not in SERIES]
+    if unknown:
+        raise ValidationError({'series': f"Unknown series: {', '.join(unknown)}. Choose from: {', '.join(SERIES)}."})
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'bucket': bucket,
+        'series': {name: build_series(name, start, end, bucket) for name in names},
+    }
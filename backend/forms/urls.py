@@ -26,11 +26,13 @@ urlpatterns = [
     path('auth/login/', views.login_view, name='login'),
     path('auth/logout/', views.logout_view, name='logout'),
     path('auth/me/', views.me_view, name='me'),
+    path('auth/revoke/', views.revoke_tokens_view, name='revoke-tokens'),
 
     # Dashboard & Analytics
     path('dashboard/', DashboardViewSet.as_view({'get': 'overview'}), name='dashboard-viewset'),
     path('dashboard/data/', views.dashboard_data, name='dashboard-data'),
     path('analytics/', AnalyticsViewSet.as_view({'get': 'overview'}), name='analytics'),
+    path('analytics/timeseries/', views.timeseries_data, name='analytics-timeseries'),
 
     # Daily Inspection endpoints
     path('daily-inspections/', DailyInspectionListCreateView.as_view(), name='daily-inspection-list'),
@@ -43,10 +45,14 @@ urlpatterns = [
     # Inspection Dashboard endpoint 
     path('inspection-dashboard/', views.inspection_dashboard, name='inspection-dashboard'),
 
+    # Request metrics
+    path('metrics/', views.metrics_view, name='metrics'),
+
     #Waiver endpoints
     path('api/', include(router.urls)),
     path('api/dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
     path('api/waiver/<str:token>/', views.PublicWaiverSignView.as_view(), name='public-waiver-sign'),
+    path('api/waiver/<str:token>/status/', views.PublicWaiverStatusView.as_view(), name='public-waiver-status'),
     
     # Include all router-generated URLs
     path('', include(router.urls)),
@@ -0,0 +1,99 @@
+"""
+Change versions and conditional GET for the polled endpoints.
+
+Every model in VERSIONED_MODELS has a version counter and a last-changed
+time in a ChangeVersion row. post_save/post_delete (forms/signals.py) bump
+them once the writing transaction commits; writes that skip signals --
+bulk_create, bulk_update and QuerySet.update -- call bump() themselves.
+
+conditional() builds the ETag of an endpoint from the versions of the
+models it reads, the day (the dashboards are relative to today) and the
+query string, and Last-Modified from the latest change. A poll whose
+If-None-Match / If-Modified-Since still matches is answered 304 Not
+Modified after one query on the ChangeVersion primary key.
+
+The versions live in the database rather than a cache, so every gunicorn
+worker sees every write and builds the same ETag for the same data.
+"""
+import hashlib
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+VERSIONED_MODELS = (
+    'forms.BusinessTarget', 'forms.Checklist', 'forms.ChecklistTemplateItem',
+    'forms.CustomerSatisfactionSurvey', 'forms.DailyInspection', 'forms.DailyStats',
+    'forms.IncidentReport', 'forms.MaintenanceLog', 'forms.MonthlyStatsRollup',
+    'forms.RemedialAction', 'forms.SafetyCheck', 'forms.StaffAppraisal',
+    'forms.StaffShift', 'forms.User',
+)
+
+
+def _bump(labels):
+    ChangeVersion = apps.get_model('forms.ChangeVersion')
+    changed = ChangeVersion.objects.filter(label__in=labels)
+    now = timezone.now()
+    if changed.update(version=F('version') + 1, modified=now) < len(labels):
+        # First change of some of the models: add their rows, then bump
+        # again. Bumping the others twice is harmless, and unlike inserting
+        # at version 1 it cannot lose a change another worker records.
+        ChangeVersion.objects.bulk_create(
+            [ChangeVersion(label=label, version=0, modified=now) for label in labels],
+            ignore_conflicts=True,
+        )
+        changed.update(version=F('version') + 1, modified=now)
+
+
+def bump(*models):
+    """Record a change to ``models`` when the current transaction commits"""
+    labels = [model._meta.label for model in models]
+    transaction.on_commit(lambda: _bump(labels))
+
+
+def bump_all():
+    bump(*(apps.get_model(label) for label in VERSIONED_MODELS))
+
+
+def current(labels):
+    """(versions, last modified) of ``labels`` in one query; 0 and None until the first change"""
+    rows = apps.get_model('forms.ChangeVersion').objects.filter(label__in=labels)
+    found = {label: (version, modified) for label, version, modified in rows.values_list('label', 'version', 'modified')}
+    versions = [found.get(label, (0, None))[0] for label in labels]
+    modified = max((modified for _, modified in found.values()), default=None)
+    return versions, modified
+
+
+def conditional(*models, per_user=False, allow=None):
+    """
+    ETag/Last-Modified for a view that reads ``models``. Role-scoped views
+    pass per_user=True so each user gets their own ETag; ``allow(user)``
+    limits conditional answers to users the view would serve.
+    Wrap view methods with method_decorator().
+    """
+    labels = [model._meta.label for model in models]
+    unversioned = set(labels) - set(VERSIONED_MODELS)
+    if unversioned:
+        raise ImproperlyConfigured(f"Add {', '.join(sorted(unversioned))} to VERSIONED_MODELS")
+
+    def validators(request):
+        # Both condition() callbacks need them; query the versions once
+        if not hasattr(request, '_change_validators'):
+            if allow is not None and not allow(request.user):
+                request._change_validators = (None, None)
+            else:
+                versions, modified = current(labels)
+                parts = [*map(str, versions), timezone.now().date().isoformat(), request.META.get('QUERY_STRING', '')]
+                if per_user:
+                    parts += [str(request.user.pk), request.user.role]
+                etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+                request._change_validators = (f'"{etag}"', modified)
+        return request._change_validators
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: validators(request)[0],
+        last_modified_func=lambda request, *args, **kwargs: validators(request)[1],
+    )
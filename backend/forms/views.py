@@ -1,25 +1,38 @@
 from rest_framework import viewsets, status, permissions, filters, generics
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, action
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
-from rest_framework.exceptions import ValidationError
-from django.core.files.base import ContentFile
+from rest_framework.exceptions import Throttled, ValidationError
 from django.contrib.auth import login
+from django.db import transaction
+from django.urls import reverse
 from django.db.models import Count, Sum, Q, Avg
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from datetime import timedelta, datetime
 from decimal import Decimal
-import calendar, base64, datetime, io, json
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+import calendar, datetime, json
 from .models import (
     BusinessTarget, CustomerSatisfactionSurvey, User, SafetyCheck, IncidentReport, StaffShift, CleaningLog,
-    MaintenanceLog, DailyStats, StaffAppraisal, CafeChecklist, DailyInspection, RemedialAction, Waiver, WaiverSession
+    MaintenanceLog, DailyStats, StaffAppraisal, DailyInspection, RemedialAction, Waiver, WaiverSession,
+    WaiverSignature, WaiverPdfJob, MonthlyStatsRollup, AuthToken, Checklist, ChecklistTemplateItem
 )
+from .authentication import token_cache
+from .checklists import ChecklistEngine
+from .dashboards import DashboardSnapshot, InspectionDashboard, WaiverStats
+from .exports import ExportMixin
+from .metrics import PrometheusRenderer, registry as metrics_registry
+from .pagination import SelectablePagination
+from .queryplans import QueryPlanMixin
+from .scoping import RoleScopedMixin, owner_id, sees_everything
 from .permissions import AppraisalAccessPermission
+from .throttling import login_limiter
+from .timeseries import timeseries_from_params
+from .versions import conditional
 from .serializers import *
 
 
@@ -39,23 +52,7 @@ class IsOwnerOrStaffReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.role == 'owner':
             return True
-
-        if hasattr(obj, 'checked_by'):
-            return obj.checked_by == request.user
-        elif hasattr(obj, 'reported_by'):
-            return obj.reported_by == request.user
-        elif hasattr(obj, 'staff_member'):
-            return obj.staff_member == request.user
-        elif hasattr(obj, 'cleaned_by'):
-            return obj.cleaned_by == request.user
-        elif hasattr(obj, 'performed_by'):
-            return obj.performed_by == request.user
-        elif hasattr(obj, 'recorded_by'):
-            return obj.recorded_by == request.user
-        elif hasattr(obj, 'updated_by'):
-            return obj.updated_by == request.user
-
-        return False
+        return owner_id(obj) == request.user.id
 
 
 # ---------------- AUTH ----------------
@@ -64,27 +61,67 @@ class IsOwnerOrStaffReadOnly(permissions.BasePermission):
 @permission_classes([permissions.AllowAny])
 def login_view(request):
     """Authenticate and return token + user details"""
+    limit_key = login_limiter.key(request)
+    wait = login_limiter.retry_after(limit_key)
+    if wait is not None:
+        raise Throttled(wait=wait)
+
     serializer = AuthSerializer(data=request.data)
     if serializer.is_valid():
+        login_limiter.succeeded(limit_key)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
+        token = AuthToken.issue(user)
         return Response({
             'token': token.key,
+            'expires_at': token.expires_at,
             'user': UserSerializer(user).data,
             'message': 'Login successful'
         })
+    login_limiter.failed(limit_key)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_view(request):
-    """Destroy auth token"""
-    try:
-        request.user.auth_token.delete()
-        return Response({'message': 'Logged out successfully'})
-    except Exception:
-        return Response({'message': 'Error during logout'}, status=status.HTTP_400_BAD_REQUEST)
+    """Destroy the token this request was authenticated with"""
+    if request.auth is None:
+        return Response({'message': 'Not logged in with a token'}, status=status.HTTP_400_BAD_REQUEST)
+
+    AuthToken.objects.filter(key=request.auth.key).delete()
+    token_cache.forget(request.auth.key)
+    return Response({'message': 'Logged out successfully'})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def revoke_tokens_view(request):
+    """Revoke every token of one user ({"user": id}) or one role ({"role": "marshal"})"""
+    if request.user.role != 'owner':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    if not isinstance(request.data, dict):
+        return Response({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user_id, role = request.data.get('user'), request.data.get('role')
+    if (user_id is None) == (role is None):
+        return Response({'error': 'Give exactly one of user or role'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if user_id is not None:
+        try:
+            users = User.objects.filter(pk=int(user_id))
+        except (TypeError, ValueError):
+            return Response({'error': 'user must be an id'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        if role not in dict(User.ROLE_CHOICES):
+            return Response({'error': f'Unknown role: {role}'}, status=status.HTTP_400_BAD_REQUEST)
+        users = User.objects.filter(role=role)
+
+    # One DELETE ... WHERE user_id IN (SELECT ...); AuthToken has no delete
+    # signals, so Django does not fetch the rows first
+    revoked = AuthToken.objects.filter(user__in=users).delete()[0]
+    token_cache.forget_users(users.values_list('pk', flat=True))
+    return Response({'revoked': revoked})
 
 
 @api_view(['GET'])
@@ -101,53 +138,11 @@ class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=False, methods=['get'])
+    @method_decorator(conditional(*DashboardSnapshot.SNAPSHOT_MODELS))
     def overview(self, request):
-        """Get dashboard overview data"""
-        today = timezone.now().date()
-        this_month = today.month
-        this_year = today.year
-        
-        # Recent incidents (last 30 days)
-        recent_incidents = IncidentReport.objects.filter(
-            date_of_accident__gte=today - timedelta(days=30)
-        ).count()
-        
-        # Today's visitors
-        today_stats = DailyStats.objects.filter(date=today).first()
-        today_visitors = today_stats.visitor_count if today_stats else 0
-        
-        # This month's revenue
-        monthly_revenue = DailyStats.get_monthly_revenue(this_month, this_year)
-        
-        # Safety checks completed today
-        safety_checks_today = SafetyCheck.objects.filter(date=today).count()
-        
-        # Pending maintenance items
-        pending_maintenance = MaintenanceLog.objects.filter(
-            next_maintenance_due__lte=today
-        ).count()
-        
-        # Staff on duty today
-        staff_on_duty = StaffShift.objects.filter(
-            date=today,
-            end_time__isnull=True
-        ).count()
-        
-        # Recent appraisals (this month)
-        recent_appraisals = StaffAppraisal.objects.filter(
-            date_of_appraisal__month=this_month,
-            date_of_appraisal__year=this_year
-        ).count()
-        
-        return Response({
-            'todayVisitors': today_visitors,
-            'monthlyRevenue': float(monthly_revenue),
-            'recentIncidents': recent_incidents,
-            'safetyChecksToday': safety_checks_today,
-            'pendingMaintenance': pending_maintenance,
-            'staffOnDuty': staff_on_duty,
-            'recentAppraisals': recent_appraisals
-        })
+        """Get dashboard overview data from the cached daily snapshot"""
+        data = DashboardSnapshot().get()
+        return Response({**data, 'cacheStats': DashboardSnapshot.stats()})
 
 # ---------------- ANALYTICS ----------------
 class AnalyticsViewSet(viewsets.ViewSet):
@@ -157,31 +152,30 @@ class AnalyticsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=False, methods=['get'])
+    @method_decorator(conditional(MonthlyStatsRollup, CustomerSatisfactionSurvey, BusinessTarget))
     def overview(self, request):
         """Get analytics overview data"""
         today = timezone.now().date()
         this_month = today.month
         this_year = today.year
-        last_month = (today.replace(day=1) - timedelta(days=1)).month
-        last_month_year = (today.replace(day=1) - timedelta(days=1)).year
+
+        # This and last month's totals come from the rollup table in one query
+        current, previous = MonthlyStatsRollup.for_months(
+            (this_year, this_month),
+            MonthlyStatsRollup.previous_month(this_year, this_month)
+        )
         
         # Monthly revenue
-        monthly_revenue = DailyStats.get_monthly_revenue(this_month, this_year)
-        last_monthly_revenue = DailyStats.get_monthly_revenue(last_month, last_month_year)
+        monthly_revenue = current.total_revenue
         
         # Growth rate calculation
-        growth_rate = 0
-        if last_monthly_revenue > 0:
-            growth_rate = ((monthly_revenue - last_monthly_revenue) / last_monthly_revenue) * 100
+        growth_rate = MonthlyStatsRollup.growth_rate(current, previous)
         
         # Monthly visitors
-        monthly_visitors = DailyStats.get_monthly_visitors(this_month, this_year)
+        monthly_visitors = current.visitor_count
         
         # Conversion rate (cafe sales / total visitors)
-        cafe_sales_this_month = DailyStats.objects.filter(
-            date__month=this_month,
-            date__year=this_year
-        ).aggregate(total_cafe_sales=Sum('cafe_sales'))['total_cafe_sales'] or Decimal('0')
+        cafe_sales_this_month = current.cafe_sales
         
         conversion_rate = 0
         if monthly_visitors > 0:
@@ -193,22 +187,12 @@ class AnalyticsViewSet(viewsets.ViewSet):
             date__year=this_year
         ).aggregate(avg_rating=Avg('overall_rating'))['avg_rating'] or 0
         
-        # Peak hours calculation
-        peak_hours_stats = DailyStats.objects.filter(
-            date__month=this_month,
-            date__year=this_year,
-            peak_hour_start__isnull=False,
-            peak_hour_end__isnull=False
-        ).values('peak_hour_start', 'peak_hour_end')
-        
+        # Peak hours of the latest day in the month that recorded them
         peak_hours = "2-6 PM"  # Default
-        if peak_hours_stats:
-            # Get most common peak hours
-            most_common = peak_hours_stats.first()
-            if most_common:
-                start_hour = most_common['peak_hour_start'].strftime('%I %p').lstrip('0')
-                end_hour = most_common['peak_hour_end'].strftime('%I %p').lstrip('0')
-                peak_hours = f"{start_hour}-{end_hour}"
+        if current.peak_hour_start and current.peak_hour_end:
+            start_hour = current.peak_hour_start.strftime('%I %p').lstrip('0')
+            end_hour = current.peak_hour_end.strftime('%I %p').lstrip('0')
+            peak_hours = f"{start_hour}-{end_hour}"
         
         # Target achievement calculation
         revenue_target = BusinessTarget.objects.filter(
@@ -234,22 +218,15 @@ class AnalyticsViewSet(viewsets.ViewSet):
         })
 
 # ---------------- USERS ----------------   
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(RoleScopedMixin, viewsets.ModelViewSet):
     """
     User management ViewSet
+    Staff can only see themselves
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
     
-    def get_queryset(self):
-        """Filter users based on permissions"""
-        if self.request.user.role == 'owner':
-            return User.objects.all()
-        else:
-            # Staff can only see themselves
-            return User.objects.filter(id=self.request.user.id)
-    
     def create(self, request, *args, **kwargs):
         """Create new user (owners only)"""
         if request.user.role != 'owner':
@@ -281,16 +258,18 @@ class UserViewSet(viewsets.ModelViewSet):
     
 # ---------------- SAFETY ----------------
 
-class DailyInspectionListCreateView(generics.ListCreateAPIView):
+class DailyInspectionListCreateView(QueryPlanMixin, generics.ListCreateAPIView):
     serializer_class = DailyInspectionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SelectablePagination
+    cursor_ordering = ('-date', '-created_at', '-id')
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     ordering_fields = ['date', 'created_at', 'inspection_day']
     ordering = ['-date', '-created_at']
     search_fields = ['wc_number', 'inspector_initials', 'manager_initials']
 
     def get_queryset(self):
-        queryset = DailyInspection.objects.select_related('checked_by', 'signed_off_by')
+        queryset = DailyInspection.objects.all()
         
         # Filter by specific date
         date = self.request.query_params.get('date')
@@ -310,61 +289,23 @@ class DailyInspectionListCreateView(generics.ListCreateAPIView):
         # Filter by status
         status_filter = self.request.query_params.get('status')
         if status_filter == 'failed':
-            queryset = queryset.exclude(
-                framework_stability='pass',
-                perimeter_netting='pass',
-                wall_padding='pass',
-                walkway_padding='pass',
-                coverall_pads='pass',
-                trampoline_beds='pass',
-                safety_netting='pass',
-                trampoline_springs='pass',
-                fire_doors='pass',
-                fire_equipment='pass',
-                electrical_cables='pass',
-                electrical_sockets='pass',
-                first_aid_box='pass',
-                signage='pass',
-                area_cleanliness='pass',
-                gates_locks='pass',
-                trip_hazards='pass',
-                staff_availability='pass'
-            )
+            queryset = queryset.exclude(overall_status='pass')
         elif status_filter == 'passed':
-            queryset = queryset.filter(
-                framework_stability='pass',
-                perimeter_netting='pass',
-                wall_padding='pass',
-                walkway_padding='pass',
-                coverall_pads='pass',
-                trampoline_beds='pass',
-                safety_netting='pass',
-                trampoline_springs='pass',
-                fire_doors='pass',
-                fire_equipment='pass',
-                electrical_cables='pass',
-                electrical_sockets='pass',
-                first_aid_box='pass',
-                signage='pass',
-                area_cleanliness='pass',
-                gates_locks='pass',
-                trip_hazards='pass',
-                staff_availability='pass'
-            )
+            queryset = queryset.filter(overall_status='pass')
         
         return queryset
 
     def perform_create(self, serializer):
         serializer.save(checked_by=self.request.user)
 
-class DailyInspectionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DailyInspectionDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = DailyInspectionSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return DailyInspection.objects.select_related('checked_by', 'signed_off_by').prefetch_related('remedial_actions')
+        return DailyInspection.objects.all()
 
-class RemedialActionListCreateView(generics.ListCreateAPIView):
+class RemedialActionListCreateView(QueryPlanMixin, generics.ListCreateAPIView):
     serializer_class = RemedialActionSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
@@ -373,7 +314,7 @@ class RemedialActionListCreateView(generics.ListCreateAPIView):
     search_fields = ['inspection_code', 'issue_description']
 
     def get_queryset(self):
-        queryset = RemedialAction.objects.select_related('inspection', 'reported_by', 'assigned_to', 'completed_by')
+        queryset = RemedialAction.objects.all()
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -390,15 +331,16 @@ class RemedialActionListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(reported_by=self.request.user)
 
-class RemedialActionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class RemedialActionDetailView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = RemedialActionSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return RemedialAction.objects.select_related('inspection', 'reported_by', 'assigned_to', 'completed_by')
+        return RemedialAction.objects.all()
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional(DailyInspection, RemedialAction, User)
 def inspection_dashboard(request):
     """Dashboard endpoint providing inspection statistics"""
     # Get date range (default to last 30 days)
@@ -411,80 +353,13 @@ def inspection_dashboard(request):
     if request.GET.get('end_date'):
         end_date = datetime.strptime(request.GET.get('end_date'), '%Y-%m-%d').date()
     
-    inspections = DailyInspection.objects.filter(date__range=[start_date, end_date])
-    
-    # Calculate statistics
-    total_inspections = inspections.count()
-    
-    # Count inspections with any failed items
-    failed_inspections = 0
-    remedial_inspections = 0
-    passed_inspections = 0
-    
-    for inspection in inspections:
-        if inspection.failed_items_count > 0:
-            failed_inspections += 1
-        elif inspection.remedial_items_count > 0:
-            remedial_inspections += 1
-        else:
-            passed_inspections += 1
-    
-    # Get remedial actions summary
-    remedial_actions = RemedialAction.objects.filter(
-        inspection__date__range=[start_date, end_date]
-    ).values('status').annotate(count=Count('id'))
-    
-    remedial_summary = {action['status']: action['count'] for action in remedial_actions}
-    
-    # Recent failed inspections
-    recent_failures = DailyInspection.objects.filter(
-        date__range=[start_date, end_date]
-    ).exclude(
-        framework_stability='pass',
-        perimeter_netting='pass',
-        wall_padding='pass',
-        walkway_padding='pass',
-        coverall_pads='pass',
-        trampoline_beds='pass',
-        safety_netting='pass',
-        trampoline_springs='pass',
-        fire_doors='pass',
-        fire_equipment='pass',
-        electrical_cables='pass',
-        electrical_sockets='pass',
-        first_aid_box='pass',
-        signage='pass',
-        area_cleanliness='pass',
-        gates_locks='pass',
-        trip_hazards='pass',
-        staff_availability='pass'
-    ).order_by('-date')[:5]
-    
-    return Response({
-        'date_range': {
-            'start_date': start_date,
-            'end_date': end_date
-        },
-        'summary': {
-            'total_inspections': total_inspections,
-            'passed_inspections': passed_inspections,
-            'failed_inspections': failed_inspections,
-            'remedial_inspections': remedial_inspections,
-            'pass_rate': round((passed_inspections / total_inspections) * 100, 1) if total_inspections > 0 else 0
-        },
-        'remedial_actions': remedial_summary,
-        'recent_failures': DailyInspectionSerializer(recent_failures, many=True).data
-    })
+    return Response(InspectionDashboard(start_date, end_date).as_dict())
 
-class SafetyCheckViewSet(viewsets.ModelViewSet):
+class SafetyCheckViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = SafetyCheck.objects.all()
     serializer_class = SafetyCheckSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
 
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return SafetyCheck.objects.all()
-        return SafetyCheck.objects.filter(checked_by=self.request.user)
-
     def perform_create(self, serializer):
         serializer.save(checked_by=self.request.user)
 
@@ -498,21 +373,17 @@ class SafetyCheckViewSet(viewsets.ModelViewSet):
             date__gte=week_ago,
             overall_pass=False
         )
-        serializer = self.get_serializer(failed_checks, many=True)
+        serializer = self.get_serializer(self.plan_queryset(failed_checks), many=True)
         return Response(serializer.data)
 
 
 # ---------------- INCIDENTS ----------------
 
-class IncidentReportViewSet(viewsets.ModelViewSet):
+class IncidentReportViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = IncidentReport.objects.all()
     serializer_class = IncidentReportSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
 
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return IncidentReport.objects.all()
-        return IncidentReport.objects.filter(reported_by=self.request.user)
-
     def perform_create(self, serializer):
         serializer.save(reported_by=self.request.user)
 
@@ -529,26 +400,20 @@ class IncidentReportViewSet(viewsets.ModelViewSet):
 
 # ---------------- STAFF SHIFTS ----------------
 
-class StaffShiftViewSet(viewsets.ModelViewSet):
+class StaffShiftViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = StaffShift.objects.all()
     serializer_class = StaffShiftSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
 
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return StaffShift.objects.all()
-        return StaffShift.objects.filter(staff_member=self.request.user)
-
 
 # ---------------- CLEANING ----------------
 
-class CleaningLogViewSet(viewsets.ModelViewSet):
+class CleaningLogViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = CleaningLog.objects.all()
     serializer_class = CleaningLogSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
-
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return CleaningLog.objects.all()
-        return CleaningLog.objects.filter(cleaned_by=self.request.user)
+    pagination_class = SelectablePagination
+    cursor_ordering = ('-date', '-id')
 
     def perform_create(self, serializer):
         serializer.save(cleaned_by=self.request.user)
@@ -556,15 +421,11 @@ class CleaningLogViewSet(viewsets.ModelViewSet):
 
 # ---------------- MAINTENANCE ----------------
 
-class MaintenanceLogViewSet(viewsets.ModelViewSet):
+class MaintenanceLogViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = MaintenanceLog.objects.all()
     serializer_class = MaintenanceLogSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
 
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return MaintenanceLog.objects.all()
-        return MaintenanceLog.objects.filter(performed_by=self.request.user)
-
     def perform_create(self, serializer):
         serializer.save(performed_by=self.request.user)
 
@@ -578,27 +439,24 @@ class MaintenanceLogViewSet(viewsets.ModelViewSet):
             next_maintenance_due__lte=next_month,
             next_maintenance_due__gte=timezone.now().date()
         )
-        serializer = self.get_serializer(upcoming, many=True)
+        serializer = self.get_serializer(self.plan_queryset(upcoming), many=True)
         return Response(serializer.data)
 
 
 # ---------------- DAILY STATS ----------------
 
-class DailyStatsViewSet(viewsets.ModelViewSet):
+class DailyStatsViewSet(RoleScopedMixin, QueryPlanMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = DailyStats.objects.all()
     serializer_class = DailyStatsSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
 
-    def get_queryset(self):
-        if self.request.user.role == 'owner':
-            return DailyStats.objects.all()
-        return DailyStats.objects.filter(recorded_by=self.request.user)
-
     def perform_create(self, serializer):
         serializer.save(recorded_by=self.request.user)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional(DailyStats, IncidentReport, SafetyCheck, User, allow=sees_everything)
 def dashboard_data(request):
     if request.user.role != 'owner':
         return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
@@ -609,8 +467,9 @@ def dashboard_data(request):
 
     daily_stats = DailyStats.objects.filter(date__gte=month_ago).order_by('date')
 
-    total_visitors_month = daily_stats.aggregate(total=Sum('visitor_count'))['total'] or 0
-    total_sales_month = daily_stats.aggregate(total=Sum('cafe_sales'))['total'] or 0
+    totals = daily_stats.aggregate(visitors=Sum('visitor_count'), sales=Sum('cafe_sales'))
+    total_visitors_month = totals['visitors'] or 0
+    total_sales_month = totals['sales'] or 0
 
     recent_incidents = IncidentReport.objects.filter(date_of_accident__gte=week_ago).count()
     failed_checks = SafetyCheck.objects.filter(date__gte=week_ago, overall_pass=False).count()
@@ -618,11 +477,11 @@ def dashboard_data(request):
 
     chart_data = [
         {
-            'date': stat.date.strftime('%Y-%m-%d'),
-            'visitors': stat.visitor_count,
-            'sales': float(stat.cafe_sales)
+            'date': stat_date.strftime('%Y-%m-%d'),
+            'visitors': visitor_count,
+            'sales': float(cafe_sales)
         }
-        for stat in daily_stats
+        for stat_date, visitor_count, cafe_sales in daily_stats.values_list('date', 'visitor_count', 'cafe_sales')
     ]
 
     recent_activity = []
@@ -638,7 +497,7 @@ def dashboard_data(request):
     for incident in IncidentReport.objects.filter(date_of_accident__gte=week_ago)[:3]:
         recent_activity.append({
             'type': 'incident',
-            'message': f"Incident reported: {incident.incident_type}",
+            'message': f"Incident reported at {incident.location}",
             'date': incident.created_at.isoformat(),
             'user': incident.reported_by.get_full_name()
         })
@@ -658,9 +517,23 @@ def dashboard_data(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def timeseries_data(request):
+    """
+    Bucketed history for charts
+    Query params: start, end (YYYY-MM-DD), bucket (day/week/month),
+    series (comma separated, defaults to all)
+    """
+    if request.user.role != 'owner':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response(timeseries_from_params(request.query_params))
+
+
 # ---------------- APPRAISALS ----------------
 
-class StaffAppraisalViewSet(viewsets.ModelViewSet):
+class StaffAppraisalViewSet(RoleScopedMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """
     Staff Appraisals ViewSet
     Handles listing, searching, filtering, and restricting access
@@ -683,19 +556,21 @@ class StaffAppraisalViewSet(viewsets.ModelViewSet):
     ]
     ordering = ["-date_of_appraisal"]
 
+    def sees_everything(self, user):
+        return user.is_superuser or user.is_staff or super().sees_everything(user)
+
+    def scope_queryset(self, queryset):
+        user = self.request.user
+        if not self.sees_everything(user) and getattr(user, "role", None) == "staff":
+            # Staff also see the appraisals they wrote
+            return queryset.filter(Q(appraiser=user) | Q(employee=user))
+        return super().scope_queryset(queryset)
+
     def get_queryset(self):
         """
         Restrict queryset based on user role and filters
         """
-        qs = super().get_queryset()
-        user = self.request.user
-
-        if user.is_superuser or user.is_staff or getattr(user, "role", None) == "owner":
-            base_qs = qs
-        elif getattr(user, "role", None) == "staff":
-            base_qs = qs.filter(Q(appraiser=user) | Q(employee=user))
-        else:
-            base_qs = qs.filter(employee=user)
+        base_qs = super().get_queryset()
 
         # Optional query params
         employee = self.request.query_params.get("employee")
@@ -727,89 +602,113 @@ class StaffAppraisalViewSet(viewsets.ModelViewSet):
         serializer.save(appraiser=user)
 
 
-# ---------------- CAFE CHECKLIST ----------------
+# ---------------- CHECKLISTS ----------------
 
-class CafeChecklistViewSet(viewsets.ModelViewSet):
-    serializer_class = CafeChecklistSerializer
+class ChecklistViewSet(RoleScopedMixin, viewsets.GenericViewSet):
+    """
+    Serves the checklist items of one area through the checklist engine
+    Subclasses set ``area``; the routes match the old per-item viewsets
+    """
+    serializer_class = ChecklistItemSerializer
     permission_classes = [IsOwnerOrStaffReadOnly]
+    area = None
 
-    def get_queryset(self):
-        qs = CafeChecklist.objects.all()
+    @property
+    def engine(self):
+        return ChecklistEngine(self.area)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['area'] = self.area
+        return context
+
+    def get_item_filters(self):
+        """Role-based scoping and query filters, applied to every item lookup"""
+        filters = {}
 
         date = self.request.query_params.get("date")
         if date:
-            try:
-                qs = qs.filter(date=date)
-            except Exception:
-                raise ValidationError({"date": "Invalid date format. Use YYYY-MM-DD."})
+            filters['date'] = self.engine.parse_date(date)
 
         user = self.request.user
-        role = getattr(user, "role", None)
 
-        if role == "owner":
+        if self.sees_everything(user):
             staff_id = self.request.query_params.get("staff")
             completed = self.request.query_params.get("completed")
 
             if staff_id:
-                qs = qs.filter(updated_by_id=staff_id)
+                if not staff_id.isdigit():
+                    raise ValidationError({"staff": "Expected a user id."})
+                filters['updated_by'] = int(staff_id)
 
             if completed in ['true', 'false']:
-                is_completed = completed == 'true'
-                qs = qs.filter(completed=is_completed)
-
-            return qs
+                filters['completed'] = completed == 'true'
+
+            return filters
+
+        filters['updated_by'] = user.id
+        return filters
+
+    def get_object(self):
+        item = self.engine.get_item(self.kwargs['pk'])
+        if item is None or not self.engine.matches(item, **self.get_item_filters()):
+            raise Http404
+        self.check_object_permissions(self.request, item)
+        return item
+
+    @method_decorator(conditional(Checklist, ChecklistTemplateItem, User, per_user=True))
+    def list(self, request):
+        items = self.engine.list_items(**self.get_item_filters())
+        page = self.paginate_queryset(items)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(items, many=True).data)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # An existing item keeps its completed flag unless the client sends one
+        item = self.engine.upsert_items(
+            [serializer.validated_data], request.user, completed=serializer.validated_data.get('completed')
+        )[0]
+        return Response(self.get_serializer(item).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, pk=None, partial=False):
+        item = self.get_object()
+        serializer = self.get_serializer(item, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        changes = {
+            field: serializer.validated_data[field]
+            for field in ('completed', 'item_name')
+            if field in serializer.validated_data
+        }
+        item = self.engine.update_item(item, request.user, **changes)
+        return Response(self.get_serializer(item).data)
 
-        return qs.filter(updated_by=user)
-    
-    def perform_create(self, serializer):
-        """Automatically set user fields when creating new checklist items"""
-        serializer.save(
-            created_by=self.request.user,
-            updated_by=self.request.user
-        )
+    def partial_update(self, request, pk=None):
+        return self.update(request, pk, partial=True)
 
-    def perform_update(self, serializer):
-        """Automatically set updated_by when updating checklist items"""
-        serializer.save(updated_by=self.request.user)
+    def destroy(self, request, pk=None):
+        self.engine.delete_item(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=["post"])
     def toggle(self, request, pk=None):
-        checklist = self.get_object()
-        checklist.completed = not checklist.completed
-        checklist.updated_by = request.user
-        checklist.save()
-        return Response(self.get_serializer(checklist).data)
+        item = self.get_object()
+        item = self.engine.update_item(item, request.user, completed=not item.completed)
+        return Response(self.get_serializer(item).data)
 
-    @action(detail=False, methods=["post"])
-    def create_checklist_batch(self, request):
-        items_data = request.data.get('items', [])
-        created_items = []
-
-        for item_data in items_data:
-            item, created = CafeChecklist.objects.get_or_create(
-                date=item_data['date'],
-                checklist_type=item_data['checklist_type'],
-                item_id=item_data['item_id'],
-                defaults={
-                    'item_name': item_data['item_name'],
-                    'completed': False,
-                    'created_by': request.user,
-                    'updated_by': request.user,
-                }
-            )
-
-            if not created:
-                item.updated_by = request.user
-                item.save(update_fields=['updated_by'])
-
-            created_items.append(item)
+    def create_batch(self, request):
+        """Create or touch a batch of items with a constant number of queries"""
+        items = self.engine.upsert_items(request.data.get('items', []), request.user)
+        return Response(self.get_serializer(items, many=True).data)
 
-        serializer = CafeChecklistSerializer(created_items, many=True)
-        return Response(serializer.data)
-    
     @action(detail=False, methods=["post"])
     def batch_toggle(self, request):
-        """Toggle multiple items at once - useful for bulk operations"""
+        """Toggle multiple items at once with a constant number of queries"""
         item_ids = request.data.get('item_ids', [])
         
         if not item_ids:
@@ -818,139 +717,39 @@ class CafeChecklistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        updated_items = []
-        for item_id in item_ids:
-            try:
-                item = self.get_queryset().get(id=item_id)
-                item.completed = not item.completed
-                item.updated_by = request.user
-                item.save()
-                updated_items.append(item)
-            except CafeChecklist.DoesNotExist:
-                continue
-        
-        serializer = CafeChecklistSerializer(updated_items, many=True)
-        return Response(serializer.data)
-
-# ---------------- MARSHAL CHECKLIST ----------------
-class MarshalChecklistViewSet(viewsets.ModelViewSet):
-    serializer_class = MarshalChecklistSerializer
-    permission_classes = [IsOwnerOrStaffReadOnly]
-
-    def get_queryset(self):
-        qs = MarshalChecklist.objects.all()
-
-        date = self.request.query_params.get("date")
-        if date:
-            try:
-                qs = qs.filter(date=date)
-            except Exception:
-                raise ValidationError({"date": "Invalid date format. Use YYYY-MM-DD."})
-
-        user = self.request.user
-        role = getattr(user, "role", None)
-
-        if role == "owner":
-            staff_id = self.request.query_params.get("staff")
-            completed = self.request.query_params.get("completed")
-
-            if staff_id:
-                qs = qs.filter(updated_by_id=staff_id)
+        updated_items = self.engine.toggle_items(item_ids, request.user, **self.get_item_filters())
+        return Response(self.get_serializer(updated_items, many=True).data)
 
-            if completed in ['true', 'false']:
-                is_completed = completed == 'true'
-                qs = qs.filter(completed=is_completed)
 
-            return qs
+class CafeChecklistViewSet(ChecklistViewSet):
+    area = 'cafe'
 
-        return qs.filter(updated_by=user)
-    
-    def perform_create(self, serializer):
-        """Automatically set user fields when creating new checklist items"""
-        serializer.save(
-            created_by=self.request.user,
-            updated_by=self.request.user
-        )
+    @action(detail=False, methods=["post"])
+    def create_checklist_batch(self, request):
+        return self.create_batch(request)
 
-    def perform_update(self, serializer):
-        """Automatically set updated_by when updating checklist items"""
-        serializer.save(updated_by=self.request.user)
 
-    @action(detail=True, methods=["post"])
-    def toggle(self, request, pk=None):
-        checklist = self.get_object()
-        checklist.completed = not checklist.completed
-        checklist.updated_by = request.user
-        checklist.save()
-        return Response(self.get_serializer(checklist).data)
+class MarshalChecklistViewSet(ChecklistViewSet):
+    area = 'marshal'
 
     @action(detail=False, methods=["post"])
     def create_marshal_checklist_batch(self, request):
-        items_data = request.data.get('items', [])
-        created_items = []
-
-        for item_data in items_data:
-            item, created = MarshalChecklist.objects.get_or_create(
-                date=item_data['date'],
-                checklist_type=item_data['checklist_type'],
-                item_id=item_data['item_id'],
-                defaults={
-                    'item_name': item_data['item_name'],
-                    'completed': False,
-                    'created_by': request.user,
-                    'updated_by': request.user,
-                }
-            )
+        return self.create_batch(request)
 
-            if not created:
-                item.updated_by = request.user
-                item.save(update_fields=['updated_by'])
-
-            created_items.append(item)
-
-        serializer = MarshalChecklistSerializer(created_items, many=True)
-        return Response(serializer.data)
-    
-    @action(detail=False, methods=["post"])
-    def batch_toggle(self, request):
-        """Toggle multiple items at once - useful for bulk operations"""
-        item_ids = request.data.get('item_ids', [])
-        
-        if not item_ids:
-            return Response(
-                {"error": "item_ids is required"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        updated_items = []
-        for item_id in item_ids:
-            try:
-                item = self.get_queryset().get(id=item_id)
-                item.completed = not item.completed
-                item.updated_by = request.user
-                item.save()
-                updated_items.append(item)
-            except MarshalChecklist.DoesNotExist:
-                continue
-        
-        serializer = MarshalChecklistSerializer(updated_items, many=True)
-        return Response(serializer.data)
-    
 # ---------------- WAIVERS ----------------    
-class WaiverSessionViewSet(viewsets.ModelViewSet):
+class WaiverSessionViewSet(RoleScopedMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    queryset = WaiverSession.objects.order_by('-created_at')
     permission_classes = [IsAuthenticated]
+
+    def sees_everything(self, user):
+        # Waivers stay with the staff member who ran the session, owners included
+        return False
     
     def get_serializer_class(self):
         if self.action == 'create':
             return WaiverSessionCreateSerializer
         return WaiverSessionSerializer
 
-    def get_queryset(self):
-        user = self.request.user
-        if hasattr(user, 'role') and user.role == 'admin':
-            return WaiverSession.objects.all().order_by('-created_at')
-        return WaiverSession.objects.filter(staff=user).order_by('-created_at')
-
     def perform_create(self, serializer):
         serializer.save(staff=self.request.user)
 
@@ -962,8 +761,14 @@ class WaiverSessionViewSet(viewsets.ModelViewSet):
 class PublicWaiverSignView(APIView):
     permission_classes = [AllowAny]
 
+    def get_session(self, token):
+        try:
+            return WaiverSession.get_by_token(token)
+        except WaiverSession.DoesNotExist:
+            raise Http404
+
     def get(self, request, token):
-        session = get_object_or_404(WaiverSession, token=token)
+        session = self.get_session(token)
         
         if not session.is_valid():
             return Response(
@@ -979,7 +784,7 @@ class PublicWaiverSignView(APIView):
         })
 
     def post(self, request, token):
-        session = get_object_or_404(WaiverSession, token=token)
+        session = self.get_session(token)
         
         if not session.is_valid():
             return Response(
@@ -991,104 +796,34 @@ class PublicWaiverSignView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # Create waiver
+        # The PDF is rendered by the waiver PDF worker, so signing only
+        # records the waiver and queues its job.
+        with transaction.atomic():
+            # Mark session as used; the session may be a cached copy, so the
+            # database decides whether it was still unused
+            if not session.mark_used():
+                return Response(
+                    {"error": "This waiver link has expired or has already been used"},
+                    status=status.HTTP_410_GONE
+                )
+
             waiver = Waiver.objects.create(
                 session=session,
                 full_name=serializer.validated_data['full_name'],
-                signature=serializer.validated_data['signature'],
                 ip_address=self.get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', '')
             )
+            WaiverSignature.from_data_url(waiver, serializer.validated_data['signature']).save()
+            WaiverPdfJob.objects.create(waiver=waiver)
 
-            # Mark session as used
-            session.is_used = True
-            session.save()
-
-            # Generate PDF
-            pdf_buffer = self.generate_waiver_pdf(waiver)
-            
-            # Save PDF
-            pdf_filename = f"waiver_{waiver.full_name.replace(' ', '_')}_{waiver.signed_at.date()}.pdf"
-            waiver.pdf_file.save(pdf_filename, ContentFile(pdf_buffer.getvalue()))
-            waiver.save()
-
-            return Response({
-                "success": True,
-                "waiver_id": str(waiver.id),
-                "message": "Waiver signed successfully",
-                "pdf_url": waiver.pdf_file.url
-            }, status=status.HTTP_201_CREATED)
-
-        except Exception as e:
-            return Response(
-                {"error": "Failed to process waiver", "details": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def generate_waiver_pdf(self, waiver):
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # Title
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(72, height - 72, "LIABILITY WAIVER AND RELEASE AGREEMENT")
-
-        # Content
-        c.setFont("Helvetica", 10)
-        y_position = height - 120
-        
-        # Terms
-        terms = [
-            "I acknowledge that I am voluntarily participating in activities and assume all risks.",
-            "I hereby release the organization from any and all liability claims.",
-            "I confirm that I am in good health and physically capable of participating.",
-            "I authorize emergency medical treatment if necessary.",
-        ]
-        
-        for term in terms:
-            c.drawString(72, y_position, term)
-            y_position -= 20
-
-        # Signature section
-        y_position -= 40
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(72, y_position, "PARTICIPANT INFORMATION")
-        
-        y_position -= 20
-        c.setFont("Helvetica", 10)
-        c.drawString(72, y_position, f"Full Name: {waiver.full_name}")
-        
-        y_position -= 15
-        c.drawString(72, y_position, f"Signed Date: {waiver.signed_at.strftime('%B %d, %Y at %I:%M %p')}")
-        
-        if waiver.session.participant_email:
-            y_position -= 15
-            c.drawString(72, y_position, f"Email: {waiver.session.participant_email}")
-
-        # Signature
-        y_position -= 40
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(72, y_position, "SIGNATURE")
-        
-        if waiver.signature:
-            try:
-                signature_data = waiver.signature.split(",")[1]
-                signature_bytes = base64.b64decode(signature_data)
-                signature_image = ImageReader(io.BytesIO(signature_bytes))
-                
-                y_position -= 5
-                c.drawImage(signature_image, 72, y_position - 60, width=200, height=50)
-                y_position -= 70
-                c.drawString(72, y_position, f"Digitally signed by: {waiver.full_name}")
-            except Exception:
-                y_position -= 20
-                c.drawString(72, y_position, "Signature: [Unable to display]")
-
-        c.save()
-        buffer.seek(0)
-        return buffer
+        return Response({
+            "success": True,
+            "waiver_id": str(waiver.id),
+            "message": "Waiver signed successfully",
+            "pdf_status": waiver.pdf_status,
+            "pdf_url": None,
+            "status_url": reverse('public-waiver-status', args=[token]),
+        }, status=status.HTTP_201_CREATED)
 
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -1098,26 +833,38 @@ class PublicWaiverSignView(APIView):
             ip = request.META.get('REMOTE_ADDR')
         return ip
 
-class WaiverViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicWaiverStatusView(APIView):
+    """Poll the PDF status of the waiver signed through a link"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        waiver = get_object_or_404(
+            Waiver.objects.only('id', 'pdf_status', 'pdf_file'), session__token=token
+        )
+        return Response({
+            "waiver_id": str(waiver.id),
+            "pdf_status": waiver.pdf_status,
+            "pdf_url": waiver.pdf_file.url if waiver.pdf_status == 'ready' and waiver.pdf_file else None,
+        })
+
+class WaiverViewSet(RoleScopedMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = WaiverSerializer
+    pagination_class = SelectablePagination
+    cursor_ordering = ('-signed_at', '-id')
+
+    def sees_everything(self, user):
+        # Waivers stay with the staff member who ran the session, owners included
+        return False
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Waiver.objects.all()
-        
-        # Filter by user role
-        if not (hasattr(user, 'role') and user.role == 'admin'):
-            queryset = queryset.filter(session__staff=user)
+        # Signatures live in WaiverSignature, so listing never reads image bytes
+        queryset = self.scope_queryset(Waiver.objects.all())
         
         # Search functionality
         search_query = self.request.query_params.get('search', None)
         if search_query:
-            queryset = queryset.filter(
-                Q(full_name__icontains=search_query) |
-                Q(session__participant_name__icontains=search_query) |
-                Q(session__participant_email__icontains=search_query)
-            )
+            queryset = queryset.search(search_query)
         
         return queryset.order_by('-signed_at')
 
@@ -1127,15 +874,15 @@ class WaiverViewSet(viewsets.ReadOnlyModelViewSet):
         waiver = self.get_object()
         
         # Check permissions
-        if not (request.user.is_staff or waiver.session.staff == request.user):
+        if not (request.user.is_staff or owner_id(waiver) == request.user.id):
             return Response(
                 {"error": "Permission denied"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        if not waiver.pdf_file:
+        if waiver.pdf_status != 'ready' or not waiver.pdf_file:
             return Response(
-                {"error": "PDF not available"},
+                {"error": "PDF not available", "pdf_status": waiver.pdf_status},
                 status=status.HTTP_404_NOT_FOUND
             )
 
@@ -1147,17 +894,21 @@ class WaiverViewSet(viewsets.ReadOnlyModelViewSet):
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
     """Get dashboard statistics"""
-    user = request.user
-    
-    if hasattr(user, 'role') and user.role == 'admin':
-        sessions = WaiverSession.objects.all()
-        waivers = Waiver.objects.all()
-    else:
-        sessions = WaiverSession.objects.filter(staff=user)
-        waivers = Waiver.objects.filter(session__staff=user)
-    
-    return Response({
-        "total_sessions": sessions.count(),
-        "signed_waivers": waivers.count(),
-        "pending_sessions": sessions.filter(is_used=False).count(),
-    })
\ No newline at end of file
+    # Like the waiver lists, everyone sees the sessions they ran
+    return Response(WaiverStats(request.user).as_dict())
+
+
+# ---------------- METRICS ----------------
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, PrometheusRenderer])
+def metrics_view(request):
+    """
+    Per-endpoint request metrics of this process
+    JSON by default, Prometheus text with ?format=prometheus
+    """
+    if request.user.role != 'owner':
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response(metrics_registry.snapshot())
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'forms.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -68,6 +69,88 @@ DATABASES = {
     }
 }
 
+# Caches
+# The dashboard snapshot has its own cache so its backend can be chosen per
+# deployment with DASHBOARD_CACHE=file|db|locmem. The default file cache is
+# shared by every gunicorn worker on the host, so a write invalidates the
+# snapshot for all of them; use db when workers run on several hosts (it
+# needs `python manage.py createcachetable` first). locmem is per process:
+# a write only invalidates the worker that handled it, so it is only meant
+# for a single process (runserver) and keeps snapshots for minutes, not a day.
+DASHBOARD_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+        'TIMEOUT': 60 * 5,
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'dashboard',
+        'TIMEOUT': 60 * 60 * 24,
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'forms_dashboard_cache',
+        'TIMEOUT': 60 * 60 * 24,
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': DASHBOARD_CACHE_BACKENDS[os.environ.get('DASHBOARD_CACHE', 'file')],
+}
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+
+# Seconds a waiver link lookup stays cached (see WaiverSession.get_by_token)
+WAIVER_SESSION_CACHE_TTL = 30
+
+# Request metrics (see forms/metrics.py). Queries slower than
+# METRICS_SLOW_QUERY_MS are logged to forms.metrics.slow_queries; set it to
+# None to turn the slow query log off.
+METRICS_ENABLED = True
+METRICS_SLOW_QUERY_MS = 200
+
+# API tokens (forms.AuthToken) expire AUTH_TOKEN_TTL seconds after their
+# last use; expires_at is pushed forward at most once per
+# AUTH_TOKEN_REFRESH_INTERVAL so active clients do not write on every request
+AUTH_TOKEN_TTL = 60 * 60 * 24 * 7
+AUTH_TOKEN_REFRESH_INTERVAL = 60 * 60
+
+# Token authentication cache (see forms/authentication.py): seconds an
+# authenticated token stays cached per process, and the most tokens kept
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_CACHE_SIZE = 1024
+
+# Password hashing (see forms/hashers.py). PASSWORD_HASHER picks the
+# algorithm for new hashes: 'pbkdf2', or 'argon2' with argon2-cffi
+# installed. The remaining hashers only verify older hashes, which are
+# re-hashed on the user's next login. Set the costs from the output of
+# manage.py calibrate_password_hasher on the production machine.
+PASSWORD_HASHER_POLICIES = {
+    'pbkdf2': ['forms.hashers.TunedPBKDF2PasswordHasher', 'forms.hashers.TunedArgon2PasswordHasher'],
+    'argon2': ['forms.hashers.TunedArgon2PasswordHasher', 'forms.hashers.TunedPBKDF2PasswordHasher'],
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = PASSWORD_HASHER_POLICIES[PASSWORD_HASHER] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8))
+
+# Login rate limiting (see forms/throttling.py): after
+# LOGIN_RATE_LIMIT_FAILURES failed logins for one username from one address
+# within LOGIN_RATE_LIMIT_WINDOW seconds, further attempts get a 429
+# without checking the password
+LOGIN_RATE_LIMIT_FAILURES = 5
+LOGIN_RATE_LIMIT_WINDOW = 60 * 5
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,7 +186,7 @@ AUTH_USER_MODEL = 'forms.User'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'forms.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',